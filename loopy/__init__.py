@@ -23,6 +23,7 @@ THE SOFTWARE.
 """
 
 
+import sys
 import six
 from six.moves import range, zip
 
@@ -63,88 +64,150 @@ from loopy.types import to_loopy_type
 from loopy.kernel.creation import make_kernel, UniqueName
 from loopy.library.reduction import register_reduction_parser
 
-# {{{ import transforms
-
 from loopy.version import VERSION, MOST_RECENT_LANGUAGE_VERSION
+from loopy.options import Options
 
-from loopy.transform.iname import (
-        set_loop_priority, prioritize_loops,
-        split_iname, chunk_iname, join_inames, tag_inames, duplicate_inames,
-        rename_iname, remove_unused_inames,
-        split_reduction_inward, split_reduction_outward,
-        affine_map_inames, find_unused_axis_tag,
-        make_reduction_inames_unique,
-        has_schedulable_iname_nesting, get_iname_duplication_options,
-        add_inames_to_insn)
-
-from loopy.transform.instruction import (
-        find_instructions, map_instructions,
-        set_instruction_priority, add_dependency,
-        remove_instructions,
-        replace_instruction_ids,
-        tag_instructions,
-        add_nosync)
-
-from loopy.transform.data import (
-        add_prefetch, change_arg_to_image,
-        tag_array_axes, tag_data_axes,
-        set_array_axis_names, set_array_dim_names,
-        remove_unused_arguments,
-        alias_temporaries, set_argument_order,
-        rename_argument,
-        set_temporary_scope)
-
-from loopy.transform.subst import (extract_subst,
-        assignment_to_subst, expand_subst, find_rules_matching,
-        find_one_rule_matching)
-
-from loopy.transform.precompute import precompute
-from loopy.transform.buffer import buffer_array
-from loopy.transform.fusion import fuse_kernels
-
-from loopy.transform.arithmetic import (
-        fold_constants,
-        collect_common_factors_on_increment)
-
-from loopy.transform.padding import (
-        split_array_axis, split_array_dim, split_arg_axis,
-        find_padding_multiple,
-        add_padding)
-
-from loopy.transform.ilp import realize_ilp
-from loopy.transform.batch import to_batched
-from loopy.transform.parameter import assume, fix_parameters
-from loopy.transform.save import save_and_reload_temporaries
-from loopy.transform.add_barrier import add_barrier
-# }}}
+# {{{ lazily imported user interface
+
+# Transforms, the later compilation stages, statistics, the frontends and
+# the targets pull in a large amount of code (and, through the targets,
+# packages such as pyopencl, cgen and genpy) that a script which merely
+# builds kernels or loads them from cache does not need. Their names are
+# resolved on first access by the module-level :func:`__getattr__` below.
+
+_LAZY_IMPORTS = [
+        # {{{ transforms
+
+        ("loopy.transform.iname", [
+            "set_loop_priority", "prioritize_loops", "prioritize_loops_by_stride",
+            "split_iname", "chunk_iname", "join_inames", "tag_inames",
+            "duplicate_inames",
+            "rename_iname", "remove_unused_inames",
+            "split_reduction_inward", "split_reduction_outward",
+            "affine_map_inames", "find_unused_axis_tag",
+            "make_reduction_inames_unique",
+            "has_schedulable_iname_nesting", "get_iname_duplication_options",
+            "add_inames_to_insn", "unroll_and_jam"]),
+
+        ("loopy.transform.instruction", [
+            "find_instructions", "map_instructions",
+            "set_instruction_priority", "add_dependency",
+            "remove_instructions",
+            "replace_instruction_ids",
+            "tag_instructions",
+            "add_nosync"]),
+
+        ("loopy.transform.data", [
+            "add_prefetch", "change_arg_to_image",
+            "tag_array_axes", "tag_data_axes",
+            "set_array_axis_names", "set_array_dim_names",
+            "remove_unused_arguments",
+            "alias_temporaries", "alias_temporaries_by_liveness",
+            "set_argument_order",
+            "rename_argument",
+            "set_temporary_scope"]),
+
+        ("loopy.transform.subst", [
+            "extract_subst",
+            "assignment_to_subst", "expand_subst", "find_rules_matching",
+            "find_one_rule_matching"]),
+
+        ("loopy.transform.precompute", ["precompute"]),
+        ("loopy.transform.buffer", ["buffer_array"]),
+        ("loopy.transform.fusion", ["fuse_kernels"]),
+
+        ("loopy.transform.arithmetic", [
+            "fold_constants",
+            "collect_common_factors_on_increment"]),
+
+        ("loopy.transform.padding", [
+            "split_array_axis", "split_array_dim", "split_arg_axis",
+            "find_padding_multiple",
+            "add_padding"]),
+
+        ("loopy.transform.ilp", ["realize_ilp"]),
+        ("loopy.transform.batch", ["to_batched"]),
+        ("loopy.transform.parameter", [
+            "assume", "fix_parameters", "add_assumption_versions"]),
+        ("loopy.transform.save", ["save_and_reload_temporaries"]),
+        ("loopy.transform.add_barrier", ["add_barrier"]),
+        ("loopy.transform.hoist", ["hoist_invariants"]),
+        ("loopy.transform.atomic", [
+            "estimate_update_contention", "make_update_atomic"]),
+        ("loopy.transform.tiling", [
+            "DEFAULT_CACHE_SIZES", "choose_cache_tile_sizes", "tile_for_cache"]),
+
+        ("loopy.transform.parallelize", ["auto_parallelize"]),
+
+        # }}}
+
+        ("loopy.type_inference", ["infer_unknown_types"]),
+        ("loopy.preprocess", ["preprocess_kernel", "realize_reduction"]),
+        ("loopy.schedule", [
+            "generate_loop_schedules", "get_one_scheduled_kernel",
+            "map_schedule_hint"]),
+        ("loopy.statistics", [
+            "ToCountMap", "CountGranularity", "stringify_stats_mapping",
+            "Op", "MemAccess", "get_op_poly", "get_op_map",
+            "get_lmem_access_poly",
+            "get_DRAM_access_poly", "get_gmem_access_poly",
+            "get_mem_access_map",
+            "get_synchronization_poly", "get_synchronization_map",
+            "gather_access_footprints", "gather_access_footprint_bytes"]),
+        ("loopy.cache_model", [
+            "DEFAULT_CACHE_LINE_SIZE", "ReuseDistanceProfile",
+            "get_reuse_distance_profile", "estimate_cache_misses"]),
+        ("loopy.codegen", [
+            "PreambleInfo",
+            "generate_code", "generate_code_v2", "generate_body"]),
+        ("loopy.codegen.result", [
+            "GeneratedProgram",
+            "CodeGenerationResult"]),
+        ("loopy.compiled", ["CompiledKernel"]),
+        ("loopy.auto_test", ["auto_test_vs_ref"]),
+        ("loopy.frontend.fortran", [
+            "c_preprocess", "parse_transformed_fortran", "parse_fortran"]),
+
+        ("loopy.target", ["TargetBase", "ASTBuilderBase"]),
+        ("loopy.target.c", ["CTarget", "ExecutableCTarget", "generate_header"]),
+        ("loopy.target.cuda", ["CudaTarget"]),
+        ("loopy.target.opencl", ["OpenCLTarget"]),
+        ("loopy.target.pyopencl", ["PyOpenCLTarget"]),
+        ("loopy.target.ispc", ["ISPCTarget"]),
+        ("loopy.target.numba", ["NumbaTarget", "NumbaCudaTarget"]),
+        ]
+
+_LAZY_NAME_TO_MODULE = dict(
+        (name, module_name)
+        for module_name, names in _LAZY_IMPORTS
+        for name in names)
+
+
+def _import_lazy_name(name):
+    from importlib import import_module
+    value = getattr(import_module(_LAZY_NAME_TO_MODULE[name]), name)
+    globals()[name] = value
+    return value
 
-from loopy.type_inference import infer_unknown_types
-from loopy.preprocess import preprocess_kernel, realize_reduction
-from loopy.schedule import generate_loop_schedules, get_one_scheduled_kernel
-from loopy.statistics import (ToCountMap, CountGranularity, stringify_stats_mapping,
-        Op, MemAccess, get_op_poly, get_op_map, get_lmem_access_poly,
-        get_DRAM_access_poly, get_gmem_access_poly, get_mem_access_map,
-        get_synchronization_poly, get_synchronization_map,
-        gather_access_footprints, gather_access_footprint_bytes)
-from loopy.codegen import (
-        PreambleInfo,
-        generate_code, generate_code_v2, generate_body)
-from loopy.codegen.result import (
-        GeneratedProgram,
-        CodeGenerationResult)
-from loopy.compiled import CompiledKernel
-from loopy.options import Options
-from loopy.auto_test import auto_test_vs_ref
-from loopy.frontend.fortran import (c_preprocess, parse_transformed_fortran,
-        parse_fortran)
 
-from loopy.target import TargetBase, ASTBuilderBase
-from loopy.target.c import CTarget, ExecutableCTarget, generate_header
-from loopy.target.cuda import CudaTarget
-from loopy.target.opencl import OpenCLTarget
-from loopy.target.pyopencl import PyOpenCLTarget
-from loopy.target.ispc import ISPCTarget
-from loopy.target.numba import NumbaTarget, NumbaCudaTarget
+def __getattr__(name):
+    if name in _LAZY_NAME_TO_MODULE:
+        return _import_lazy_name(name)
+
+    raise AttributeError("module 'loopy' has no attribute '%s'" % name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAME_TO_MODULE))
+
+
+if sys.version_info < (3, 7):
+    # no support for module-level __getattr__ (PEP 562)
+    for _name in _LAZY_NAME_TO_MODULE:
+        _import_lazy_name(_name)
+    del _name
+
+# }}}
 
 
 __all__ = [
@@ -177,7 +240,7 @@ __all__ = [
 
         # {{{ transforms
 
-        "set_loop_priority", "prioritize_loops",
+        "set_loop_priority", "prioritize_loops", "prioritize_loops_by_stride",
         "split_iname", "chunk_iname", "join_inames", "tag_inames",
         "duplicate_inames",
         "rename_iname", "remove_unused_inames",
@@ -185,13 +248,14 @@ __all__ = [
         "affine_map_inames", "find_unused_axis_tag",
         "make_reduction_inames_unique",
         "has_schedulable_iname_nesting", "get_iname_duplication_options",
-        "add_inames_to_insn",
+        "add_inames_to_insn", "unroll_and_jam",
 
         "add_prefetch", "change_arg_to_image",
         "tag_array_axes", "tag_data_axes",
         "set_array_axis_names", "set_array_dim_names",
         "remove_unused_arguments",
-        "alias_temporaries", "set_argument_order",
+        "alias_temporaries", "alias_temporaries_by_liveness",
+        "set_argument_order",
         "rename_argument", "set_temporary_scope",
 
         "find_instructions", "map_instructions",
@@ -216,12 +280,20 @@ __all__ = [
 
         "to_batched",
 
-        "assume", "fix_parameters",
+        "assume", "fix_parameters", "add_assumption_versions",
 
         "save_and_reload_temporaries",
 
         "add_barrier",
 
+        "hoist_invariants",
+
+        "estimate_update_contention", "make_update_atomic",
+
+        "DEFAULT_CACHE_SIZES", "choose_cache_tile_sizes", "tile_for_cache",
+
+        "auto_parallelize",
+
         # }}}
 
         "get_dot_dependency_graph",
@@ -239,6 +311,7 @@ __all__ = [
 
         "preprocess_kernel", "realize_reduction",
         "generate_loop_schedules", "get_one_scheduled_kernel",
+        "map_schedule_hint",
         "GeneratedProgram", "CodeGenerationResult",
         "PreambleInfo",
         "generate_code", "generate_code_v2", "generate_body",
@@ -249,6 +322,9 @@ __all__ = [
         "get_synchronization_poly", "get_synchronization_map",
         "gather_access_footprints", "gather_access_footprint_bytes",
 
+        "DEFAULT_CACHE_LINE_SIZE", "ReuseDistanceProfile",
+        "get_reuse_distance_profile", "estimate_cache_misses",
+
         "CompiledKernel",
 
         "auto_test_vs_ref",
@@ -435,6 +511,9 @@ def make_copy_kernel(new_dim_tags, old_dim_tags=None):
                 commad_indices,
                 bounds
                 )
+    from loopy.transform.data import tag_array_axes
+    from loopy.transform.iname import tag_inames
+
     result = make_kernel(set_str,
             "output[%s] = input[%s]"
             % (commad_indices, commad_indices))
@@ -456,12 +535,14 @@ def make_copy_kernel(new_dim_tags, old_dim_tags=None):
 # {{{ default target
 
 _DEFAULT_TARGET = None
+_DEFAULT_TARGET_SET_UP = False
 
 
 def set_default_target(target):
     # deliberately undocumented for now
-    global _DEFAULT_TARGET
+    global _DEFAULT_TARGET, _DEFAULT_TARGET_SET_UP
     _DEFAULT_TARGET = target
+    _DEFAULT_TARGET_SET_UP = True
 
 
 def _set_up_default_target():
@@ -477,7 +558,13 @@ def _set_up_default_target():
     set_default_target(target)
 
 
-_set_up_default_target()
+def _get_default_target():
+    # Set up on first use, since determining the default target requires
+    # importing pyopencl.
+    if not _DEFAULT_TARGET_SET_UP:
+        _set_up_default_target()
+
+    return _DEFAULT_TARGET
 
 # }}}
 
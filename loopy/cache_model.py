@@ -0,0 +1,717 @@
+from __future__ import division, absolute_import
+
+__copyright__ = "Copyright (C) 2018 Andreas Kloeckner"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+import six
+import numpy as np
+
+import islpy as isl
+from islpy import dim_type
+
+from loopy.diagnostic import LoopyError
+
+import logging
+logger = logging.getLogger(__name__)
+
+__doc__ = """
+.. currentmodule:: loopy
+
+The functions in this section predict the number of cache misses caused by
+the accesses to array arguments of a kernel, for concrete values of its
+parameters. Caches are modeled as fully associative with
+least-recently-used replacement, so that an access misses a cache holding
+*C* lines if and only if at least *C* distinct lines were accessed since
+the last access to its line (its *reuse distance*). Together with
+:func:`get_op_map`, this allows ranking variants of a kernel without
+running them.
+
+.. autodata:: DEFAULT_CACHE_LINE_SIZE
+
+.. autoclass:: ReuseDistanceProfile
+
+.. autofunction:: get_reuse_distance_profile
+
+.. autofunction:: estimate_cache_misses
+"""
+
+
+#: Size (in bytes) of a cache line of a typical x86 core.
+DEFAULT_CACHE_LINE_SIZE = 64
+
+# Distance between the (virtual) base addresses of different arrays.
+_ARRAY_ADDRESS_SPACING = 2**40
+
+
+# {{{ kernel preparation
+
+def _prepare_kernel(kernel, parameters):
+    from loopy.kernel import kernel_state
+
+    if kernel.state >= kernel_state.SCHEDULED:
+        if parameters:
+            raise LoopyError("kernel is already scheduled, so its "
+                    "parameters must be fixed (using fix_parameters) "
+                    "before scheduling")
+    elif parameters:
+        from loopy.transform.parameter import fix_parameters
+        kernel = fix_parameters(kernel, **parameters)
+
+    missing_params = set()
+    for dom in kernel.domains:
+        missing_params.update(
+                set(dom.get_var_names(dim_type.param)) - kernel.all_inames())
+
+    if missing_params:
+        raise LoopyError("values for the domain parameters %s must be given"
+                % ", ".join(sorted(missing_params)))
+
+    if kernel.state >= kernel_state.SCHEDULED:
+        return kernel
+
+    if kernel.state < kernel_state.PREPROCESSED:
+        from loopy.preprocess import preprocess_kernel, infer_unknown_types
+        kernel = infer_unknown_types(kernel, expect_completion=True)
+        kernel = preprocess_kernel(kernel)
+
+    from loopy.schedule import get_one_scheduled_kernel
+    return get_one_scheduled_kernel(kernel)
+
+
+def _get_fixed_strides(arg):
+    from loopy.kernel.array import FixedStrideArrayDimTag
+    from loopy.kernel.data import ArrayBase
+
+    if not isinstance(arg, ArrayBase) or arg.dim_tags is None:
+        return None
+
+    strides = []
+    for dim_tag in arg.dim_tags:
+        if not isinstance(dim_tag, FixedStrideArrayDimTag):
+            return None
+
+        from pymbolic import evaluate
+        try:
+            strides.append(int(evaluate(dim_tag.stride, {})))
+        except Exception:
+            return None
+
+    return strides
+
+
+def _make_mem_access(arg, is_write):
+    from loopy.statistics import MemAccess, CountGranularity
+    return MemAccess(mtype="global", dtype=arg.dtype,
+            direction="store" if is_write else "load", variable=arg.name,
+            count_granularity=CountGranularity.WORKITEM)
+
+# }}}
+
+
+# {{{ trace generation
+
+class _TraceLimitReached(Exception):
+    pass
+
+
+class _LoopBoundsEvaluator(object):
+    """Evaluates the range of values of an iname, given the values of the
+    inames it is nested within.
+    """
+
+    def __init__(self, kernel):
+        self.kernel = kernel
+        self.compiled_bounds = {}
+
+    @staticmethod
+    def _compile_pw_aff(pw_aff, variables):
+        """Return a list of tuples *(condition, function)*, one for each
+        piece of *pw_aff*, compiled as functions of *variables*. *condition*
+        is *None* if the piece is the only one.
+        """
+        from loopy.symbolic import aff_to_expr, set_to_cond_expr
+        from pymbolic import compile
+
+        pieces = pw_aff.get_pieces()
+        return [
+                (None if len(pieces) == 1
+                    else compile(set_to_cond_expr(piece_set), variables),
+                    compile(aff_to_expr(aff), variables))
+                for piece_set, aff in pieces]
+
+    def _compile_bounds(self, iname, outer_inames):
+        kernel = self.kernel
+        relevant_inames = frozenset(outer_inames) | frozenset([iname])
+        domain = (kernel.get_inames_domain(relevant_inames)
+                .project_out_except(relevant_inames, [dim_type.set]))
+
+        for outer_iname in outer_inames:
+            idx = domain.get_var_dict()[outer_iname][1]
+            domain = domain.move_dims(
+                    dim_type.param, domain.dim(dim_type.param),
+                    dim_type.set, idx, 1)
+
+        # Bounds of split loops are piecewise, so evaluate them piece by
+        # piece rather than compiling the nested 'If' expressions from
+        # pw_aff_to_expr.
+        return tuple(
+                self._compile_pw_aff(bound.coalesce(), list(outer_inames))
+                for bound in [domain.dim_min(0), domain.dim_max(0)])
+
+    def __call__(self, iname, outer_inames, values):
+        key = (iname, outer_inames)
+        try:
+            bounds = self.compiled_bounds[key]
+        except KeyError:
+            bounds = self._compile_bounds(iname, outer_inames)
+            self.compiled_bounds[key] = bounds
+
+        args = [values[outer_iname] for outer_iname in outer_inames]
+
+        bound_values = []
+        for pieces in bounds:
+            for condition, function in pieces:
+                if condition is None or condition(*args):
+                    bound_values.append(function(*args))
+                    break
+            else:
+                # the loop is empty for these values of the outer inames
+                return range(0)
+
+        lower_bound, upper_bound = bound_values
+        return range(lower_bound, upper_bound + 1)
+
+
+def _get_insn_line_functions(kernel, line_size, access_keys):
+    """Return a :class:`dict` mapping instruction IDs to lists of tuples
+    *(key_index, inames, function)*, one for each access to a modeled array
+    argument, where *function* maps the values of *inames* to the accessed
+    cache line. Keys of the accesses are added to the list *access_keys*,
+    which *key_index* refers to.
+    """
+    from pymbolic import compile
+    from pymbolic.primitives import Subscript
+    from loopy.symbolic import ArrayAccessFinder, get_dependencies
+    from loopy.kernel.instruction import MultiAssignmentBase
+
+    bases = {}
+    for arg in kernel.args:
+        if _get_fixed_strides(arg) is not None:
+            bases[arg.name] = (len(bases) + 1) * _ARRAY_ADDRESS_SPACING
+
+    key_to_index = {}
+    result = {}
+
+    for insn in kernel.instructions:
+        if not isinstance(insn, MultiAssignmentBase):
+            continue
+
+        insn_inames = kernel.insn_inames(insn)
+        accesses = (
+                [(access, False)
+                    for access in ArrayAccessFinder()(insn.expression)]
+                + [(assignee, True) for assignee in insn.assignees
+                    if isinstance(assignee, Subscript)])
+
+        line_functions = []
+        for access, is_write in accesses:
+            arg = kernel.arg_dict.get(access.aggregate.name)
+            if arg is None or arg.name not in bases:
+                continue
+
+            index = access.index
+            if not isinstance(index, tuple):
+                index = (index,)
+
+            strides = _get_fixed_strides(arg)
+            if (len(index) != len(strides)
+                    or not get_dependencies(index) <= insn_inames):
+                continue
+
+            itemsize = arg.dtype.numpy_dtype.itemsize
+            address = bases[arg.name] + itemsize * sum(
+                    index_expr * stride
+                    for index_expr, stride in zip(index, strides))
+
+            inames = sorted(get_dependencies(index))
+            function = compile(address // line_size, inames)
+
+            key = _make_mem_access(arg, is_write)
+            key_index = key_to_index.get(key)
+            if key_index is None:
+                key_index = key_to_index[key] = len(access_keys)
+                access_keys.append(key)
+
+            line_functions.append((key_index, tuple(inames), function))
+
+        result[insn.id] = line_functions
+
+    return result
+
+
+def _generate_trace(kernel, line_size, max_length):
+    """Return a tuple *(access_keys, key_indices, lines, complete)*
+    describing the sequence of cache lines accessed by *kernel* when
+    executed sequentially in the order of its schedule, with the loops over
+    group axes outermost and inames not entered as loops in the schedule
+    (i.e. local axes, ILP and vectorization) innermost around each
+    instruction, with local axis 0 varying fastest.
+    """
+    from loopy.schedule import EnterLoop, LeaveLoop, RunInstruction
+    from loopy.kernel.data import GroupIndexTag, LocalIndexTag
+
+    access_keys = []
+    insn_line_functions = _get_insn_line_functions(
+            kernel, line_size, access_keys)
+    get_bounds = _LoopBoundsEvaluator(kernel)
+
+    key_indices = []
+    lines = []
+
+    schedule = kernel.schedule
+    loop_end = {}
+    loop_starts = []
+    for sched_index, sched_item in enumerate(schedule):
+        if isinstance(sched_item, EnterLoop):
+            loop_starts.append(sched_index)
+        elif isinstance(sched_item, LeaveLoop):
+            loop_end[loop_starts.pop()] = sched_index
+
+    def iname_order_key(iname):
+        tag = kernel.iname_to_tag.get(iname)
+        if isinstance(tag, LocalIndexTag):
+            return (1, -tag.axis, iname)
+        else:
+            return (0, 0, iname)
+
+    def run_nest(inames, outer_inames, values, body):
+        if not inames:
+            body(outer_inames, values)
+            return
+
+        iname = inames[0]
+        for value in get_bounds(iname, outer_inames, values):
+            values[iname] = value
+            run_nest(inames[1:], outer_inames + (iname,), values, body)
+
+        values.pop(iname, None)
+
+    def run_insn(insn_id, outer_inames, values):
+        def body(outer_inames, values):
+            for key_index, inames, function in insn_line_functions.get(
+                    insn_id, ()):
+                key_indices.append(key_index)
+                lines.append(function(*[values[iname] for iname in inames]))
+
+            if len(lines) >= max_length:
+                raise _TraceLimitReached()
+
+        extra_inames = sorted(
+                kernel.insn_inames(insn_id) - frozenset(outer_inames),
+                key=iname_order_key)
+        run_nest(extra_inames, outer_inames, values, body)
+
+    def run_schedule(start, end, outer_inames, values):
+        sched_index = start
+        while sched_index < end:
+            sched_item = schedule[sched_index]
+
+            if isinstance(sched_item, EnterLoop):
+                iname = sched_item.iname
+                block_end = loop_end[sched_index]
+
+                for value in get_bounds(iname, outer_inames, values):
+                    values[iname] = value
+                    run_schedule(sched_index + 1, block_end,
+                            outer_inames + (iname,), values)
+
+                values.pop(iname, None)
+                sched_index = block_end + 1
+
+            elif isinstance(sched_item, RunInstruction):
+                run_insn(sched_item.insn_id, outer_inames, values)
+                sched_index += 1
+
+            else:
+                sched_index += 1
+
+    group_inames = sorted(
+            (iname for iname, tag in six.iteritems(kernel.iname_to_tag)
+                if isinstance(tag, GroupIndexTag)),
+            key=lambda iname: -kernel.iname_to_tag[iname].axis)
+
+    complete = True
+    try:
+        run_nest(group_inames, (), {},
+                lambda outer_inames, values: run_schedule(
+                    0, len(schedule), outer_inames, values))
+    except _TraceLimitReached:
+        complete = False
+
+    return (access_keys,
+            np.array(key_indices, dtype=np.intp),
+            np.array(lines, dtype=np.int64),
+            complete)
+
+# }}}
+
+
+# {{{ reuse distances
+
+def _get_previous_access_indices(lines):
+    """Return an array holding, for each access in *lines*, the index of
+    the last earlier access to the same line, or -1.
+    """
+    order = np.argsort(lines, kind="mergesort")
+    sorted_lines = lines[order]
+    same_line = sorted_lines[1:] == sorted_lines[:-1]
+
+    result = np.empty(len(lines), dtype=np.intp)
+    result.fill(-1)
+    result[order[1:][same_line]] = order[:-1][same_line]
+    return result
+
+
+def _get_reuse_distances(previous, indices, max_distance):
+    """Return the number of distinct lines accessed between the accesses at
+    *indices* and the last earlier access to the same line, or -1 if there
+    is none. Distances are counted up to at least *max_distance*, if not
+    *None*, and clipped to it.
+    """
+    result = np.empty(len(indices), dtype=np.int64)
+
+    if max_distance is None:
+        chunk_size = None
+    else:
+        chunk_size = max(4*max_distance, 4096)
+
+    for i, access_index in enumerate(indices):
+        prev_index = previous[access_index]
+        if prev_index < 0:
+            result[i] = -1
+            continue
+
+        # An access in between starts a new distinct line if the last access
+        # to its line precedes prev_index.
+        window = previous[prev_index+1:access_index]
+
+        if chunk_size is None:
+            result[i] = np.count_nonzero(window <= prev_index)
+        else:
+            distance = 0
+            start = 0
+            while start < len(window) and distance < max_distance:
+                distance += np.count_nonzero(
+                        window[start:start+chunk_size] <= prev_index)
+                start += chunk_size
+
+            result[i] = min(distance, max_distance)
+
+    return result
+
+# }}}
+
+
+# {{{ reuse distance profile
+
+class ReuseDistanceProfile(object):
+    """Reuse distances of a sample of the accesses to array arguments of a
+    kernel, as obtained from :func:`get_reuse_distance_profile`.
+
+    .. attribute:: line_size
+
+        The size of a cache line in bytes.
+
+    .. attribute:: distances
+
+        A :class:`dict` mapping :class:`MemAccess` instances to
+        :class:`numpy.ndarray` instances holding the reuse distance (in cache
+        lines) of each sampled access, or -1 for the first access to a line.
+
+    .. attribute:: weights
+
+        A :class:`dict` mapping :class:`MemAccess` instances to the number of
+        accesses each sampled access stands for.
+
+    .. attribute:: max_distance
+
+        Distances larger than this are recorded as *max_distance*, or *None*
+        if distances were not clipped.
+
+    .. automethod:: predict_misses
+    """
+
+    def __init__(self, line_size, distances, weights, max_distance):
+        self.line_size = line_size
+        self.distances = distances
+        self.weights = weights
+        self.max_distance = max_distance
+
+    def predict_misses(self, cache_sizes):
+        """Return a list of :class:`ToCountMap` instances, one for each
+        entry of *cache_sizes* (in bytes), mapping :class:`MemAccess`
+        instances to the predicted number of misses in a cache of that size,
+        rounded to an integer.
+        """
+        from loopy.statistics import ToCountMap
+
+        result = []
+        for cache_size in cache_sizes:
+            nlines = cache_size // self.line_size
+            if self.max_distance is not None and nlines > self.max_distance:
+                raise ValueError("cannot predict misses for caches holding "
+                        "more than %d lines" % self.max_distance)
+
+            result.append(ToCountMap(
+                dict(
+                    (access, int(round(
+                        self.weights[access] * np.count_nonzero(
+                            (distances < 0) | (distances >= nlines)))))
+                    for access, distances in six.iteritems(self.distances)),
+                val_type=int))
+
+        return result
+
+
+def _get_total_access_counts(kernel, line_functions_keys):
+    from loopy.statistics import count
+    from pymbolic.primitives import Subscript
+    from loopy.symbolic import ArrayAccessFinder
+    from loopy.kernel.instruction import MultiAssignmentBase
+
+    result = {}
+    for insn in kernel.instructions:
+        if not isinstance(insn, MultiAssignmentBase):
+            continue
+
+        insn_inames = kernel.insn_inames(insn)
+        ninstances = count(kernel,
+                kernel.get_inames_domain(insn_inames)
+                .project_out_except(insn_inames, [dim_type.set])
+                ).eval_with_dict({})
+
+        accesses = (
+                [(access, False)
+                    for access in ArrayAccessFinder()(insn.expression)]
+                + [(assignee, True) for assignee in insn.assignees
+                    if isinstance(assignee, Subscript)])
+
+        for access, is_write in accesses:
+            arg = kernel.arg_dict.get(access.aggregate.name)
+            if arg is None:
+                continue
+
+            key = _make_mem_access(arg, is_write)
+            if key in line_functions_keys:
+                result[key] = result.get(key, 0) + ninstances
+
+    return result
+
+
+def get_reuse_distance_profile(kernel, parameters,
+        line_size=DEFAULT_CACHE_LINE_SIZE, max_trace_length=10**6,
+        nsamples=10**4, max_distance=None, seed=0):
+    """Determine the reuse distances of the accesses to array arguments with
+    fixed strides in *kernel*, by simulating its sequence of accesses.
+
+    The kernel is scheduled, and its iterations are executed in the order
+    of the schedule. Loops over group axes are executed outermost, and
+    inames that are not entered as loops in the schedule (i.e. local axes,
+    ILP and vectorization) innermost around each instruction, with local
+    axis 0 varying fastest. Predicates and accesses with indices depending
+    on data are ignored, and loops are executed over the convex hull of the
+    domain.
+
+    :arg parameters: a :class:`dict` of values for the domain parameters of
+        *kernel*. If *kernel* is already scheduled, its schedule is used
+        as-is, and its parameters must have been fixed before scheduling.
+    :arg max_trace_length: the simulation stops after this many accesses.
+        The remaining accesses are assumed to behave like those simulated.
+        Accesses not reached by the simulation are predicted to always miss.
+    :arg nsamples: the maximum number of accesses of each kind for which to
+        determine the reuse distance. If there are more, a random sample
+        (determined by *seed*) is used.
+    :arg max_distance: if not *None*, distances are only determined up to
+        this number of lines. This makes computing long distances much
+        cheaper.
+    :returns: a :class:`ReuseDistanceProfile`.
+
+    .. versionadded:: 2018.1
+    """
+    return _get_reuse_distance_profile(_prepare_kernel(kernel, parameters),
+            line_size, max_trace_length, nsamples, max_distance, seed)
+
+
+def _get_reuse_distance_profile(kernel, line_size, max_trace_length,
+        nsamples, max_distance, seed):
+    access_keys, key_indices, lines, complete = _generate_trace(
+            kernel, line_size, max_trace_length)
+
+    if complete:
+        total_counts = None
+    else:
+        logger.info("%s: simulated the first %d accesses only"
+                % (kernel.name, len(lines)))
+        total_counts = _get_total_access_counts(kernel, set(access_keys))
+
+    previous = _get_previous_access_indices(lines)
+    rng = np.random.RandomState(seed)
+
+    distances = {}
+    weights = {}
+    for key_index, key in enumerate(access_keys):
+        indices, = np.where(key_indices == key_index)
+        ntraced = len(indices)
+        if ntraced == 0:
+            if total_counts is not None and total_counts.get(key):
+                # not reached by the simulation, assume the worst
+                distances[key] = np.array([-1], dtype=np.int64)
+                weights[key] = total_counts[key]
+
+            continue
+
+        if ntraced > nsamples:
+            indices = np.sort(rng.choice(indices, nsamples, replace=False))
+
+        distances[key] = _get_reuse_distances(previous, indices, max_distance)
+
+        total_count = ntraced if total_counts is None else total_counts[key]
+        weights[key] = total_count / len(indices)
+
+    return ReuseDistanceProfile(line_size, distances, weights, max_distance)
+
+# }}}
+
+
+# {{{ estimate_cache_misses
+
+def _estimate_compulsory_misses(kernel, line_size):
+    """Return a :class:`dict` mapping :class:`MemAccess` instances to the
+    number of distinct cache lines of the array that are accessed, counted
+    towards the loads of the array if it is read at all. Return *None* if
+    the footprint of some access cannot be determined.
+    """
+    from loopy.statistics import gather_access_footprints, count
+
+    try:
+        footprints = gather_access_footprints(kernel)
+    except LoopyError:
+        return None
+
+    var_footprints = {}
+    read_vars = set()
+    for (var_name, direction), footprint in six.iteritems(footprints):
+        if var_name not in kernel.arg_dict:
+            continue
+
+        if direction == "read":
+            read_vars.add(var_name)
+
+        if var_name in var_footprints:
+            var_footprints[var_name] = var_footprints[var_name] | footprint
+        else:
+            var_footprints[var_name] = footprint
+
+    result = {}
+    for var_name, footprint in six.iteritems(var_footprints):
+        arg = kernel.arg_dict[var_name]
+        strides = _get_fixed_strides(arg)
+        if strides is None:
+            continue
+
+        itemsize = arg.dtype.numpy_dtype.itemsize
+
+        address = isl.Aff.zero_on_domain(isl.LocalSpace.from_space(
+            footprint.space))
+        for i, stride in enumerate(strides):
+            address = address.set_coefficient_val(
+                    dim_type.in_, i, stride*itemsize)
+
+        line = address.scale_down_val(line_size).floor()
+        line_set = footprint.apply(isl.Map.from_aff(line))
+
+        key = _make_mem_access(arg, is_write=var_name not in read_vars)
+        result[key] = int(count(kernel, line_set).eval_with_dict({}))
+
+    return result
+
+
+def estimate_cache_misses(kernel, parameters, cache_sizes=None,
+        line_size=DEFAULT_CACHE_LINE_SIZE, **kwargs):
+    """Predict the number of cache misses caused by the accesses to array
+    arguments with fixed strides in *kernel*.
+
+    If all data accessed by the kernel fits into the smallest cache, only
+    the first access to each cache line misses, and the number of misses is
+    obtained from the footprints of the accesses (see
+    :func:`gather_access_footprints`) without simulation. Such misses are
+    attributed to the loads of an array if it is read at all. Otherwise,
+    misses are predicted using :func:`get_reuse_distance_profile`.
+
+    :arg parameters: a :class:`dict` of values for the domain parameters of
+        *kernel*. If *kernel* is already scheduled, its schedule is used
+        as-is, and its parameters must have been fixed before scheduling.
+    :arg cache_sizes: a sequence of cache sizes in bytes, defaulting to
+        :data:`DEFAULT_CACHE_SIZES`.
+    :arg kwargs: passed on to :func:`get_reuse_distance_profile`.
+    :returns: a list of :class:`ToCountMap` instances, one for each entry of
+        *cache_sizes*, mapping :class:`MemAccess` instances to the predicted
+        number of misses in a cache of that size.
+
+    .. versionadded:: 2018.1
+    """
+    if cache_sizes is None:
+        from loopy.transform.tiling import DEFAULT_CACHE_SIZES
+        cache_sizes = DEFAULT_CACHE_SIZES
+
+    from loopy.statistics import ToCountMap
+
+    # {{{ try to avoid simulation
+
+    prepared_kernel = _prepare_kernel(kernel, parameters)
+    compulsory_misses = _estimate_compulsory_misses(prepared_kernel, line_size)
+
+    if (compulsory_misses is not None
+            and sum(six.itervalues(compulsory_misses))
+            <= min(cache_sizes) // line_size):
+        return [
+                ToCountMap(dict(compulsory_misses), val_type=int)
+                for cache_size in cache_sizes]
+
+    # }}}
+
+    profile_kwargs = dict(
+            max_trace_length=10**6, nsamples=10**4,
+            max_distance=max(cache_sizes) // line_size, seed=0)
+    for name, value in six.iteritems(kwargs):
+        if name not in profile_kwargs:
+            raise TypeError("unexpected keyword argument '%s'" % name)
+        profile_kwargs[name] = value
+
+    profile = _get_reuse_distance_profile(prepared_kernel, line_size,
+            **profile_kwargs)
+    return profile.predict_misses(cache_sizes)
+
+# }}}
+
+# vim: foldmethod=marker
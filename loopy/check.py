@@ -167,8 +167,17 @@ def _is_racing_iname_tag(tv, tag):
                 "temporary variable '%s'" % tv.name)
 
 
+def _has_extent_one(kernel, iname):
+    from loopy.diagnostic import StaticValueFindingError
+    try:
+        return kernel.get_constant_iname_length(iname) == 1
+    except (isl.Error, StaticValueFindingError):
+        # extent is not a known constant
+        return False
+
+
 def check_for_write_races(kernel):
-    from loopy.kernel.data import ConcurrentTag
+    from loopy.kernel.data import ConcurrentTag, AtomicUpdate
 
     iname_to_tag = kernel.iname_to_tag.get
     for insn in kernel.instructions:
@@ -205,6 +214,17 @@ def check_for_write_races(kernel):
             race_inames = \
                     raceable_parallel_insn_inames - assignee_inames
 
+            # Atomic updates are meant to be run concurrently, and inames of
+            # extent one do not give rise to concurrency.
+            if any(isinstance(atomicity, AtomicUpdate)
+                    and atomicity.var_name == assignee_name
+                    for atomicity in getattr(insn, "atomicity", ())):
+                race_inames = set()
+
+            race_inames = set(
+                    iname for iname in race_inames
+                    if not _has_extent_one(kernel, iname))
+
             if race_inames:
                 warn_with_kernel(kernel, "write_race(%s)" % insn.id,
                         "instruction '%s' contains a write race: "
@@ -278,8 +298,7 @@ class _AccessCheckMapper(WalkMapper):
             if not isinstance(subscript, tuple):
                 subscript = (subscript,)
 
-            from loopy.symbolic import (get_dependencies, get_access_range,
-                    UnableToDetermineAccessRange)
+            from loopy.symbolic import get_dependencies
 
             available_vars = set(self.domain.get_var_dict())
             shape_deps = set()
@@ -297,31 +316,84 @@ class _AccessCheckMapper(WalkMapper):
                             expr.aggregate.name, expr,
                             len(subscript), len(shape)))
 
-            try:
-                access_range = get_access_range(self.domain, subscript,
-                        self.kernel.assumptions)
-            except UnableToDetermineAccessRange:
-                # Likely: index was non-affine, nothing we can do.
-                return
-
-            shape_domain = isl.BasicSet.universe(access_range.get_space())
-            for idim in range(len(subscript)):
-                shape_axis = shape[idim]
+            in_bounds = self.kernel.cache_manager.op(
+                    self.domain, "is_access_in_bounds", _is_access_in_bounds,
+                    (subscript, tuple(shape), self.kernel.assumptions))
 
-                if shape_axis is not None:
-                    from loopy.isl_helpers import make_slab
-                    slab = make_slab(
-                            shape_domain.get_space(), (dim_type.in_, idim),
-                            0, shape_axis)
-
-                    shape_domain = shape_domain.intersect(slab)
-
-            if not access_range.is_subset(shape_domain):
+            if in_bounds is False:
                 raise LoopyError("'%s' in instruction '%s' "
                         "accesses out-of-bounds array element"
                         % (expr, self.insn_id))
 
 
+def _is_access_in_bounds(domain, subscript, shape, assumptions):
+    """Return whether the access to an array of shape *shape* at *subscript*
+    stays in bounds for all points of *domain*, or *None* if that cannot be
+    determined.
+    """
+
+    from loopy.symbolic import get_access_range, UnableToDetermineAccessRange
+
+    try:
+        access_range = get_access_range(domain, subscript, assumptions)
+    except UnableToDetermineAccessRange:
+        # Likely: index was non-affine, nothing we can do.
+        return None
+
+    shape_domain = isl.BasicSet.universe(access_range.get_space())
+    for idim in range(len(subscript)):
+        shape_axis = shape[idim]
+
+        if shape_axis is not None:
+            from loopy.isl_helpers import make_slab
+            slab = make_slab(
+                    shape_domain.get_space(), (dim_type.in_, idim),
+                    0, shape_axis)
+
+            shape_domain = shape_domain.intersect(slab)
+
+    return access_range.is_subset(shape_domain)
+
+
+def _restrict_domain_by_predicates(domain, predicates):
+    """Return *domain* intersected with those (conjuncts of) *predicates*
+    that are affine comparisons. Other predicates are disregarded, which
+    errs on the side of a larger domain.
+    """
+    from pymbolic.primitives import Comparison, LogicalAnd
+    from loopy.symbolic import guarded_pwaff_from_expr
+    from loopy.diagnostic import ExpressionToAffineConversionError
+
+    conditions = []
+    for pred in predicates:
+        if isinstance(pred, LogicalAnd):
+            conditions.extend(pred.children)
+        else:
+            conditions.append(pred)
+
+    for cond in conditions:
+        if not isinstance(cond, Comparison) or cond.operator == "!=":
+            continue
+
+        try:
+            left = guarded_pwaff_from_expr(
+                    domain.space, cond.left, frozenset())
+            right = guarded_pwaff_from_expr(
+                    domain.space, cond.right, frozenset())
+        except ExpressionToAffineConversionError:
+            continue
+
+        domain = domain & {
+                "<": left.lt_set,
+                "<=": left.le_set,
+                ">": left.gt_set,
+                ">=": left.ge_set,
+                "==": left.eq_set,
+                }[cond.operator](right)
+
+    return domain
+
+
 def check_bounds(kernel):
     temp_var_names = set(kernel.temporary_variables)
     for insn in kernel.instructions:
@@ -331,6 +403,8 @@ def check_bounds(kernel):
         if set(domain.get_var_names(dim_type.param)) & temp_var_names:
             continue
 
+        domain = _restrict_domain_by_predicates(domain, insn.predicates)
+
         acm = _AccessCheckMapper(kernel, domain, insn.id)
 
         def run_acm(expr):
@@ -391,32 +465,96 @@ def check_has_schedulable_iname_nesting(kernel):
 
 # {{{ check_variable_access_ordered
 
+def _compute_transitive_closure_bitsets(graph, node_to_index):
+    """Return a :class:`dict` mapping each node in *graph* to an integer
+    bitset in which bit ``node_to_index[other]`` is set if *other* is
+    reachable from the node by a (non-empty) path in *graph*.
+
+    :arg graph: a :class:`dict` mapping each node to an iterable of its
+        successors.
+    """
+
+    from loopy.tools import compute_sccs
+    result = {}
+
+    # SCCs are returned such that each SCC comes after all SCCs reachable
+    # from it.
+    for scc in compute_sccs(graph):
+        scc_set = frozenset(scc)
+
+        scc_reachable = 0
+        for node in scc:
+            for succ in graph[node]:
+                scc_reachable |= 1 << node_to_index[succ]
+                if succ not in scc_set:
+                    scc_reachable |= result[succ]
+
+        for node in scc:
+            result[node] = scc_reachable
+
+    return result
+
+
 class IndirectDependencyEdgeFinder(object):
+    """Determines whether an instruction depends (directly or indirectly) on
+    another. The transitive closure of the dependency graph is computed once,
+    as integer bitsets indexed by the position of the instruction in
+    :attr:`loopy.LoopKernel.instructions`.
+
+    .. attribute:: depends_on_bitsets
+
+        Maps an instruction ID to the bitset of instructions it depends on.
+
+    .. attribute:: dependents_bitsets
+
+        Maps an instruction ID to the bitset of instructions depending on it.
+    """
+
     def __init__(self, kernel):
         self.kernel = kernel
-        self.dep_edge_cache = {}
 
-    def __call__(self, depender_id, dependee_id):
-        cache_key = (depender_id, dependee_id)
-
-        try:
-            return self.dep_edge_cache[cache_key]
-        except KeyError:
-            pass
+        self.index_to_insn_id = [insn.id for insn in kernel.instructions]
+        self.insn_id_to_index = dict(
+                (insn_id, i) for i, insn_id in enumerate(self.index_to_insn_id))
 
-        depender = self.kernel.id_to_insn[depender_id]
+        dep_graph = dict(
+                (insn.id, [
+                    dep_id for dep_id in insn.depends_on
+                    if dep_id in self.insn_id_to_index])
+                for insn in kernel.instructions)
 
-        if dependee_id in depender.depends_on:
-            self.dep_edge_cache[cache_key] = True
-            return True
+        reverse_dep_graph = dict(
+                (insn_id, []) for insn_id in self.index_to_insn_id)
+        for insn_id, dep_ids in six.iteritems(dep_graph):
+            for dep_id in dep_ids:
+                reverse_dep_graph[dep_id].append(insn_id)
 
-        for dep in depender.depends_on:
-            if self(dep, dependee_id):
-                self.dep_edge_cache[cache_key] = True
-                return True
+        self.depends_on_bitsets = _compute_transitive_closure_bitsets(
+                dep_graph, self.insn_id_to_index)
+        self.dependents_bitsets = _compute_transitive_closure_bitsets(
+                reverse_dep_graph, self.insn_id_to_index)
 
-        self.dep_edge_cache[cache_key] = False
-        return False
+    def __call__(self, depender_id, dependee_id):
+        return bool(
+                self.depends_on_bitsets[depender_id]
+                >> self.insn_id_to_index[dependee_id] & 1)
+
+    def ids_to_bitset(self, insn_ids):
+        result = 0
+        for insn_id in insn_ids:
+            result |= 1 << self.insn_id_to_index[insn_id]
+        return result
+
+    def bitset_to_ids(self, bitset):
+        """Return a :class:`list` of the instruction IDs in *bitset*, in the
+        order of :attr:`loopy.LoopKernel.instructions`.
+        """
+        result = []
+        while bitset:
+            lowest_bit = bitset & -bitset
+            result.append(self.index_to_insn_id[lowest_bit.bit_length() - 1])
+            bitset ^= lowest_bit
+        return result
 
 
 def declares_nosync_with(kernel, var_scope, dep_a, dep_b):
@@ -457,7 +595,10 @@ def _check_variable_access_ordered_inner(kernel):
     depfind = IndirectDependencyEdgeFinder(kernel)
     aliasing_equiv_classes = find_aliasing_equivalence_classes(kernel)
 
-    for name in checked_variables:
+    from loopy.symbolic import get_access_range_overlap_checker
+    overlap_checker = get_access_range_overlap_checker(kernel)
+
+    for name in sorted(checked_variables):
         # This is a tad redundant in that this could probably be restructured
         # to iterate only over equivalence classes and not individual variables.
         # But then the access-range overlap check below would have to be smarter.
@@ -488,42 +629,47 @@ def _check_variable_access_ordered_inner(kernel):
 
         # Check even for PRIVATE scope, to ensure intentional program order.
 
-        from loopy.symbolic import AccessRangeOverlapChecker
-        overlap_checker = AccessRangeOverlapChecker(kernel)
-
-        for writer_id in writers:
-            for other_id in readers | writers:
-                if writer_id == other_id:
-                    continue
-
-                writer = kernel.id_to_insn[writer_id]
-                other = kernel.id_to_insn[other_id]
+        accessor_bitset = depfind.ids_to_bitset(readers | writers)
 
-                has_dependency_relationship = (
-                        declares_nosync_with(kernel, scope, other, writer)
-                        or
-                        depfind(writer_id, other_id)
-                        or
-                        depfind(other_id, writer_id)
-                        )
+        for writer_id in depfind.bitset_to_ids(depfind.ids_to_bitset(writers)):
+            writer = kernel.id_to_insn[writer_id]
 
-                if has_dependency_relationship:
-                    continue
+            # accessors without a (possibly indirect) dependency relationship
+            unordered_other_ids = [
+                    other_id
+                    for other_id in depfind.bitset_to_ids(
+                        accessor_bitset
+                        & ~depfind.ids_to_bitset([writer_id])
+                        & ~depfind.depends_on_bitsets[writer_id]
+                        & ~depfind.dependents_bitsets[writer_id])
+                    if not declares_nosync_with(
+                        kernel, scope, kernel.id_to_insn[other_id], writer)]
 
-                is_relationship_by_aliasing = not (
+            def is_relationship_by_aliasing(other_id):
+                return not (
                         writer_id in unaliased_writers
                         and (other_id in unaliased_writers
                             or other_id in unaliased_readers))
 
-                # Do not enforce ordering for disjoint access ranges
-                if (not is_relationship_by_aliasing and not
-                    overlap_checker.do_access_ranges_overlap_conservative(
-                            writer_id, "w", other_id, "any", name)):
+            # Do not enforce ordering for disjoint access ranges
+            overlapping_other_ids = set(
+                    overlap_checker.find_overlapping_accesses_conservative(
+                        writer_id, "w",
+                        [other_id
+                            for other_id in unordered_other_ids
+                            if not is_relationship_by_aliasing(other_id)],
+                        "any", name))
+
+            for other_id in unordered_other_ids:
+                other = kernel.id_to_insn[other_id]
+
+                if (not is_relationship_by_aliasing(other_id)
+                        and other_id not in overlapping_other_ids):
                     continue
 
                 # Do not enforce ordering for aliasing-based relationships
                 # in different groups.
-                if (is_relationship_by_aliasing and (
+                if (is_relationship_by_aliasing(other_id) and (
                         bool(writer.groups & other.conflicts_with_groups)
                         or
                         bool(other.groups & writer.conflicts_with_groups))):
@@ -374,6 +374,141 @@ class PreambleInfo(ImmutableRecord):
 
 # {{{ main code generation entrypoint
 
+# {{{ code generation for kernels with assumption versions
+
+def _get_version_kernel(kernel, name, assumptions):
+    from loopy.schedule import CallKernel, ReturnFromKernel
+
+    def rename_program(program_name):
+        if program_name.startswith(kernel.name):
+            return name + program_name[len(kernel.name):]
+        else:
+            return name + "_" + program_name
+
+    schedule = [
+            sched_item.copy(kernel_name=rename_program(sched_item.kernel_name))
+            if isinstance(sched_item, (CallKernel, ReturnFromKernel))
+            else sched_item
+            for sched_item in kernel.schedule]
+
+    return kernel.copy(
+            name=name,
+            schedule=schedule,
+            assumptions=assumptions,
+            assumption_versions=())
+
+
+def _generate_versioned_code(codegen_state):
+    """Generate code for each of the
+    :attr:`loopy.LoopKernel.assumption_versions` of the kernel in
+    *codegen_state* and for a generic version of it, along with a host
+    program calling the first version whose assumptions hold.
+    """
+    kernel = codegen_state.kernel
+    ast_builder = codegen_state.ast_builder
+
+    if not ast_builder.can_implement_version_dispatch:
+        raise LoopyError("kernel '%s' has assumption versions, but target "
+                "'%s' cannot dispatch among them" % (
+                    kernel.name, type(kernel.target).__name__))
+
+    versions = []
+    for version in kernel.assumption_versions:
+        kernel_assumptions, version = isl.align_two(kernel.assumptions, version)
+        versions.append(kernel_assumptions.params() & version.params())
+
+    # {{{ order versions
+
+    # Versions whose assumptions imply those of others are more specialized
+    # and get tried first.
+
+    def is_strict_subset(set_a, set_b):
+        set_a, set_b = isl.align_two(set_a, set_b)
+        return set_a.is_strict_subset(set_b)
+
+    version_indices = sorted(
+            range(len(versions)),
+            key=lambda i: -sum(
+                1 for other in versions if is_strict_subset(versions[i], other)))
+
+    # }}}
+
+    from loopy.symbolic import basic_set_to_cond_expr, get_dependencies
+    from loopy.kernel.data import ValueArg
+    from pymbolic.mapper.stringifier import PREC_NONE
+    ecm = ast_builder.get_expression_to_code_mapper(codegen_state)
+
+    condition_strs_and_kernels = []
+    for i in version_indices:
+        version = versions[i]
+        if version.is_empty():
+            continue
+
+        version_kernel = _get_version_kernel(
+                kernel, "%s_v%d" % (kernel.name, i), version)
+
+        kernel_assumptions, version = isl.align_two(kernel.assumptions, version)
+        if kernel_assumptions.is_subset(version):
+            # This version is always applicable, no need for anything after it.
+            condition_strs_and_kernels.append((None, version_kernel))
+            break
+
+        condition = basic_set_to_cond_expr(version.gist(kernel_assumptions))
+        for dep in get_dependencies(condition):
+            if not isinstance(kernel.arg_dict.get(dep), ValueArg):
+                raise LoopyError("cannot dispatch among versions of kernel "
+                        "'%s' based on '%s', which is not a value argument"
+                        % (kernel.name, dep))
+
+        condition_strs_and_kernels.append(
+                (ecm(condition, PREC_NONE, "i"), version_kernel))
+
+    else:
+        condition_strs_and_kernels.append(
+                (None, _get_version_kernel(
+                    kernel, kernel.name + "_generic", kernel.assumptions)))
+
+    codegen_results = [
+            generate_code_v2(version_kernel)
+            for _, version_kernel in condition_strs_and_kernels]
+
+    dispatch_ast = ast_builder.get_version_dispatch(codegen_state, [
+            (condition_str, codegen_result.host_program.name)
+            for (condition_str, _), codegen_result
+            in zip(condition_strs_and_kernels, codegen_results)])
+
+    host_asts = []
+    device_programs = []
+    host_preambles = []
+    device_preambles = []
+    implemented_domains = {}
+    for codegen_result in codegen_results:
+        host_asts.extend([
+            codegen_result.host_program.ast, ast_builder.emit_blank_line()])
+        device_programs.extend(codegen_result.device_programs)
+        host_preambles.extend(getattr(codegen_result, "host_preambles", []))
+        device_preambles.extend(getattr(codegen_result, "device_preambles", []))
+
+        for insn_id, domains in six.iteritems(
+                codegen_result.implemented_domains):
+            implemented_domains.setdefault(insn_id, []).extend(domains)
+
+    from loopy.codegen.result import CodeGenerationResult, GeneratedProgram
+    from loopy.tools import LazilyUnpicklingDict
+    return CodeGenerationResult(
+            host_program=GeneratedProgram(
+                name=codegen_state.gen_program_name,
+                is_device_program=False,
+                ast=ast_builder.ast_block_scope_class(host_asts + [dispatch_ast])),
+            device_programs=device_programs,
+            host_preambles=host_preambles,
+            device_preambles=device_preambles,
+            implemented_domains=LazilyUnpicklingDict(implemented_domains),
+            implemented_data_info=codegen_state.implemented_data_info)
+
+# }}}
+
+
 def generate_code_v2(kernel):
     """
     :returns: a :class:`CodeGenerationResult`
@@ -472,6 +607,14 @@ def generate_code_v2(kernel):
                 + kernel.target.host_program_name_suffix),
             schedule_index_end=len(kernel.schedule))
 
+    if kernel.assumption_versions:
+        codegen_result = _generate_versioned_code(codegen_state)
+
+        if CACHING_ENABLED:
+            code_gen_cache.store_if_not_present(input_kernel, codegen_result)
+
+        return codegen_result
+
     from loopy.codegen.result import generate_host_or_device_program
     codegen_result = generate_host_or_device_program(
             codegen_state,
@@ -34,7 +34,55 @@ from pymbolic.mapper.stringifier import PREC_NONE
 
 # {{{ conditional-reducing slab decomposition
 
-def get_slab_decomposition(kernel, iname):
+def _get_slabs_for_bound(space, iname, bound_pw_aff, rel, incr):
+    """Return a list of :class:`islpy.BasicSet` instances covering the iname
+    values within *incr* of *bound_pw_aff* (in direction *rel*, ``"<"`` for
+    lower bounds and ``">"`` for upper bounds), and a list of constraints
+    describing the remaining values.
+
+    If *bound_pw_aff* has more than one piece, the remaining values are
+    described by the bounds of all pieces, and the peeled values by one slab
+    per piece.
+    """
+    from loopy.isl_helpers import iname_rel_aff
+
+    bulk_rel = {"<": ">=", ">": "<="}[rel]
+    if rel == "<":
+        bound_affs = [aff + incr
+                for _, aff in bound_pw_aff.coalesce().get_pieces()]
+    else:
+        bound_affs = [aff - incr
+                for _, aff in bound_pw_aff.coalesce().get_pieces()]
+
+    bulk_constraints = [
+            isl.Constraint.inequality_from_aff(
+                iname_rel_aff(space, iname, bulk_rel, aff))
+            for aff in bound_affs]
+
+    # Make the peeled slabs disjoint by requiring each one to satisfy the
+    # bulk constraints of the pieces before it.
+    peeled_slabs = []
+    for i, aff in enumerate(bound_affs):
+        slab = (isl.BasicSet.universe(space)
+                .add_constraint(
+                    isl.Constraint.inequality_from_aff(
+                        iname_rel_aff(space, iname, rel, aff))))
+        for cns in bulk_constraints[:i]:
+            slab = slab.add_constraint(cns)
+        peeled_slabs.append(slab)
+
+    return peeled_slabs, bulk_constraints
+
+
+def get_slab_decomposition(kernel, iname, sched_index=None):
+    """Return a list of tuples ``(slab_name, slab)``, where *slab* is an
+    :class:`islpy.BasicSet` restricting *iname*, such that the slabs
+    partition the iteration space of *iname*.
+
+    :arg sched_index: If given, the index of the schedule item entering the
+        loop over *iname*. Enables picking slab increments automatically if
+        none were specified and :attr:`loopy.Options.auto_peel_loops` is set.
+    """
     iname_domain = kernel.get_inames_domain(iname)
 
     if iname_domain.is_empty():
@@ -43,74 +91,150 @@ def get_slab_decomposition(kernel, iname):
     space = iname_domain.space
 
     lower_incr, upper_incr = kernel.iname_slab_increments.get(iname, (0, 0))
-    lower_bulk_bound = None
-    upper_bulk_bound = None
+
+    if (not (lower_incr or upper_incr)
+            and sched_index is not None
+            and kernel.options.auto_peel_loops):
+        lower_incr, upper_incr = get_auto_slab_increments(kernel, sched_index)
 
     if lower_incr or upper_incr:
         bounds = kernel.get_iname_bounds(iname)
 
-        lower_bound_pw_aff_pieces = bounds.lower_bound_pw_aff.coalesce().get_pieces()
-        upper_bound_pw_aff_pieces = bounds.upper_bound_pw_aff.coalesce().get_pieces()
-
-        if len(lower_bound_pw_aff_pieces) > 1:
-            raise NotImplementedError("lower bound for slab decomp of '%s' needs "
-                    "conditional/has more than one piece" % iname)
-        if len(upper_bound_pw_aff_pieces) > 1:
-            raise NotImplementedError("upper bound for slab decomp of '%s' needs "
-                    "conditional/has more than one piece" % iname)
-
-        (_, lower_bound_aff), = lower_bound_pw_aff_pieces
-        (_, upper_bound_aff), = upper_bound_pw_aff_pieces
-
-        from loopy.isl_helpers import iname_rel_aff
+        slabs = []
+        bulk_slab = isl.BasicSet.universe(space)
 
         if lower_incr:
             assert lower_incr > 0
-            lower_slab = ("initial", isl.BasicSet.universe(space)
-                    .add_constraint(
-                        isl.Constraint.inequality_from_aff(
-                            iname_rel_aff(space,
-                                iname, "<", lower_bound_aff+lower_incr))))
-            lower_bulk_bound = (
-                    isl.Constraint.inequality_from_aff(
-                        iname_rel_aff(space,
-                            iname, ">=", lower_bound_aff+lower_incr)))
+            lower_slabs, lower_bulk_constraints = _get_slabs_for_bound(
+                    space, iname, bounds.lower_bound_pw_aff, "<", lower_incr)
+            for cns in lower_bulk_constraints:
+                bulk_slab = bulk_slab.add_constraint(cns)
         else:
-            lower_slab = None
+            lower_slabs = []
 
         if upper_incr:
             assert upper_incr > 0
-            upper_slab = ("final", isl.BasicSet.universe(space)
-                    .add_constraint(
-                        isl.Constraint.inequality_from_aff(
-                            iname_rel_aff(space,
-                                iname, ">", upper_bound_aff-upper_incr))))
-            upper_bulk_bound = (
-                    isl.Constraint.inequality_from_aff(
-                        iname_rel_aff(space,
-                            iname, "<=", upper_bound_aff-upper_incr)))
+            upper_slabs, upper_bulk_constraints = _get_slabs_for_bound(
+                    space, iname, bounds.upper_bound_pw_aff, ">", upper_incr)
+            for cns in upper_bulk_constraints:
+                bulk_slab = bulk_slab.add_constraint(cns)
+
+            if lower_incr:
+                # The final slabs must not overlap the initial ones.
+                for cns in lower_bulk_constraints:
+                    upper_slabs = [
+                            slab.add_constraint(cns) for slab in upper_slabs]
         else:
-            upper_slab = None
-
-        slabs = []
-
-        bulk_slab = isl.BasicSet.universe(space)
-        if lower_bulk_bound is not None:
-            bulk_slab = bulk_slab.add_constraint(lower_bulk_bound)
-        if upper_bulk_bound is not None:
-            bulk_slab = bulk_slab.add_constraint(upper_bulk_bound)
+            upper_slabs = []
 
+        # Keep the slabs in iteration order.
+        slabs.extend(("initial", slab) for slab in lower_slabs)
         slabs.append(("bulk", bulk_slab))
-        if lower_slab:
-            slabs.append(lower_slab)
-        if upper_slab:
-            slabs.append(upper_slab)
+        slabs.extend(("final", slab) for slab in upper_slabs)
 
         return slabs
 
     else:
         return [("bulk", (isl.BasicSet.universe(space)))]
 
+
+# Loops whose bodies contain more instructions than this are not peeled
+# automatically, to limit the growth of the generated code.
+AUTO_PEEL_MAX_BODY_INSNS = 16
+
+AUTO_PEEL_INCREMENTS = [(0, 1), (1, 0), (1, 1)]
+
+
+def _get_nested_loop_bound_piece_counts(kernel, sched_index, slab):
+    """Return the maximum number of pieces of the lower and upper bounds of
+    the sequential loops nested within the loop entered at *sched_index*,
+    when the iteration space of that loop is restricted to *slab*.
+    """
+    from loopy.schedule import EnterLoop, gather_schedule_block
+    from loopy.codegen.bounds import get_usable_inames_for_conditional
+
+    _, end_index = gather_schedule_block(kernel.schedule, sched_index)
+
+    result = 0
+    for inner_sched_index in range(sched_index + 1, end_index):
+        sched_item = kernel.schedule[inner_sched_index]
+        if not isinstance(sched_item, EnterLoop):
+            continue
+
+        inner_iname = sched_item.iname
+        usable_inames = get_usable_inames_for_conditional(
+                kernel, inner_sched_index)
+
+        domain = kernel.get_inames_domain(
+                frozenset([inner_iname]) | usable_inames)
+        domain, aligned_slab = isl.align_two(domain, slab)
+        domain = domain & aligned_slab
+        domain, assumptions = isl.align_two(
+                domain, isl.BasicSet.from_params(kernel.assumptions))
+        domain = domain & assumptions
+
+        for name in sorted(domain.get_var_names(dim_type.set)):
+            if name == inner_iname:
+                continue
+            dt, idx = domain.get_var_dict()[name]
+            if name in usable_inames:
+                domain = domain.move_dims(
+                        dim_type.param, domain.dim(dim_type.param), dt, idx, 1)
+            else:
+                domain = domain.project_out(dt, idx, 1)
+
+        _, inner_idx = domain.get_var_dict()[inner_iname]
+        for bound in [domain.dim_min(inner_idx), domain.dim_max(inner_idx)]:
+            bound = bound.gist(domain.params()).coalesce()
+            result = max(result, bound.n_piece())
+
+    return result
+
+
+def get_auto_slab_increments(kernel, sched_index):
+    """Return a tuple ``(lower_incr, upper_incr)`` of the number of initial
+    and final iterations to peel off the loop entered at *sched_index* in
+    order for the bounds of the loops nested within it to be free of
+    conditionals, or ``(0, 0)`` if peeling is not possible or not worthwhile.
+    """
+    from loopy.schedule import get_insn_ids_for_block_at
+    from loopy.kernel.data import HardwareConcurrentTag
+
+    iname = kernel.schedule[sched_index].iname
+    if isinstance(kernel.iname_to_tag.get(iname), HardwareConcurrentTag):
+        return (0, 0)
+
+    if (len(get_insn_ids_for_block_at(kernel.schedule, sched_index))
+            > AUTO_PEEL_MAX_BODY_INSNS):
+        return (0, 0)
+
+    space = kernel.get_inames_domain(iname).space
+
+    if _get_nested_loop_bound_piece_counts(
+            kernel, sched_index, isl.BasicSet.universe(space)) <= 1:
+        return (0, 0)
+
+    bounds = kernel.get_iname_bounds(iname)
+
+    for lower_incr, upper_incr in AUTO_PEEL_INCREMENTS:
+        bulk_slab = isl.BasicSet.universe(space)
+        if lower_incr:
+            _, constraints = _get_slabs_for_bound(
+                    space, iname, bounds.lower_bound_pw_aff, "<", lower_incr)
+            for cns in constraints:
+                bulk_slab = bulk_slab.add_constraint(cns)
+        if upper_incr:
+            _, constraints = _get_slabs_for_bound(
+                    space, iname, bounds.upper_bound_pw_aff, ">", upper_incr)
+            for cns in constraints:
+                bulk_slab = bulk_slab.add_constraint(cns)
+
+        if _get_nested_loop_bound_piece_counts(
+                kernel, sched_index, bulk_slab) <= 1:
+            return (lower_incr, upper_incr)
+
+    return (0, 0)
+
 # }}}
 
 
@@ -347,7 +471,7 @@ def generate_sequential_loop_dim_code(codegen_state, sched_index):
     ecm = codegen_state.expression_to_code_mapper
     loop_iname = kernel.schedule[sched_index].iname
 
-    slabs = get_slab_decomposition(kernel, loop_iname)
+    slabs = get_slab_decomposition(kernel, loop_iname, sched_index)
 
     from loopy.codegen.bounds import get_usable_inames_for_conditional
 
@@ -61,6 +61,12 @@ class GeneratedProgram(ImmutableRecord):
         Once generated, this captures the AST of the operative function
         body (including declaration of necessary temporaries), but not
         the overall function definition.
+
+    .. attribute:: n_eliminated_conditionals
+
+        The number of conditionals merged into an identical adjacent or
+        enclosing conditional, or hoisted out of a loop, when the program
+        was generated. See :attr:`loopy.Options.disable_guard_minimization`.
     """
 
 
@@ -83,6 +89,7 @@ class CodeGenerationResult(ImmutableRecord):
     .. automethod:: host_code
     .. automethod:: device_code
     .. automethod:: all_code
+    .. autoattribute:: n_eliminated_conditionals
 
     .. attribute:: implemented_data_info
 
@@ -143,6 +150,19 @@ class CodeGenerationResult(ImmutableRecord):
                 + "\n\n"
                 + str(self.host_program.ast))
 
+    @property
+    def n_eliminated_conditionals(self):
+        """The total number of conditionals eliminated in all programs, see
+        :attr:`GeneratedProgram.n_eliminated_conditionals`.
+        """
+        programs = list(self.device_programs)
+        if self.host_program is not None:
+            programs.append(self.host_program)
+
+        return sum(
+                getattr(prg, "n_eliminated_conditionals", 0)
+                for prg in programs)
+
     def current_program(self, codegen_state):
         if codegen_state.is_generating_device_code:
             if self.device_programs:
@@ -301,6 +321,12 @@ def generate_host_or_device_program(codegen_state, schedule_index):
 
     cur_prog = codegen_result.current_program(codegen_state)
     body_ast = cur_prog.ast
+
+    if codegen_state.kernel.options.disable_guard_minimization:
+        n_eliminated_conditionals = 0
+    else:
+        body_ast, n_eliminated_conditionals = ast_builder.minimize_guards(
+                codegen_state, body_ast)
     fdecl_ast = ast_builder.get_function_declaration(
             codegen_state, codegen_result, schedule_index)
 
@@ -312,7 +338,8 @@ def generate_host_or_device_program(codegen_state, schedule_index):
             codegen_state,
             cur_prog.copy(
                 ast=ast_builder.process_ast(fdef_ast),
-                body_ast=ast_builder.process_ast(body_ast)))
+                body_ast=ast_builder.process_ast(body_ast),
+                n_eliminated_conditionals=n_eliminated_conditionals))
 
     return codegen_result
 
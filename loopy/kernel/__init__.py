@@ -93,6 +93,58 @@ class _UniqueVarNameGenerator(UniqueNameGenerator):
 # }}}
 
 
+# {{{ memoization with carry-over across kernel copies
+
+def memoize_method_depending_on(*field_names):
+    """Like :func:`pytools.memoize_method`, but additionally declare that the
+    result of the decorated :class:`LoopKernel` method depends only on its
+    arguments and on the kernel attributes named in *field_names*.
+    :meth:`LoopKernel.copy` carries cached results over to copies that
+    leave all of these attributes unchanged.
+
+    The declaration must cover the attributes read by the method itself as
+    well as those read by any other method it calls.
+    """
+
+    def decorator(method):
+        wrapper = memoize_method(method)
+        wrapper.cache_dict_name = intern("_memoize_dic_"+method.__name__)
+        wrapper.depends_on_fields = frozenset(field_names)
+        return wrapper
+
+    return decorator
+
+
+_DERIVED_DATA_DEPENDENCIES_CACHE = {}
+
+
+def _get_derived_data_dependencies(cls):
+    """Return a :class:`list` of tuples *(cache_dict_name, field_names)* for
+    all methods of *cls* decorated with :func:`memoize_method_depending_on`.
+    """
+
+    try:
+        return _DERIVED_DATA_DEPENDENCIES_CACHE[cls]
+    except KeyError:
+        pass
+
+    result = {}
+    for base_cls in reversed(cls.__mro__):
+        for attr in six.itervalues(base_cls.__dict__):
+            if isinstance(attr, property):
+                attr = attr.fget
+
+            depends_on_fields = getattr(attr, "depends_on_fields", None)
+            if depends_on_fields is not None:
+                result[attr.cache_dict_name] = depends_on_fields
+
+    result = list(six.iteritems(result))
+    _DERIVED_DATA_DEPENDENCIES_CACHE[cls] = result
+    return result
+
+# }}}
+
+
 # {{{ loop kernel object
 
 class kernel_state:  # noqa
@@ -130,6 +182,13 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         A :class:`islpy.BasicSet` parameter domain.
 
+    .. attribute:: assumption_versions
+
+        A :class:`tuple` of :class:`islpy.BasicSet` parameter domains, for
+        each of which a specialized version of the kernel is generated
+        and dispatched to at run time. See
+        :func:`loopy.add_assumption_versions`.
+
     .. attribute:: local_sizes
     .. attribute:: temporary_variables
 
@@ -192,6 +251,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
             preambles=[],
             preamble_generators=[],
             assumptions=None,
+            assumption_versions=(),
             local_sizes={},
             temporary_variables={},
             iname_to_tag={},
@@ -274,6 +334,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
                 preambles=preambles,
                 preamble_generators=preamble_generators,
                 assumptions=assumptions,
+                assumption_versions=assumption_versions,
                 iname_slab_increments=iname_slab_increments,
                 loop_priority=loop_priority,
                 silenced_warnings=silenced_warnings,
@@ -296,6 +357,54 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     # }}}
 
+    # {{{ copying
+
+    def copy(self, **kwargs):
+        """Return a copy of *self* with the attributes given in *kwargs*
+        replaced.
+
+        Results of methods memoized with :func:`memoize_method_depending_on`
+        are shared with the copy if none of the attributes they depend on
+        are being replaced, as are the persistent hash digests of unchanged
+        attributes. Attributes are compared by identity, so passing an equal
+        but newly created object counts as a change.
+        """
+
+        result = super(LoopKernel, self).copy(**kwargs)
+
+        changed_fields = frozenset(
+                field_name
+                for field_name, value in six.iteritems(kwargs)
+                if getattr(self, field_name, None) is not value)
+
+        for cache_dict_name, depends_on_fields in (
+                _get_derived_data_dependencies(type(self))):
+            if depends_on_fields & changed_fields:
+                continue
+
+            try:
+                cache_dict = getattr(self, cache_dict_name)
+            except AttributeError:
+                continue
+
+            # The dictionary is shared, not copied, so that results computed
+            # later on either kernel benefit the other.
+            setattr(result, cache_dict_name, cache_dict)
+
+        try:
+            field_digests = self._field_persistent_hash_digests
+        except AttributeError:
+            pass
+        else:
+            result._field_persistent_hash_digests = dict(
+                    (field_name, digest)
+                    for field_name, digest in six.iteritems(field_digests)
+                    if field_name not in changed_fields)
+
+        return result
+
+    # }}}
+
     # {{{ function mangling
 
     def mangle_function(self, identifier, arg_dtypes, ast_builder=None):
@@ -357,12 +466,13 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     # {{{ name wrangling
 
-    @memoize_method
+    @memoize_method_depending_on("args", "temporary_variables")
     def non_iname_variable_names(self):
         return (set(six.iterkeys(self.arg_dict))
                 | set(six.iterkeys(self.temporary_variables)))
 
-    @memoize_method
+    @memoize_method_depending_on(
+            "args", "temporary_variables", "substitutions", "domains")
     def all_variable_names(self, include_temp_storage=True):
         return (
                 set(six.iterkeys(self.temporary_variables))
@@ -417,7 +527,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
         raise ValueError("nothing known about variable '%s'" % name)
 
     @property
-    @memoize_method
+    @memoize_method_depending_on("instructions")
     def id_to_insn(self):
         return dict((insn.id, insn) for insn in self.instructions)
 
@@ -425,7 +535,11 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     # {{{ domain wrangling
 
-    @memoize_method
+    # Besides the domains themselves, the nesting of domains depends on the
+    # instructions writing to loop bounds, see
+    # :func:`loopy.kernel.tools.is_domain_dependent_on_inames`.
+    @memoize_method_depending_on(
+            "domains", "temporary_variables", "instructions")
     def parents_per_domain(self):
         """Return a list corresponding to self.domains (by index)
         containing domain indices which are nested around this
@@ -489,7 +603,8 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return result
 
-    @memoize_method
+    @memoize_method_depending_on(
+            "domains", "temporary_variables", "instructions")
     def all_parents_per_domain(self):
         """Return a list corresponding to self.domains (by index)
         containing domain indices which are nested around this
@@ -512,7 +627,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return result
 
-    @memoize_method
+    @memoize_method_depending_on("domains")
     def _get_home_domain_map(self):
         return dict(
                 (iname, i_domain)
@@ -529,7 +644,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         assert False
 
-    @memoize_method
+    @memoize_method_depending_on("domains")
     def combine_domains(self, domains):
         """
         :arg domains: domain indices of domains to be combined. More 'dominant'
@@ -568,7 +683,8 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return self._get_inames_domain_backend(inames)
 
-    @memoize_method
+    @memoize_method_depending_on(
+            "domains", "temporary_variables", "instructions")
     def get_leaf_domain_indices(self, inames):
         """Find the leaves of the domain tree needed to cover all inames.
 
@@ -614,7 +730,8 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return list(root_to_leaf.values())
 
-    @memoize_method
+    @memoize_method_depending_on(
+            "domains", "temporary_variables", "instructions")
     def _get_inames_domain_backend(self, inames):
         domain_indices = set()
         for leaf_dom_idx in self.get_leaf_domain_indices(inames):
@@ -627,7 +744,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     # {{{ iname wrangling
 
-    @memoize_method
+    @memoize_method_depending_on("domains")
     def all_inames(self):
         result = set()
         for dom in self.domains:
@@ -635,7 +752,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
                     intern(n) for n in dom.get_var_names(dim_type.set))
         return frozenset(result)
 
-    @memoize_method
+    @memoize_method_depending_on("domains")
     def all_params(self):
         all_inames = self.all_inames()
 
@@ -659,7 +776,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
         from loopy.tools import intern_frozenset_of_ids
         return intern_frozenset_of_ids(all_params-all_inames)
 
-    @memoize_method
+    @memoize_method_depending_on("instructions")
     def all_insn_inames(self):
         """Return a mapping from instruction ids to inames inside which
         they should be run.
@@ -670,7 +787,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return result
 
-    @memoize_method
+    @memoize_method_depending_on("instructions")
     def all_referenced_inames(self):
         result = set()
         for inames in six.itervalues(self.all_insn_inames()):
@@ -682,7 +799,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
             insn = self.id_to_insn[insn]
         return insn.within_inames
 
-    @memoize_method
+    @memoize_method_depending_on("domains", "instructions")
     def iname_to_insns(self):
         result = dict(
                 (iname, set()) for iname in self.all_inames())
@@ -692,7 +809,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return result
 
-    @memoize_method
+    @memoize_method_depending_on("iname_to_tag")
     def remove_inames_for_shared_hw_axes(self, cond_inames):
         """
         See if cond_inames contains references to two (or more) inames that
@@ -727,7 +844,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     # {{{ dependency wrangling
 
-    @memoize_method
+    @memoize_method_depending_on("instructions")
     def recursive_insn_dep_map(self):
         """Returns a :class:`dict` mapping an instruction IDs *a*
         to all instruction IDs it directly or indirectly depends
@@ -760,7 +877,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     # {{{ read and written variables
 
-    @memoize_method
+    @memoize_method_depending_on("instructions", "args", "temporary_variables")
     def reader_map(self):
         """
         :return: a dict that maps variable names to ids of insns that read that
@@ -778,7 +895,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return result
 
-    @memoize_method
+    @memoize_method_depending_on("instructions")
     def writer_map(self):
         """
         :return: a dict that maps variable names to ids of insns that write
@@ -792,21 +909,21 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return result
 
-    @memoize_method
+    @memoize_method_depending_on("instructions")
     def get_read_variables(self):
         result = set()
         for insn in self.instructions:
             result.update(insn.read_dependency_names())
         return result
 
-    @memoize_method
+    @memoize_method_depending_on("instructions")
     def get_written_variables(self):
         return frozenset(
                 var_name
                 for insn in self.instructions
                 for var_name in insn.assignee_var_names())
 
-    @memoize_method
+    @memoize_method_depending_on("temporary_variables")
     def get_temporary_to_base_storage_map(self):
         result = {}
         for tv in six.itervalues(self.temporary_variables):
@@ -815,7 +932,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
         return result
 
-    @memoize_method
+    @memoize_method_depending_on("instructions", "args")
     def get_unwritten_value_args(self):
         written_vars = self.get_written_variables()
 
@@ -830,12 +947,12 @@ class LoopKernel(ImmutableRecordWithoutPickling):
     # {{{ argument wrangling
 
     @property
-    @memoize_method
+    @memoize_method_depending_on("args")
     def arg_dict(self):
         return dict((arg.name, arg) for arg in self.args)
 
     @property
-    @memoize_method
+    @memoize_method_depending_on("args", "domains")
     def scalar_loop_args(self):
         from loopy.kernel.data import ValueArg
 
@@ -848,7 +965,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
             return [arg.name for arg in self.args if isinstance(arg, ValueArg)
                     if arg.name in loop_arg_names]
 
-    @memoize_method
+    @memoize_method_depending_on("args", "temporary_variables")
     def global_var_names(self):
         from loopy.kernel.data import temp_var_scope
 
@@ -866,7 +983,8 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     # {{{ bounds finding
 
-    @memoize_method
+    @memoize_method_depending_on(
+            "domains", "temporary_variables", "instructions", "assumptions")
     def get_iname_bounds(self, iname, constants_only=False):
         domain = self.get_inames_domain(frozenset([iname]))
 
@@ -904,7 +1022,8 @@ class LoopKernel(ImmutableRecordWithoutPickling):
                 upper_bound_pw_aff=upper_bound_pw_aff,
                 size=size)
 
-    @memoize_method
+    @memoize_method_depending_on(
+            "domains", "temporary_variables", "instructions", "assumptions")
     def get_constant_iname_length(self, iname):
         from loopy.isl_helpers import static_max_of_pw_aff
         from loopy.symbolic import aff_to_expr
@@ -912,7 +1031,9 @@ class LoopKernel(ImmutableRecordWithoutPickling):
                 self.get_iname_bounds(iname, constants_only=True).size,
                 constants_only=True)))
 
-    @memoize_method
+    @memoize_method_depending_on(
+            "domains", "temporary_variables", "instructions", "assumptions",
+            "iname_to_tag", "local_sizes", "overridden_get_grid_sizes_for_insn_ids")
     def get_grid_sizes_for_insn_ids(self, insn_ids, ignore_auto=False):
         """Return a tuple (global_size, local_size) containing a grid that
         could accommodate execution of all instructions whose IDs are given
@@ -1050,7 +1171,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     # {{{ local memory
 
-    @memoize_method
+    @memoize_method_depending_on("temporary_variables")
     def local_var_names(self):
         from loopy.kernel.data import temp_var_scope
         return set(
@@ -1060,15 +1181,35 @@ class LoopKernel(ImmutableRecordWithoutPickling):
 
     def local_mem_use(self):
         from loopy.kernel.data import temp_var_scope
-        return sum(
-                tv.nbytes for tv in six.itervalues(self.temporary_variables)
-                if tv.scope == temp_var_scope.LOCAL)
+
+        # Temporaries sharing base storage take up as much as the largest
+        # among them.
+        storage_to_nbytes = {}
+        for tv in six.itervalues(self.temporary_variables):
+            if tv.scope != temp_var_scope.LOCAL:
+                continue
+
+            if tv.base_storage is None:
+                storage_to_nbytes[tv.name] = tv.nbytes
+            elif tv.base_storage not in storage_to_nbytes:
+                storage_to_nbytes[tv.base_storage] = tv.nbytes
+            else:
+                nbytes = storage_to_nbytes[tv.base_storage]
+                from numbers import Integral
+                if (isinstance(nbytes, Integral)
+                        and isinstance(tv.nbytes, Integral)):
+                    storage_to_nbytes[tv.base_storage] = max(nbytes, tv.nbytes)
+                else:
+                    from pymbolic.primitives import Max
+                    storage_to_nbytes[tv.base_storage] = Max((nbytes, tv.nbytes))
+
+        return sum(six.itervalues(storage_to_nbytes))
 
     # }}}
 
     # {{{ nosync sets
 
-    @memoize_method
+    @memoize_method_depending_on("instructions")
     def get_nosync_set(self, insn_id, scope):
         assert scope in ("local", "global")
 
@@ -1230,7 +1371,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
     # {{{ implementation arguments
 
     @property
-    @memoize_method
+    @memoize_method_depending_on("args")
     def impl_arg_to_arg(self):
         from loopy.kernel.array import ArrayBase
 
@@ -1337,6 +1478,7 @@ class LoopKernel(ImmutableRecordWithoutPickling):
             "name",
             "preambles",
             "assumptions",
+            "assumption_versions",
             "local_sizes",
             "temporary_variables",
             "iname_to_tag",
@@ -1372,14 +1514,43 @@ class LoopKernel(ImmutableRecordWithoutPickling):
         Only works in conjunction with :class:`loopy.tools.KeyBuilder`.
         """
         for field_name in self.hash_fields:
-            key_builder.rec(key_hash, getattr(self, field_name))
+            key_hash.update(
+                    self._get_field_persistent_hash_digest(field_name, key_builder))
+
+    def _get_field_persistent_hash_digest(self, field_name, key_builder):
+        # Digests are kept per field (and, by way of
+        # :meth:`pytools.persistent_dict.KeyBuilder.rec`, on each instruction,
+        # argument and domain) so that a copy of a kernel only needs to hash
+        # what has changed. See :meth:`copy`.
+
+        try:
+            field_digests = self._field_persistent_hash_digests
+        except AttributeError:
+            field_digests = self._field_persistent_hash_digests = {}
+
+        try:
+            return field_digests[field_name]
+        except KeyError:
+            pass
 
-    def __hash__(self):
-        from loopy.tools import LoopyKeyBuilder
         from pytools.persistent_dict import new_hash
-        key_hash = new_hash()
-        self.update_persistent_hash(key_hash, LoopyKeyBuilder())
-        return hash(key_hash.digest())
+        field_hash = new_hash()
+        key_builder.rec(field_hash, getattr(self, field_name))
+
+        digest = field_hash.digest()
+        field_digests[field_name] = digest
+        return digest
+
+    def __hash__(self):
+        try:
+            digest = self._pytools_persistent_hash_digest
+        except AttributeError:
+            from loopy.tools import LoopyKeyBuilder
+            # caches the digest as _pytools_persistent_hash_digest
+            LoopyKeyBuilder()(self)
+            digest = self._pytools_persistent_hash_digest
+
+        return hash(digest)
 
     def __eq__(self, other):
         if self is other:
@@ -28,6 +28,7 @@ THE SOFTWARE.
 import numpy as np
 
 from pymbolic.mapper import CSECachingMapperMixin
+from pytools import memoize_method
 from loopy.tools import intern_frozenset_of_ids
 from loopy.symbolic import IdentityMapper, WalkMapper
 from loopy.kernel.data import (
@@ -42,6 +43,7 @@ import six
 from six.moves import range, zip, intern
 
 import re
+from collections import OrderedDict
 
 import logging
 logger = logging.getLogger(__name__)
@@ -1054,12 +1056,93 @@ def parse_domains(domains, defines):
 # }}}
 
 
+# {{{ parse caching
+
+#: The maximum number of entries kept in each of the caches of parsed
+#: instructions and domains.
+PARSE_CACHE_SIZE = 100
+
+_PARSED_INSTRUCTIONS_CACHE = OrderedDict()
+_PARSED_DOMAINS_CACHE = OrderedDict()
+
+
+def _get_parse_cache_key(source, defines):
+    if isinstance(source, str):
+        source = (source,)
+    elif (isinstance(source, (list, tuple))
+            and all(isinstance(entry, str) for entry in source)):
+        source = tuple(source)
+    else:
+        return None
+
+    try:
+        defines_key = frozenset(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in six.iteritems(defines))
+        hash(defines_key)
+    except TypeError:
+        return None
+
+    # Registering a reduction parser may change the meaning of the source.
+    from loopy.library.reduction import _REDUCTION_OP_PARSERS
+    return (source, defines_key, len(_REDUCTION_OP_PARSERS))
+
+
+def _parse_cached(cache, parse_func, source, defines):
+    key = _get_parse_cache_key(source, defines)
+    if key is None:
+        return parse_func(source, defines)
+
+    try:
+        result = cache.pop(key)
+    except KeyError:
+        result = parse_func(source, defines)
+        if len(cache) >= PARSE_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    cache[key] = result
+    return result
+
+
+def parse_instructions_cached(instructions, defines):
+    """Like :func:`parse_instructions`, but results for instructions given
+    purely as strings are reused across calls. The instructions themselves
+    are immutable and shared, the containers holding them are fresh copies.
+    """
+    insns, inames_to_dup, substitutions = _parse_cached(
+            _PARSED_INSTRUCTIONS_CACHE, parse_instructions,
+            instructions, defines)
+
+    return (
+            list(insns),
+            [list(insn_inames_to_dup) for insn_inames_to_dup in inames_to_dup],
+            substitutions.copy())
+
+
+def parse_domains_cached(domains, defines):
+    """Like :func:`parse_domains`, but results for domains given purely as
+    strings are reused across calls.
+    """
+    return list(_parse_cached(
+            _PARSED_DOMAINS_CACHE, parse_domains, domains, defines))
+
+# }}}
+
+
 # {{{ guess kernel args (if requested)
 
 class IndexRankFinder(CSECachingMapperMixin, WalkMapper):
-    def __init__(self, arg_name):
-        self.arg_name = arg_name
-        self.index_ranks = []
+    """Records the number of indices in subscripts of all variables.
+
+    .. attribute:: index_ranks
+
+        A mapping from variable names to lists of index ranks, one for each
+        subscript.
+    """
+
+    def __init__(self):
+        from collections import defaultdict
+        self.index_ranks = defaultdict(list)
 
     def map_subscript(self, expr):
         WalkMapper.map_subscript(self, expr)
@@ -1067,11 +1150,10 @@ class IndexRankFinder(CSECachingMapperMixin, WalkMapper):
         from pymbolic.primitives import Variable
         assert isinstance(expr.aggregate, Variable)
 
-        if expr.aggregate.name == self.arg_name:
-            if not isinstance(expr.index, tuple):
-                self.index_ranks.append(1)
-            else:
-                self.index_ranks.append(len(expr.index))
+        if not isinstance(expr.index, tuple):
+            self.index_ranks[expr.aggregate.name].append(1)
+        else:
+            self.index_ranks[expr.aggregate.name].append(len(expr.index))
 
     def map_common_subexpression_uncached(self, expr):
         if not self.visit(expr):
@@ -1118,8 +1200,9 @@ class ArgumentGuesser:
                 self.all_names.update(get_dependencies(
                     self.submap(insn.expression)))
 
-    def find_index_rank(self, name):
-        irf = IndexRankFinder(name)
+    @memoize_method
+    def _get_index_ranks(self):
+        irf = IndexRankFinder()
 
         def run_irf(expr):
             irf(self.submap(expr))
@@ -1128,11 +1211,16 @@ class ArgumentGuesser:
         for insn in self.instructions:
             insn.with_transformed_expressions(run_irf)
 
-        if not irf.index_ranks:
+        return irf.index_ranks
+
+    def find_index_rank(self, name):
+        index_ranks = self._get_index_ranks().get(name)
+
+        if not index_ranks:
             return 0
         else:
             from pytools import single_valued
-            return single_valued(irf.index_ranks)
+            return single_valued(index_ranks)
 
     def make_new_arg(self, arg_name):
         arg_name = arg_name.strip()
@@ -1616,11 +1704,15 @@ def guess_arg_shape_if_requested(kernel, default_order):
 
     import loopy as lp
     from loopy.kernel.array import ArrayBase
-    from loopy.kernel.tools import guess_var_shape
+    from loopy.kernel.tools import guess_var_shapes
+
+    var_to_shape = guess_var_shapes(kernel, [
+            arg.name for arg in kernel.args
+            if isinstance(arg, ArrayBase) and arg.shape is lp.auto])
 
     for arg in kernel.args:
         if isinstance(arg, ArrayBase) and arg.shape is lp.auto:
-            shape = guess_var_shape(kernel, arg.name)
+            shape = var_to_shape[arg.name]
 
             if arg.shape is lp.auto:
                 arg = arg.copy(shape=shape)
@@ -1964,8 +2056,8 @@ def make_kernel(domains, instructions, kernel_data=["..."], **kwargs):
                 DeprecationWarning, stacklevel=2)
 
     if target is None:
-        from loopy import _DEFAULT_TARGET
-        target = _DEFAULT_TARGET
+        from loopy import _get_default_target
+        target = _get_default_target()
 
     if flags is not None:
         if options is not None:
@@ -2071,7 +2163,7 @@ def make_kernel(domains, instructions, kernel_data=["..."], **kwargs):
     # }}}
 
     instructions, inames_to_dup, substitutions = \
-            parse_instructions(instructions, defines)
+            parse_instructions_cached(instructions, defines)
 
     # {{{ find/create isl_context
 
@@ -2087,7 +2179,7 @@ def make_kernel(domains, instructions, kernel_data=["..."], **kwargs):
         temporary_variables[tv.name] = tv
     del cse_temp_vars
 
-    domains = parse_domains(domains, defines)
+    domains = parse_domains_cached(domains, defines)
 
     arg_guesser = ArgumentGuesser(domains, instructions,
             temporary_variables, substitutions,
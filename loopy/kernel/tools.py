@@ -218,74 +218,110 @@ def find_all_insn_inames(kernel):
     # x clearly has a dependency on iname, but this is not found until that
     # dependency has propagated all the way up. Doing this recursively is
     # not guaranteed to terminate because of circular dependencies.
+    #
+    # Rather than sweeping over all instructions until nothing changes, only
+    # the instructions whose inames may be affected by a change are
+    # revisited, which keeps this linear in the number of instructions for
+    # the common (acyclic) case.
 
-    while True:
-        did_something = False
-        for insn in kernel.instructions:
+    reader_map = {}
+    for insn in kernel.instructions:
+        for var_name in all_read_deps[insn.id]:
+            reader_map.setdefault(var_name, []).append(insn.id)
 
-            if insn.within_inames_is_final:
-                continue
+    domain_param_names = set()
+    for dom in kernel.domains:
+        domain_param_names.update(dom.get_var_names(dim_type.param))
 
-            # {{{ depdency-based propagation
+    non_final_insn_ids = [
+            insn.id for insn in kernel.instructions
+            if not insn.within_inames_is_final]
 
-            inames_old = insn_id_to_inames[insn.id]
-            inames_new = inames_old | guess_iname_deps_based_on_var_use(
-                    kernel, insn, insn_id_to_inames)
+    from collections import deque
+    queue = deque(non_final_insn_ids)
+    queued = set(queue)
 
-            insn_id_to_inames[insn.id] = inames_new
+    while queue:
+        insn = kernel.id_to_insn[queue.popleft()]
+        queued.remove(insn.id)
 
-            if inames_new != inames_old:
-                did_something = True
+        inames_before = insn_id_to_inames[insn.id]
 
-                warn_with_kernel(kernel, "inferred_iname",
-                        "The iname(s) '%s' on instruction '%s' "
-                        "was/were automatically added. "
-                        "This is deprecated. Please add the iname "
-                        "to the instruction "
-                        "explicitly, e.g. by adding 'for' loops"
-                        % (", ".join(inames_new-inames_old), insn.id))
+        # {{{ depdency-based propagation
 
-            # }}}
+        inames_old = insn_id_to_inames[insn.id]
+        inames_new = inames_old | guess_iname_deps_based_on_var_use(
+                kernel, insn, insn_id_to_inames)
 
-            # {{{ domain-based propagation
+        insn_id_to_inames[insn.id] = inames_new
 
-            inames_old = insn_id_to_inames[insn.id]
-            inames_new = set(insn_id_to_inames[insn.id])
+        if inames_new != inames_old:
+            warn_with_kernel(kernel, "inferred_iname",
+                    "The iname(s) '%s' on instruction '%s' "
+                    "was/were automatically added. "
+                    "This is deprecated. Please add the iname "
+                    "to the instruction "
+                    "explicitly, e.g. by adding 'for' loops"
+                    % (", ".join(inames_new-inames_old), insn.id))
 
-            for iname in inames_old:
-                home_domain = kernel.domains[kernel.get_home_domain_index(iname)]
+        # }}}
 
-                for par in home_domain.get_var_names(dim_type.param):
-                    # Add all inames occurring in parameters of domains that my
-                    # current inames refer to.
+        # {{{ domain-based propagation
 
-                    if par in kernel.all_inames():
-                        inames_new.add(intern(par))
+        inames_old = insn_id_to_inames[insn.id]
+        inames_new = set(insn_id_to_inames[insn.id])
 
-                    # If something writes the bounds of a loop in which I'm
-                    # sitting, I had better be in the inames that the writer is
-                    # in.
+        for iname in inames_old:
+            home_domain = kernel.domains[kernel.get_home_domain_index(iname)]
 
-                    if par in kernel.temporary_variables:
-                        for writer_id in writer_map.get(par, []):
-                            inames_new.update(insn_id_to_inames[writer_id])
+            for par in home_domain.get_var_names(dim_type.param):
+                # Add all inames occurring in parameters of domains that my
+                # current inames refer to.
 
-            if inames_new != inames_old:
-                did_something = True
-                insn_id_to_inames[insn.id] = frozenset(inames_new)
+                if par in kernel.all_inames():
+                    inames_new.add(intern(par))
 
-                warn_with_kernel(kernel, "inferred_iname",
-                        "The iname(s) '%s' on instruction '%s' was "
-                        "automatically added. "
-                        "This is deprecated. Please add the iname "
-                        "to the instruction "
-                        "explicitly, e.g. by adding 'for' loops"
-                        % (", ".join(inames_new-inames_old), insn.id))
+                # If something writes the bounds of a loop in which I'm
+                # sitting, I had better be in the inames that the writer is
+                # in.
 
-            # }}}
+                if par in kernel.temporary_variables:
+                    for writer_id in writer_map.get(par, []):
+                        inames_new.update(insn_id_to_inames[writer_id])
 
-        if not did_something:
-            break
+        if inames_new != inames_old:
+            insn_id_to_inames[insn.id] = frozenset(inames_new)
+
+            warn_with_kernel(kernel, "inferred_iname",
+                    "The iname(s) '%s' on instruction '%s' was "
+                    "automatically added. "
+                    "This is deprecated. Please add the iname "
+                    "to the instruction "
+                    "explicitly, e.g. by adding 'for' loops"
+                    % (", ".join(inames_new-inames_old), insn.id))
+
+        # }}}
+
+        if insn_id_to_inames[insn.id] == inames_before:
+            continue
+
+        # {{{ revisit instructions that may be affected
+
+        if all_write_deps[insn.id] & domain_param_names:
+            affected_insn_ids = non_final_insn_ids
+        else:
+            affected_insn_ids = [
+                    reader_id
+                    for var_name in all_write_deps[insn.id]
+                    for reader_id in reader_map.get(var_name, [])]
+
+        for affected_id in affected_insn_ids:
+            if (affected_id not in queued
+                    and not kernel.id_to_insn[affected_id].within_inames_is_final):
+                queue.append(affected_id)
+                queued.add(affected_id)
+
+        # }}}
 
     logger.debug("%s: find_all_insn_inames: done" % kernel.name)
 
@@ -299,24 +335,109 @@ def find_all_insn_inames(kernel):
 
 # {{{ set operation cache
 
-class SetOperationCacheManager:
-    def __init__(self):
-        # mapping: set hash -> [(set, op, args, result)]
-        self.cache = {}
+def _get_isl_cache_key(obj):
+    if isinstance(obj, (isl.BasicSet, isl.Set, isl.BasicMap, isl.Map,
+            isl.Aff, isl.PwAff)):
+        # isl's own equality ignores dimension names, which the results of
+        # the cached operations do not.
+        return (type(obj).__name__, str(obj))
+    else:
+        return obj
+
+
+class SetOperationCache(object):
+    """A size-bounded cache for the results of :mod:`islpy` operations, keyed
+    on the printed form of the :mod:`islpy` objects involved. Once
+    :attr:`max_size` entries are stored, the least recently used entry is
+    evicted.
+
+    A single instance of this, :data:`SET_OPERATION_CACHE`, is shared by all
+    kernels in the process.
+
+    .. attribute:: max_size
+    .. attribute:: hits
+    .. attribute:: misses
+    .. attribute:: evictions
+
+    .. automethod:: op
+    .. automethod:: hit_rate
+    .. automethod:: clear
+    """
+
+    def __init__(self, max_size=20000):
+        from collections import OrderedDict
+        self.max_size = max_size
+        self.cache = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def op(self, set, op_name, op, args):
-        hashval = hash(set)
-        bucket = self.cache.setdefault(hashval, [])
+        """Return ``op(set, *args)``, computing it only if no result for
+        *op_name* applied to an object printing the same as *set* with equal
+        *args* is stored.
+        """
+        key = (op_name, _get_isl_cache_key(set)) + tuple(
+                _get_isl_cache_key(arg) for arg in args)
 
-        for bkt_set, bkt_op, bkt_args, result in bucket:
-            if set.plain_is_equal(bkt_set) and op == bkt_op and args == bkt_args:
-                return result
+        try:
+            # move to the most-recently-used end
+            result = self.cache.pop(key)
+        except KeyError:
+            self.misses += 1
+            result = op(set, *args)
 
-        #print op, set.get_dim_name(dim_type.set, args[0])
-        result = op(set, *args)
-        bucket.append((set, op_name, args, result))
+            while len(self.cache) >= self.max_size:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+
+        self.cache[key] = result
         return result
 
+    def hit_rate(self):
+        """Return the fraction of calls to :meth:`op` that were answered from
+        the cache, or *None* if there were none.
+        """
+        nlookups = self.hits + self.misses
+        if not nlookups:
+            return None
+
+        return self.hits / nlookups
+
+    def clear(self):
+        """Empty the cache and reset the counters."""
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+#: The :class:`SetOperationCache` instance used by default by all
+#: :class:`SetOperationCacheManager` instances.
+SET_OPERATION_CACHE = SetOperationCache()
+
+
+class SetOperationCacheManager:
+    """Provides cached versions of the :mod:`islpy` operations loopy commonly
+    performs on domains, available as :attr:`loopy.LoopKernel.cache_manager`.
+
+    :arg cache: the :class:`SetOperationCache` in which to store results.
+        Defaults to the process-wide :data:`SET_OPERATION_CACHE`, so that
+        results are shared among all kernels.
+    """
+
+    def __init__(self, cache=None):
+        if cache is None:
+            cache = SET_OPERATION_CACHE
+
+        self.cache = cache
+
+    def op(self, set, op_name, op, args):
+        return self.cache.op(set, op_name, op, args)
+
     def dim_min(self, set, *args):
         if set.plain_is_empty():
             raise LoopyError("domain '%s' is empty" % set)
@@ -344,6 +465,12 @@ class SetOperationCacheManager:
         else:
             idx = iname
 
+        return self.op(set, "base_index_and_length",
+                self._base_index_and_length_uncached,
+                (idx, context, n_allowed_params_in_length))
+
+    def _base_index_and_length_uncached(self, set, idx, context,
+            n_allowed_params_in_length):
         lower_bound_pw_aff = self.dim_min(set, idx)
         upper_bound_pw_aff = self.dim_max(set, idx)
 
@@ -749,6 +876,50 @@ def get_auto_axis_iname_ranking_by_stride(kernel, insn):
 # }}}
 
 
+def get_access_iname_strides(kernel, access, inames):
+    """Return a :class:`dict` mapping those of *inames* that occur in the
+    index of the :class:`pymbolic.primitives.Subscript` *access* to the
+    distance (in elements, as an :class:`int` or an expression in the
+    kernel's parameters) between the array elements accessed in consecutive
+    iterations of the iname. Return *None* if *access* is not to an array
+    argument with fixed strides or if its index is not linear in the
+    inames.
+    """
+    from loopy.kernel.array import FixedStrideArrayDimTag
+    from loopy.kernel.data import ArrayBase
+    from loopy.symbolic import CoefficientCollector
+    from pymbolic.primitives import Variable
+
+    arg = kernel.arg_dict.get(access.aggregate.name)
+    if not isinstance(arg, ArrayBase) or arg.dim_tags is None:
+        return None
+
+    index = access.index
+    if not isinstance(index, tuple):
+        index = (index,)
+
+    if len(index) != len(arg.dim_tags):
+        return None
+
+    result = {}
+    for index_expr, dim_tag in zip(index, arg.dim_tags):
+        if not isinstance(dim_tag, FixedStrideArrayDimTag):
+            continue
+
+        try:
+            coeffs = CoefficientCollector()(index_expr)
+        except (RuntimeError, ValueError):
+            # nonlinear or unsupported index expression
+            return None
+
+        for var, coeff in six.iteritems(coeffs):
+            if isinstance(var, Variable) and var.name in inames:
+                result[var.name] = (
+                        result.get(var.name, 0) + coeff*dim_tag.stride)
+
+    return result
+
+
 def assign_automatic_axes(kernel, axis=0, local_size=None):
     logger.debug("%s: assign automatic axes" % kernel.name)
 
@@ -959,10 +1130,15 @@ class ArrayChanger(object):
 
 # {{{ guess_var_shape
 
-def guess_var_shape(kernel, var_name):
-    from loopy.symbolic import SubstitutionRuleExpander, AccessRangeMapper
+def guess_var_shapes(kernel, var_names):
+    """Return a mapping from each name in *var_names* to the shape of the
+    variable guessed from its accesses. All accesses are found in a single
+    pass over the kernel's instructions.
+    """
+
+    from loopy.symbolic import SubstitutionRuleExpander, BatchedAccessRangeMapper
 
-    armap = AccessRangeMapper(kernel, var_name)
+    armap = BatchedAccessRangeMapper(kernel, var_names)
 
     submap = SubstitutionRuleExpander(kernel.substitutions)
 
@@ -979,67 +1155,79 @@ def guess_var_shape(kernel, var_name):
 
         raise LoopyError(
                 "Failed to (automatically, as requested) find "
-                "shape/strides for variable '%s'. "
+                "shape/strides for variable(s) '%s'. "
                 "Specifying the shape manually should get rid of this. "
                 "The following error occurred: %s"
-                % (var_name, str(e)))
+                % (", ".join(sorted(var_names)), str(e)))
 
-    if armap.access_range is None:
-        if armap.bad_subscripts:
-            from loopy.symbolic import LinearSubscript
-            if any(isinstance(sub, LinearSubscript)
-                    for sub in armap.bad_subscripts):
-                raise LoopyError("cannot determine access range for '%s': "
-                        "linear subscript(s) in '%s'"
-                        % (var_name, ", ".join(
-                                str(i) for i in armap.bad_subscripts)))
+    result = {}
 
-            n_axes_in_subscripts = set(
-                    len(sub.index_tuple) for sub in armap.bad_subscripts)
+    for var_name in var_names:
+        access_range = armap.access_ranges[var_name]
+        bad_subscripts = armap.bad_subscripts[var_name]
 
-            if len(n_axes_in_subscripts) != 1:
-                raise RuntimeError("subscripts of '%s' with differing "
-                        "numbers of axes were found" % var_name)
+        if access_range is None:
+            if bad_subscripts:
+                from loopy.symbolic import LinearSubscript
+                if any(isinstance(sub, LinearSubscript)
+                        for sub in bad_subscripts):
+                    raise LoopyError("cannot determine access range for '%s': "
+                            "linear subscript(s) in '%s'"
+                            % (var_name, ", ".join(
+                                    str(i) for i in bad_subscripts)))
 
-            n_axes, = n_axes_in_subscripts
+                n_axes_in_subscripts = set(
+                        len(sub.index_tuple) for sub in bad_subscripts)
 
-            if n_axes == 1:
-                # Leave shape undetermined--we can live with that for 1D.
-                shape = None
-            else:
-                raise LoopyError("cannot determine access range for '%s': "
-                        "undetermined index in subscript(s) '%s'"
-                        % (var_name, ", ".join(
-                                str(i) for i in armap.bad_subscripts)))
+                if len(n_axes_in_subscripts) != 1:
+                    raise RuntimeError("subscripts of '%s' with differing "
+                            "numbers of axes were found" % var_name)
+
+                n_axes, = n_axes_in_subscripts
+
+                if n_axes == 1:
+                    # Leave shape undetermined--we can live with that for 1D.
+                    shape = None
+                else:
+                    raise LoopyError("cannot determine access range for '%s': "
+                            "undetermined index in subscript(s) '%s'"
+                            % (var_name, ", ".join(
+                                    str(i) for i in bad_subscripts)))
 
+            else:
+                # no subscripts found, let's call it a scalar
+                shape = ()
         else:
-            # no subscripts found, let's call it a scalar
-            shape = ()
-    else:
-        from loopy.isl_helpers import static_max_of_pw_aff
-        from loopy.symbolic import pw_aff_to_expr
+            from loopy.isl_helpers import static_max_of_pw_aff
+            from loopy.symbolic import pw_aff_to_expr
+
+            shape = []
+            for i in range(access_range.dim(dim_type.set)):
+                try:
+                    shape.append(
+                            pw_aff_to_expr(static_max_of_pw_aff(
+                                kernel.cache_manager.dim_max(
+                                    access_range, i) + 1,
+                                constants_only=False)))
+                except Exception:
+                    print("While trying to find shape axis %d of "
+                            "variable '%s', the following "
+                            "exception occurred:" % (i, var_name),
+                            file=sys.stderr)
+                    print("*** ADVICE: You may need to manually specify the "
+                            "shape of argument '%s'." % (var_name),
+                            file=sys.stderr)
+                    raise
+
+            shape = tuple(shape)
+
+        result[var_name] = shape
 
-        shape = []
-        for i in range(armap.access_range.dim(dim_type.set)):
-            try:
-                shape.append(
-                        pw_aff_to_expr(static_max_of_pw_aff(
-                            kernel.cache_manager.dim_max(
-                                armap.access_range, i) + 1,
-                            constants_only=False)))
-            except Exception:
-                print("While trying to find shape axis %d of "
-                        "variable '%s', the following "
-                        "exception occurred:" % (i, var_name),
-                        file=sys.stderr)
-                print("*** ADVICE: You may need to manually specify the "
-                        "shape of argument '%s'." % (var_name),
-                        file=sys.stderr)
-                raise
-
-        shape = tuple(shape)
-
-    return shape
+    return result
+
+
+def guess_var_shape(kernel, var_name):
+    return guess_var_shapes(kernel, [var_name])[var_name]
 
 # }}}
 
@@ -1800,4 +1988,241 @@ def find_aliasing_equivalence_classes(kernel):
 # }}}
 
 
+# {{{ find loop-carried dependences
+
+def _get_insn_accesses(kernel, insn, var_names):
+    """Return a list of tuples *(var_name, index, is_write)* for the accesses
+    to *var_names* in *insn*. *index* is a tuple of index expressions, or
+    *None* if the accessed elements are unknown.
+    """
+    from pymbolic.primitives import Subscript, Variable
+    from loopy.symbolic import WalkMapper, LinearSubscript
+    from loopy.kernel.instruction import MultiAssignmentBase
+
+    if not isinstance(insn, MultiAssignmentBase):
+        return (
+                [(name, None, False)
+                    for name in insn.read_dependency_names() & var_names]
+                + [(name, None, True)
+                    for name in insn.write_dependency_names() & var_names])
+
+    accesses = []
+
+    def add_access(expr, is_write):
+        if isinstance(expr, Variable):
+            if expr.name in var_names:
+                accesses.append((expr.name, (), is_write))
+        elif isinstance(expr, (Subscript, LinearSubscript)):
+            if expr.aggregate.name in var_names:
+                index = expr.index
+                if isinstance(expr, LinearSubscript):
+                    index = None
+                elif not isinstance(index, tuple):
+                    index = (index,)
+
+                accesses.append((expr.aggregate.name, index, is_write))
+
+    class AccessGatherer(WalkMapper):
+        def map_variable(self, expr):
+            add_access(expr, False)
+
+        def map_subscript(self, expr):
+            add_access(expr, False)
+            self.rec(expr.index)
+
+        map_linear_subscript = map_subscript
+
+    gatherer = AccessGatherer()
+
+    for assignee in insn.assignees:
+        add_access(assignee, True)
+        if isinstance(assignee, (Subscript, LinearSubscript)):
+            gatherer(assignee.index)
+
+    gatherer(insn.expression)
+    for pred in insn.predicates:
+        gatherer(pred)
+
+    return accesses
+
+
+def _may_access_same_element(access_map_a, access_map_b, conditions):
+    """Return whether a point of the domain of *access_map_a* and a point of
+    the domain of *access_map_b* may access a common element such that
+    the two points satisfy one of *conditions*. Each condition is a list of
+    inequalities given as for :meth:`islpy.Constraint.ineq_from_names`,
+    with the names of the dimensions of *access_map_b* suffixed by a prime.
+    """
+    if access_map_a is None or access_map_b is None:
+        return True
+
+    for i in range(access_map_b.dim(dim_type.in_)):
+        access_map_b = access_map_b.set_dim_name(
+                dim_type.in_, i, access_map_b.get_dim_name(dim_type.in_, i)+"'")
+
+    access_map_a = access_map_a.align_params(access_map_b.space)
+    access_map_b = access_map_b.align_params(access_map_a.space)
+    same_element = access_map_a.apply_range(access_map_b.reverse())
+
+    for condition in conditions:
+        restricted = same_element
+        for coefficients in condition:
+            restricted = restricted.add_constraint(
+                    isl.Constraint.ineq_from_names(
+                        same_element.space, coefficients))
+
+        if not restricted.is_empty():
+            return True
+
+    return False
+
+
+def _gather_accesses_within(kernel, inames, insn_ids):
+    """Return a :class:`dict` mapping variable names to lists of tuples
+    *(insn_id, is_write, access_map)* for instructions nested within all of
+    *inames* (and in *insn_ids*, if not *None*). *access_map* maps the
+    points of the instruction's domain to the accessed indices, or is *None*
+    if those are unknown.
+
+    Private temporaries that are only accessed by these instructions and
+    whose indices do not depend on *inames* are omitted, since they are
+    privatized across *inames*.
+    """
+    import loopy as lp
+    from loopy.kernel.data import temp_var_scope
+    from loopy.kernel.instruction import MultiAssignmentBase
+    from loopy.symbolic import (
+            get_access_map, get_dependencies, UnableToDetermineAccessRange)
+
+    def get_inames(insn):
+        result = kernel.insn_inames(insn)
+        if isinstance(insn, MultiAssignmentBase):
+            result = result | insn.reduction_inames()
+        return result
+
+    insns = [
+            insn for insn in kernel.instructions
+            if inames <= get_inames(insn)
+            and (insn_ids is None or insn.id in insn_ids)]
+    insn_id_set = frozenset(insn.id for insn in insns)
+
+    privatizable = set(
+            tv.name for tv in six.itervalues(kernel.temporary_variables)
+            if tv.scope in [temp_var_scope.PRIVATE, lp.auto]
+            and all(
+                insn_id in insn_id_set
+                for insn_id in (
+                    kernel.reader_map().get(tv.name, frozenset())
+                    | kernel.writer_map().get(tv.name, frozenset()))))
+
+    var_names = (
+            set(arg.name for arg in kernel.args)
+            | set(kernel.temporary_variables))
+
+    var_to_accesses = {}
+    varying_privatizable = set()
+
+    for insn in insns:
+        insn_inames = get_inames(insn)
+        domain = (kernel.get_inames_domain(insn_inames)
+                .project_out_except(insn_inames, [dim_type.set]))
+
+        for var_name, index, is_write in _get_insn_accesses(
+                kernel, insn, var_names):
+            if var_name in privatizable and (
+                    index is None or get_dependencies(index) & inames):
+                varying_privatizable.add(var_name)
+
+            access_map = None
+            if index is not None:
+                shape = None
+                if var_name in kernel.arg_dict:
+                    shape = kernel.arg_dict[var_name].shape
+                elif var_name in kernel.temporary_variables:
+                    shape = kernel.temporary_variables[var_name].shape
+
+                if not isinstance(shape, tuple) or len(shape) != len(index):
+                    shape = None
+
+                try:
+                    access_map = get_access_map(
+                            domain, index, kernel.assumptions, shape=shape)
+                except UnableToDetermineAccessRange:
+                    pass
+
+            var_to_accesses.setdefault(var_name, []).append(
+                    (insn.id, is_write, access_map))
+
+    for var_name in privatizable - varying_privatizable:
+        var_to_accesses.pop(var_name, None)
+
+    return var_to_accesses
+
+
+def _find_dependences(var_to_accesses, conditions):
+    result = set()
+
+    for var_name, accesses in six.iteritems(var_to_accesses):
+        for i, (insn_id_a, is_write_a, access_map_a) in enumerate(accesses):
+            for insn_id_b, is_write_b, access_map_b in accesses[i:]:
+                if not (is_write_a or is_write_b):
+                    continue
+
+                dep = (var_name,) + tuple(sorted([insn_id_a, insn_id_b]))
+                if dep in result:
+                    continue
+
+                if _may_access_same_element(
+                        access_map_a, access_map_b, conditions):
+                    result.add(dep)
+
+    return sorted(result)
+
+
+def find_loop_carried_dependences(kernel, iname, insn_ids=None):
+    """Return a sorted list of tuples *(var_name, insn_id_a, insn_id_b)*
+    such that instructions *insn_id_a* and *insn_id_b* may access a common
+    element of *var_name* in different iterations of *iname*, at least one of
+    them writing it. Accesses that cannot be analyzed (e.g. non-affine ones)
+    are assumed to touch all elements. If the returned list is empty, the
+    iterations of *iname* may be executed in parallel.
+
+    Only instructions nested within *iname* (as given by
+    :meth:`loopy.kernel.LoopKernel.insn_inames` or as a reduction iname) are
+    considered, and only those in *insn_ids* if it is not *None*. Private
+    temporaries that are only accessed by these instructions, with indices
+    not depending on *iname*, are assumed to be written in each iteration
+    before they are read, which is what privatizing them across *iname*
+    requires. Since the accumulator of a reduction over *iname* is carried
+    across its iterations, such a reduction shows up as a dependence of its
+    instruction on itself through its assignees.
+    """
+    return _find_dependences(
+            _gather_accesses_within(kernel, frozenset([iname]), insn_ids),
+            [
+                [{iname: -1, iname+"'": 1, 1: -1}],
+                [{iname: 1, iname+"'": -1, 1: -1}]])
+
+
+def find_interchange_preventing_dependences(kernel, iname_a, iname_b,
+        insn_ids=None):
+    """Return a sorted list of tuples *(var_name, insn_id_a, insn_id_b)* as
+    in :func:`find_loop_carried_dependences` for the pairs of accesses
+    that may prevent interchanging the loops over *iname_a* and *iname_b*,
+    i.e. that may touch a common element in two iterations ordered
+    differently by *iname_a* than by *iname_b*. Only instructions nested
+    within both inames are considered.
+    """
+    return _find_dependences(
+            _gather_accesses_within(
+                kernel, frozenset([iname_a, iname_b]), insn_ids),
+            [
+                [{iname_a: -1, iname_a+"'": 1, 1: -1},
+                    {iname_b: 1, iname_b+"'": -1, 1: -1}],
+                [{iname_a: 1, iname_a+"'": -1, 1: -1},
+                    {iname_b: -1, iname_b+"'": 1, 1: -1}]])
+
+# }}}
+
+
 # vim: foldmethod=marker
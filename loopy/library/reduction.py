@@ -36,6 +36,11 @@ class ReductionOperation(object):
     equality-comparable.
     """
 
+    #: If not *None*, the name of the operation in sub-group collective
+    #: functions (e.g. ``"add"`` for ``sub_group_reduce_add``) that computes
+    #: this reduction, for targets that support them.
+    subgroup_collective_name = None
+
     def result_dtypes(self, target, *arg_dtypes):
         """
         :arg arg_dtypes: may be None if not known
@@ -122,6 +127,8 @@ class ScalarReductionOperation(ReductionOperation):
 
 
 class SumReductionOperation(ScalarReductionOperation):
+    subgroup_collective_name = "add"
+
     def neutral_element(self, dtype):
         # FIXME: Document that we always use an int here.
         return 0
@@ -176,6 +183,8 @@ def get_ge_neutral(dtype):
 
 
 class MaxReductionOperation(ScalarReductionOperation):
+    subgroup_collective_name = "max"
+
     def neutral_element(self, dtype):
         return get_ge_neutral(dtype)
 
@@ -184,6 +193,8 @@ class MaxReductionOperation(ScalarReductionOperation):
 
 
 class MinReductionOperation(ScalarReductionOperation):
+    subgroup_collective_name = "min"
+
     def neutral_element(self, dtype):
         return get_le_neutral(dtype)
 
@@ -95,11 +95,23 @@ class Options(ImmutableRecord):
         determining whether an iname duplication is necessary
         for the kernel to be schedulable.
 
+    .. attribute:: disable_guard_minimization
+
+        Do not merge identical adjacent conditionals or hoist
+        loop-invariant conditionals out of loops in the generated code.
+
     .. attribute:: check_dep_resolution
 
         Whether loopy should issue an error if a dependency
         expression does not match any instructions in the kernel.
 
+    .. attribute:: auto_peel_loops
+
+        Peel initial and final iterations off sequential loops (see
+        *slabs* in :func:`loopy.split_iname`) for which no slab increments
+        were given, if that removes conditionals from the bounds of the loops
+        nested inside them. Loops with large bodies are not peeled.
+
     .. rubric:: Invocation-related options
 
     .. attribute:: skip_arg_checks
@@ -225,7 +237,10 @@ class Options(ImmutableRecord):
                     allow_terminal_colors_def),
                 disable_global_barriers=kwargs.get("disable_global_barriers",
                     False),
+                disable_guard_minimization=kwargs.get(
+                    "disable_guard_minimization", False),
                 check_dep_resolution=kwargs.get("check_dep_resolution", True),
+                auto_peel_loops=kwargs.get("auto_peel_loops", False),
 
                 enforce_variable_access_ordered=kwargs.get(
                     "enforce_variable_access_ordered", False),
@@ -889,7 +889,8 @@ def _insert_subdomain_into_domain_tree(kernel, domains, subdomain):
 
 def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                       automagic_scans_ok=False, force_scan=False,
-                      force_outer_iname_for_scan=None):
+                      force_outer_iname_for_scan=None,
+                      group_scan_block_size=256):
     """Rewrites reductions into their imperative form. With *insn_id_filter*
     specified, operate only on the instruction with an instruction id matching
     *insn_id_filter*.
@@ -911,6 +912,29 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
     If *force_outer_iname_for_scan* is not *None*, this function will attempt
     to realize candidate reductions as scans using the specified iname as the
     outer (sweep) iname.
+
+    Reductions over group-parallel (``g.N``) inames are realized in two
+    stages: Each group first reduces over the remaining inames of the
+    reduction into its own entry of a global temporary. After a global
+    barrier (and hence in a separate subkernel), these partial results are
+    reduced to the final value, using the same work group shape as the first
+    stage if it reduced over a single local-parallel iname, and sequentially
+    otherwise. Such reductions may only be nested within group-parallel
+    loops, which must use the lowest-numbered group axes (e.g. ``g.0`` for a
+    single such loop), since the second stage is only parallel across them.
+
+    If the kernel's target supports sub-group collective functions (see
+    :meth:`loopy.target.TargetBase.get_subgroup_size`), sum, min and max
+    reductions and scans over an ``l.0``-tagged iname use them in place of
+    the (barrier-separated) stages that operate within one sub-group.
+
+    Scans whose sweep iname is group-parallel (``g.0``) are realized across
+    work groups: Blocks of *group_scan_block_size* (a power of two) elements
+    are scanned by one work group each, using Blelloch's work-efficient
+    up-sweep/down-sweep algorithm. After a global barrier, a single work
+    group scans the block totals (in chunks of the same size), and, after
+    another global barrier, the original instruction combines the block
+    offsets with the per-block results.
     """
 
     logger.debug("%s: realize reduction" % kernel.name)
@@ -1083,6 +1107,7 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                     _strip_if_scalar(acc_vars, acc_vars),
                     reduction_expr),
                 depends_on=frozenset(reduction_insn_depends_on) | insn.depends_on,
+                no_sync_with=insn.no_sync_with,
                 within_inames=update_insn_iname_deps,
                 within_inames_is_final=insn.within_inames_is_final,
                 predicates=insn.predicates,)
@@ -1106,7 +1131,7 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
         from loopy.symbolic import pw_aff_to_expr
         size = pw_aff_to_expr(
                 static_max_of_pw_aff(
-                    kernel.get_iname_bounds(iname).size,
+                    temp_kernel.get_iname_bounds(iname).size,
                     constants_only=True))
         assert isinstance(size, six.integer_types)
         return size
@@ -1127,6 +1152,39 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                 v[iname].lt_set(v[0] + ubound)).get_basic_sets()
         return bs
 
+    def _get_subgroup_size(operation, nresults, reduction_dtypes, par_iname,
+            outer_local_inames):
+        """Return the sub-group size to use for a local-parallel reduction or
+        scan over *par_iname*, or *None* if sub-group collectives cannot be
+        used for it.
+        """
+        subgroup_size = temp_kernel.target.get_subgroup_size()
+        if (subgroup_size is None
+                or nresults != 1
+                or operation.subgroup_collective_name is None
+                or outer_local_inames):
+            return None
+
+        from loopy.types import NumpyType
+        dtype, = reduction_dtypes
+        if (not isinstance(dtype, NumpyType)
+                or dtype.numpy_dtype.kind not in "iuf"
+                or dtype.numpy_dtype.itemsize not in (4, 8)):
+            return None
+
+        # Sub-groups consist of consecutive work items along axis 0 only if
+        # there are no other local axes.
+        from loopy.kernel.data import LocalIndexTag, LocalIndexTagBase
+        if not isinstance(temp_kernel.iname_to_tag.get(par_iname), LocalIndexTag):
+            return None
+
+        for tag in six.itervalues(temp_kernel.iname_to_tag):
+            if isinstance(tag, LocalIndexTagBase) and not (
+                    isinstance(tag, LocalIndexTag) and tag.axis == 0):
+                return None
+
+        return subgroup_size
+
     def map_reduction_local(expr, rec, nresults, arg_dtypes,
             reduction_dtypes):
         red_iname, = expr.inames
@@ -1140,7 +1198,7 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                 oiname
                 for oiname in outer_insn_inames
                 if isinstance(
-                    kernel.iname_to_tag.get(oiname),
+                    temp_kernel.iname_to_tag.get(oiname),
                     LocalIndexTagBase))
 
         from pymbolic import var
@@ -1176,12 +1234,19 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
 
         base_exec_iname = var_name_gen("red_"+red_iname)
         domains.append(_make_slab_set(base_exec_iname, size))
-        new_iname_tags[base_exec_iname] = kernel.iname_to_tag[red_iname]
+        new_iname_tags[base_exec_iname] = temp_kernel.iname_to_tag[red_iname]
 
         # }}}
 
         base_iname_deps = outer_insn_inames - frozenset(expr.inames)
 
+        init_insn_depends_on = frozenset()
+
+        global_barrier = lp.find_most_recent_global_barrier(temp_kernel, insn.id)
+
+        if global_barrier is not None:
+            init_insn_depends_on |= frozenset([global_barrier])
+
         neutral = expr.operation.neutral_element(*arg_dtypes)
         init_id = insn_id_gen("%s_%s_init" % (insn.id, red_iname))
         init_insn = make_assignment(
@@ -1192,7 +1257,7 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                 expression=neutral,
                 within_inames=base_iname_deps | frozenset([base_exec_iname]),
                 within_inames_is_final=insn.within_inames_is_final,
-                depends_on=frozenset(),
+                depends_on=init_insn_depends_on,
                 predicates=insn.predicates,
                 )
         generated_insns.append(init_insn)
@@ -1204,7 +1269,7 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                 expression=neutral,
                 within_inames=base_iname_deps | frozenset([base_exec_iname]),
                 within_inames_is_final=insn.within_inames_is_final,
-                depends_on=frozenset(),
+                depends_on=init_insn_depends_on,
                 predicates=insn.predicates,
                 )
         generated_insns.append(init_neutral_insn)
@@ -1250,12 +1315,17 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                     (outer_insn_inames - frozenset(expr.inames))
                     | frozenset([red_iname])),
                 within_inames_is_final=insn.within_inames_is_final,
-                depends_on=frozenset([init_id, init_neutral_id]) | insn.depends_on,
+                depends_on=frozenset(transfer_depends_on) | insn.depends_on,
                 no_sync_with=frozenset([(init_id, "any")]),
                 predicates=insn.predicates,
                 )
         generated_insns.append(transfer_insn)
 
+        subgroup_size = _get_subgroup_size(expr.operation, nresults,
+                reduction_dtypes, red_iname, outer_local_inames)
+        if subgroup_size is not None and size < subgroup_size:
+            subgroup_size = None
+
         cur_size = 1
         while cur_size < size:
             cur_size *= 2
@@ -1264,14 +1334,14 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
         bound = size
 
         istage = 0
-        while cur_size > 1:
+        while cur_size > (subgroup_size or 1):
 
             new_size = cur_size // 2
             assert new_size * 2 == cur_size
 
             stage_exec_iname = var_name_gen("red_%s_s%d" % (red_iname, istage))
             domains.append(_make_slab_set(stage_exec_iname, bound-new_size))
-            new_iname_tags[stage_exec_iname] = kernel.iname_to_tag[red_iname]
+            new_iname_tags[stage_exec_iname] = temp_kernel.iname_to_tag[red_iname]
 
             stage_id = insn_id_gen("red_%s_stage_%d" % (red_iname, istage))
             stage_insn = make_assignment(
@@ -1304,6 +1374,33 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
             bound = cur_size
             istage += 1
 
+        if subgroup_size is not None:
+            # The first sub-group reduces the remaining values. Each work item
+            # only reads values it wrote itself, so no barrier is needed.
+            acc_var, = acc_vars
+
+            sg_exec_iname = var_name_gen("red_%s_sg" % red_iname)
+            domains.append(_make_slab_set(sg_exec_iname, subgroup_size))
+            new_iname_tags[sg_exec_iname] = temp_kernel.iname_to_tag[red_iname]
+
+            sg_id = insn_id_gen("red_%s_subgroup" % red_iname)
+            sg_insn = make_assignment(
+                    id=sg_id,
+                    assignees=(acc_var[var(sg_exec_iname)],),
+                    expression=var(
+                        "sub_group_reduce_"
+                        + expr.operation.subgroup_collective_name)(
+                            acc_var[var(sg_exec_iname)]),
+                    within_inames=base_iname_deps | frozenset([sg_exec_iname]),
+                    within_inames_is_final=insn.within_inames_is_final,
+                    depends_on=frozenset([prev_id]),
+                    no_sync_with=frozenset([(prev_id, "any")]),
+                    predicates=insn.predicates,
+                    )
+
+            generated_insns.append(sg_insn)
+            prev_id = sg_id
+
         new_insn_add_depends_on.add(prev_id)
         new_insn_add_no_sync_with.add((prev_id, "any"))
         new_insn_add_within_inames.add(base_exec_iname or stage_exec_iname)
@@ -1315,6 +1412,271 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
             return [acc_var[outer_local_iname_vars + (0,)] for acc_var in acc_vars]
     # }}}
 
+    # {{{ group-parallel
+
+    def _get_iname_size_and_lower_bound(iname):
+        from loopy.isl_helpers import (
+                static_max_of_pw_aff, static_min_of_pw_aff)
+        from loopy.symbolic import pw_aff_to_expr
+
+        bounds = temp_kernel.get_iname_bounds(iname)
+        size = pw_aff_to_expr(
+                static_max_of_pw_aff(bounds.size, constants_only=False))
+        lbound = pw_aff_to_expr(
+                static_min_of_pw_aff(
+                    bounds.lower_bound_pw_aff, constants_only=False))
+        return size, lbound
+
+    def _make_set_from_inequalities(inames, inequalities):
+        from loopy.symbolic import get_dependencies, aff_from_expr
+        params = set()
+        for ineq in inequalities:
+            params.update(get_dependencies(ineq))
+        params = sorted(params - set(inames))
+
+        space = isl.Space.create_from_names(
+                isl.DEFAULT_CONTEXT, set=inames, params=params)
+        bset = isl.BasicSet.universe(space)
+        for ineq in inequalities:
+            bset = bset.add_constraint(
+                    isl.Constraint.inequality_from_aff(
+                        aff_from_expr(space, ineq)))
+        return bset
+
+    def map_reduction_global(expr, rec, nresults, arg_dtypes,
+            reduction_dtypes):
+        # Realized in two stages: Each group reduces its part of the data
+        # into one entry of a global temporary (using the remaining,
+        # local-parallel or sequential, reduction inames), and, after a
+        # global barrier, a second stage reduces these partial results.
+
+        from loopy.kernel.data import (
+                GroupIndexTag, LocalIndexTag, temp_var_scope)
+        from loopy.symbolic import Reduction
+        from pymbolic import var
+
+        iname_classes = _classify_reduction_inames(temp_kernel, expr.inames)
+        group_inames = iname_classes.nonlocal_parallel
+        remaining_inames = (
+                iname_classes.sequential + iname_classes.local_parallel)
+
+        outer_insn_inames = temp_kernel.insn_inames(insn)
+
+        # Sequential loops around the reduction would have to contain the
+        # global barrier, which is not supported.
+        bad_inames = [
+                oiname
+                for oiname in outer_insn_inames
+                if not isinstance(
+                    temp_kernel.iname_to_tag.get(oiname), GroupIndexTag)]
+        if bad_inames:
+            raise LoopyError("reduction over group-parallel iname(s) '%s' "
+                    "is nested within iname(s) '%s' that are not "
+                    "group-parallel. This is not supported."
+                    % (", ".join(group_inames), ", ".join(sorted(bad_inames))))
+
+        # The second stage runs in a separate subkernel, parallel only across
+        # the groups of the outer inames, whose axes must hence be 0, 1, ....
+        outer_group_axes = sorted(
+                temp_kernel.iname_to_tag[oiname].axis
+                for oiname in outer_insn_inames)
+        if outer_group_axes != list(range(len(outer_group_axes))):
+            raise LoopyError("reduction over group-parallel iname(s) '%s' "
+                    "is nested within iname(s) '%s' that do not use the "
+                    "first %d group axes. Tag them with the lowest-numbered "
+                    "group axes instead."
+                    % (", ".join(group_inames),
+                        ", ".join(sorted(outer_insn_inames)),
+                        len(outer_group_axes)))
+
+        outer_iname_vars = []
+        outer_iname_sizes = []
+        for oiname in sorted(outer_insn_inames):
+            size, lbound = _get_iname_size_and_lower_bound(oiname)
+            outer_iname_vars.append(var(oiname) - lbound)
+            outer_iname_sizes.append(size)
+        outer_iname_vars = tuple(outer_iname_vars)
+
+        group_iname_sizes = []
+        group_iname_offsets = []
+        for giname in group_inames:
+            size, lbound = _get_iname_size_and_lower_bound(giname)
+            group_iname_sizes.append(size)
+            group_iname_offsets.append(var(giname) - lbound)
+
+        partial_var_names = make_temporaries(
+                name_based_on="partial_"+"_".join(group_inames),
+                nvars=nresults,
+                shape=tuple(outer_iname_sizes + group_iname_sizes),
+                dtypes=reduction_dtypes,
+                scope=temp_var_scope.GLOBAL)
+
+        # {{{ first stage: per-group partial results
+
+        stage1_assignees = tuple(
+                var(pvn)[outer_iname_vars + tuple(group_iname_offsets)]
+                for pvn in partial_var_names)
+
+        if remaining_inames:
+            stage1_expr = Reduction(expr.operation, remaining_inames,
+                    expr.expr, expr.allow_simultaneous)
+        else:
+            stage1_expr = expr.expr
+
+        stage1_kwargs = dict(
+                depends_on=insn.depends_on,
+                within_inames=outer_insn_inames | frozenset(group_inames),
+                within_inames_is_final=insn.within_inames_is_final,
+                predicates=insn.predicates)
+
+        stage1_id = insn_id_gen(
+                "%s_%s_partial" % (insn.id, "_".join(group_inames)))
+
+        if nresults > 1 and isinstance(stage1_expr, tuple):
+            stage1_ids = [insn_id_gen(stage1_id) for i in range(nresults)]
+            for sub_id, assignee, sub_expr in zip(
+                    stage1_ids, stage1_assignees, stage1_expr):
+                generated_insns.append(make_assignment(
+                    id=sub_id,
+                    assignees=(assignee,),
+                    expression=sub_expr,
+                    **stage1_kwargs))
+        else:
+            stage1_ids = [stage1_id]
+            generated_insns.append(make_assignment(
+                id=stage1_id,
+                assignees=stage1_assignees,
+                expression=stage1_expr,
+                **stage1_kwargs))
+
+        barrier_id = insn_id_gen(
+                "%s_%s_barrier" % (insn.id, "_".join(group_inames)))
+        generated_insns.append(lp.BarrierInstruction(
+            id=barrier_id,
+            depends_on=frozenset(stage1_ids),
+            within_inames=outer_insn_inames,
+            within_inames_is_final=insn.within_inames_is_final,
+            synchronization_kind="global",
+            mem_kind="global"))
+
+        # }}}
+
+        # {{{ second stage: reduce the partial results
+
+        # The partial results only cover the (possibly non-rectangular)
+        # domain of the group inames, so the second stage reduces over a
+        # copy of that domain, with the outer inames as parameters.
+
+        group_domain = temp_kernel.get_inames_domain(
+                frozenset(group_inames) | outer_insn_inames)
+        group_domain = group_domain.project_out_except(
+                list(group_inames) + sorted(outer_insn_inames),
+                [isl.dim_type.set])
+        group_domain = _move_set_to_param_dims_except(
+                group_domain, group_inames)
+
+        from loopy.isl_helpers import convexify
+        group_domain = convexify(group_domain)
+
+        # If the first stage reduces over a (single) local-parallel iname,
+        # use the same work group shape for the second stage, provided that
+        # the partial results form a contiguous range.
+
+        local_inames = [
+                iname for iname in iname_classes.local_parallel
+                if isinstance(temp_kernel.iname_to_tag[iname], LocalIndexTag)]
+
+        if (len(group_inames) == 1
+                and len(local_inames) == 1
+                and not _domain_depends_on_given_set_dims(
+                    group_domain, outer_insn_inames)):
+            local_iname, = local_inames
+            local_size = _get_int_iname_size(local_iname)
+            size, = group_iname_sizes
+
+            outer_iname = var_name_gen("red_%s_outer" % group_inames[0])
+            inner_iname = var_name_gen("red_%s_inner" % group_inames[0])
+            outer, inner = var(outer_iname), var(inner_iname)
+
+            domains.append(_make_set_from_inequalities(
+                [outer_iname, inner_iname],
+                [inner, local_size - 1 - inner,
+                    outer, size - 1 - (outer*local_size + inner)]))
+            new_iname_tags[inner_iname] = temp_kernel.iname_to_tag[local_iname]
+
+            stage2_partials = tuple(
+                    var(pvn)[outer_iname_vars + (outer*local_size + inner,)]
+                    for pvn in partial_var_names)
+
+            stage2_expr = Reduction(expr.operation, (inner_iname,),
+                    Reduction(expr.operation, (outer_iname,),
+                        _strip_if_scalar(stage2_partials, stage2_partials)))
+
+        else:
+            stage2_inames = tuple(
+                    var_name_gen("red_"+giname) for giname in group_inames)
+
+            for giname, stage2_iname in zip(group_inames, stage2_inames):
+                group_domain = group_domain.set_dim_name(
+                        isl.dim_type.set,
+                        group_domain.find_dim_by_name(
+                            isl.dim_type.set, giname),
+                        stage2_iname)
+
+            if outer_insn_inames:
+                _insert_subdomain_into_domain_tree(
+                        temp_kernel, domains, group_domain)
+            else:
+                domains.append(group_domain)
+
+            from pymbolic.mapper.substitutor import make_subst_func
+            from loopy.symbolic import SubstitutionMapper
+            rename_group_inames = SubstitutionMapper(make_subst_func(
+                dict(
+                    (giname, var(stage2_iname))
+                    for giname, stage2_iname in zip(
+                        group_inames, stage2_inames))))
+
+            stage2_partials = tuple(
+                    var(pvn)[outer_iname_vars + tuple(
+                        rename_group_inames(offset)
+                        for offset in group_iname_offsets)]
+                    for pvn in partial_var_names)
+
+            stage2_expr = Reduction(expr.operation, stage2_inames,
+                    _strip_if_scalar(stage2_partials, stage2_partials))
+
+        result_var_names = make_temporaries(
+                name_based_on="red_"+"_".join(group_inames)+"_result",
+                nvars=nresults,
+                shape=(),
+                dtypes=reduction_dtypes,
+                scope=temp_var_scope.PRIVATE)
+        result_vars = tuple(var(rvn) for rvn in result_var_names)
+
+        stage2_id = insn_id_gen(
+                "%s_%s_finish" % (insn.id, "_".join(group_inames)))
+        generated_insns.append(make_assignment(
+            id=stage2_id,
+            assignees=result_vars,
+            expression=stage2_expr,
+            depends_on=frozenset([barrier_id]),
+            within_inames=outer_insn_inames,
+            within_inames_is_final=insn.within_inames_is_final,
+            predicates=insn.predicates))
+
+        # }}}
+
+        new_insn_add_depends_on.add(stage2_id)
+
+        if nresults == 1:
+            assert len(result_vars) == 1
+            return result_vars[0]
+        else:
+            return result_vars
+
+    # }}}
+
     # {{{ utils (stateful)
 
     from pytools import memoize
@@ -1334,7 +1696,7 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
 
         return tracking_iname
 
-    def replace_var_within_expr(expr, from_var, to_var):
+    def substitute_within_expr(expr, subst_map):
         from pymbolic.mapper.substitutor import make_subst_func
 
         from loopy.symbolic import (
@@ -1343,14 +1705,17 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
         rule_mapping_context = SubstitutionRuleMappingContext(
             temp_kernel.substitutions, var_name_gen)
 
-        from pymbolic import var
         mapper = RuleAwareSubstitutionMapper(
             rule_mapping_context,
-            make_subst_func({from_var: var(to_var)}),
+            make_subst_func(subst_map),
             within=lambda *args: True)
 
         return mapper(expr, temp_kernel, None)
 
+    def replace_var_within_expr(expr, from_var, to_var):
+        from pymbolic import var
+        return substitute_within_expr(expr, {from_var: var(to_var)})
+
     def make_temporaries(name_based_on, nvars, shape, dtypes, scope):
         var_names = [
                 var_name_gen(name_based_on.format(index=i))
@@ -1460,6 +1825,101 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
 
     # {{{ local-parallel scan
 
+    def _add_subgroup_scan_stages(expr, arg_dtypes, reduction_dtypes,
+            sweep_iname, scan_iname, scan_size, subgroup_size, acc_var,
+            base_iname_deps, init_id, transfer_id):
+        """Scan *acc_var* in place using sub-group collectives: Each sub-group
+        scans its chunk of the values, then the first sub-group computes the
+        exclusive scan of the chunk totals, which are finally combined with
+        the values of all but the first chunk. Returns the ID of the last
+        generated instruction.
+        """
+        from pymbolic import var
+        from loopy.kernel.data import temp_var_scope
+
+        sweep_tag = kernel.iname_to_tag[sweep_iname]
+        collective_name = expr.operation.subgroup_collective_name
+        nchunks = scan_size // subgroup_size
+
+        def make_exec_iname(suffix, lbound, ubound):
+            iname = var_name_gen("%s__scan_%s" % (sweep_iname, suffix))
+            domains.append(_make_slab_set_from_range(iname, lbound, ubound))
+            new_iname_tags[iname] = sweep_tag
+            return iname
+
+        def add_stage(suffix, assignee, expression, exec_iname, depends_on,
+                no_sync_with=frozenset()):
+            stage_id = insn_id_gen("scan_%s_%s" % (scan_iname, suffix))
+            generated_insns.append(make_assignment(
+                    id=stage_id,
+                    assignees=(assignee,),
+                    expression=expression,
+                    within_inames=base_iname_deps | frozenset([exec_iname]),
+                    within_inames_is_final=insn.within_inames_is_final,
+                    depends_on=frozenset(depends_on),
+                    no_sync_with=no_sync_with,
+                    predicates=insn.predicates))
+            return stage_id
+
+        # Each work item only reads the value it wrote itself, so no barrier
+        # is needed after the initialization and the transfer.
+        chunk_iname = make_exec_iname("sg", 0, scan_size)
+        prev_id = add_stage("subgroup",
+                acc_var[var(chunk_iname)],
+                var("sub_group_scan_inclusive_" + collective_name)(
+                    acc_var[var(chunk_iname)]),
+                chunk_iname,
+                depends_on=[transfer_id],
+                no_sync_with=frozenset([(init_id, "any"), (transfer_id, "any")]))
+
+        if nchunks == 1:
+            return prev_id
+
+        total_var_name, = make_temporaries(
+                name_based_on="total_"+scan_iname,
+                nvars=1,
+                shape=(),
+                dtypes=reduction_dtypes,
+                scope=temp_var_scope.PRIVATE)
+        prefix_var_name, = make_temporaries(
+                name_based_on="prefix_"+scan_iname,
+                nvars=1,
+                shape=(subgroup_size,),
+                dtypes=reduction_dtypes,
+                scope=temp_var_scope.LOCAL)
+
+        total_var = var(total_var_name)
+        prefix_var = var(prefix_var_name)
+
+        prefix_iname = make_exec_iname("prefix", 0, subgroup_size)
+        total_iname = make_exec_iname("total", 0, nchunks)
+
+        init_total_id = add_stage("init_total",
+                total_var,
+                expr.operation.neutral_element(*arg_dtypes),
+                prefix_iname,
+                depends_on=[prev_id])
+        read_total_id = add_stage("read_total",
+                total_var,
+                acc_var[subgroup_size*var(total_iname) + subgroup_size - 1],
+                total_iname,
+                depends_on=[prev_id, init_total_id])
+        prefix_id = add_stage("prefix",
+                prefix_var[var(prefix_iname)],
+                var("sub_group_scan_exclusive_" + collective_name)(total_var),
+                prefix_iname,
+                depends_on=[read_total_id])
+
+        update_iname = make_exec_iname("update", subgroup_size, scan_size)
+        return add_stage("update",
+                acc_var[var(update_iname)],
+                expr.operation(
+                    arg_dtypes,
+                    prefix_var[var(update_iname) // subgroup_size],
+                    acc_var[var(update_iname)]),
+                update_iname,
+                depends_on=[prefix_id])
+
     def map_scan_local(expr, rec, nresults, arg_dtypes,
             reduction_dtypes, sweep_iname, scan_iname,
             sweep_min_value, scan_min_value, stride):
@@ -1590,8 +2050,21 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
 
         prev_id = transfer_id
 
+        subgroup_size = _get_subgroup_size(expr.operation, nresults,
+                reduction_dtypes, sweep_iname, outer_local_inames)
+        if subgroup_size is not None and not (
+                scan_size % subgroup_size == 0
+                and scan_size <= subgroup_size**2):
+            subgroup_size = None
+
+        if subgroup_size is not None:
+            prev_id = _add_subgroup_scan_stages(expr, arg_dtypes,
+                    reduction_dtypes, sweep_iname, scan_iname, scan_size,
+                    subgroup_size, acc_vars[0], base_iname_deps, init_id,
+                    transfer_id)
+
         istage = 0
-        cur_size = 1
+        cur_size = scan_size if subgroup_size is not None else 1
 
         while cur_size < scan_size:
             stage_exec_iname = var_name_gen("%s__scan_s%d" % (sweep_iname, istage))
@@ -1671,6 +2144,408 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
 
     # }}}
 
+    # {{{ multi-group scan
+
+    def _add_assignments(id_base, assignees, expression, within_inames,
+            depends_on, no_sync_with=()):
+        # A tuple *expression* is assigned entry by entry to the (equally
+        # many) *assignees*. Anything else is assigned to all of them, which
+        # requires it to be a function call if there is more than one.
+        # Returns the list of generated IDs.
+        if isinstance(expression, tuple):
+            assert len(expression) == len(assignees)
+            pairs = [
+                    ((assignee,), sub_expression)
+                    for assignee, sub_expression in zip(assignees, expression)]
+        else:
+            pairs = [(assignees, expression)]
+
+        result = []
+        for sub_assignees, sub_expression in pairs:
+            new_id = insn_id_gen(id_base)
+            generated_insns.append(make_assignment(
+                    id=new_id,
+                    assignees=sub_assignees,
+                    expression=sub_expression,
+                    within_inames=within_inames,
+                    within_inames_is_final=insn.within_inames_is_final,
+                    depends_on=frozenset(depends_on),
+                    no_sync_with=frozenset(
+                        (dep_id, "any") for dep_id in no_sync_with),
+                    predicates=insn.predicates))
+            result.append(new_id)
+
+        return result
+
+    def _add_blelloch_scan_stages(operation, arg_dtypes, reduction_dtypes,
+            scan_vars, size, name_prefix, within_inames, depends_on,
+            total_assignees):
+        """Add instructions that replace the first *size* (a power of two)
+        entries of the local arrays *scan_vars* by their exclusive scan, using
+        the up-sweep/down-sweep scheme of Blelloch. Between the two sweeps,
+        the total of all entries is assigned to *total_assignees*.
+
+        :returns: a tuple of the lists of IDs of the last instructions and
+            of the instructions assigning the total
+        """
+        from pymbolic import var
+        from loopy.kernel.data import LocalIndexTag, temp_var_scope
+
+        def make_exec_iname(suffix, nlanes):
+            iname = var_name_gen("%s_%s" % (name_prefix, suffix))
+            domains.append(_make_slab_set(iname, nlanes))
+            new_iname_tags[iname] = LocalIndexTag(0)
+            return iname
+
+        def add_stage(suffix, assignees, expression, exec_iname, depends_on,
+                no_sync_with=()):
+            return _add_assignments(
+                    "%s_%s" % (name_prefix, suffix), assignees, expression,
+                    within_inames | frozenset([exec_iname]),
+                    depends_on, no_sync_with)
+
+        def at(index):
+            return tuple(scan_var[index] for scan_var in scan_vars)
+
+        def combine(operand1, operand2):
+            return operation(arg_dtypes,
+                    _strip_if_scalar(scan_vars, operand1),
+                    _strip_if_scalar(scan_vars, operand2))
+
+        prev_ids = depends_on
+
+        # {{{ up-sweep: build a reduction tree in place
+
+        istage = 0
+        offset = 1
+        while offset < size:
+            lane = var(make_exec_iname("up%d" % istage, size // (2*offset)))
+            right = 2*offset*lane + 2*offset - 1
+            prev_ids = add_stage("up_%d" % istage,
+                    at(right), combine(at(right - offset), at(right)),
+                    lane.name, prev_ids)
+
+            offset *= 2
+            istage += 1
+
+        # }}}
+
+        # The root of the tree holds the total. It was written by work item 0,
+        # which is the one that also clears it.
+        root_iname = make_exec_iname("root", 1)
+        total_ids = add_stage("total", total_assignees, at(size-1),
+                root_iname, prev_ids, no_sync_with=prev_ids)
+        prev_ids = add_stage("clear", at(size-1),
+                operation.neutral_element(*arg_dtypes),
+                root_iname, total_ids, no_sync_with=prev_ids + total_ids)
+
+        # {{{ down-sweep: turn the tree into exclusive prefixes
+
+        tmp_vars = tuple(var(name) for name in make_temporaries(
+                name_based_on=name_prefix+"_tmp_{index}",
+                nvars=len(scan_vars),
+                shape=(),
+                dtypes=reduction_dtypes,
+                scope=temp_var_scope.PRIVATE))
+
+        istage = 0
+        offset = size // 2
+        while offset >= 1:
+            lane = var(make_exec_iname("down%d" % istage, size // (2*offset)))
+            left = 2*offset*lane + offset - 1
+            right = left + offset
+
+            # Within a stage, each work item only touches its own entries.
+            read_ids = add_stage("read_%d" % istage,
+                    tmp_vars, at(left), lane.name, prev_ids)
+            move_ids = add_stage("move_%d" % istage,
+                    at(left), at(right), lane.name, read_ids,
+                    no_sync_with=read_ids)
+            prev_ids = add_stage("combine_%d" % istage,
+                    at(right), combine(at(right), tmp_vars),
+                    lane.name, read_ids + move_ids,
+                    no_sync_with=read_ids + move_ids)
+
+            offset //= 2
+            istage += 1
+
+        # }}}
+
+        return prev_ids, total_ids
+
+    def map_scan_global(expr, rec, nresults, arg_dtypes,
+            reduction_dtypes, sweep_iname, scan_iname,
+            sweep_min_value, sweep_max_value, scan_min_value, stride):
+        # Realized in three stages, separated by global barriers:
+        #
+        # 1. Each group scans one block of *block_size* elements (with a
+        #    Blelloch scan in local memory) and stores the inclusive result
+        #    as well as the block total.
+        # 2. A single group scans the block totals, in chunks of *block_size*
+        #    with a carry, yielding an exclusive offset for each block.
+        # 3. The original instruction combines offset and block-level result.
+
+        from loopy.kernel.data import (
+                GroupIndexTag, LocalIndexTag, temp_var_scope)
+        from loopy.symbolic import Reduction, pw_aff_to_expr
+        from pymbolic import var
+
+        outer_insn_inames = temp_kernel.insn_inames(insn)
+        if outer_insn_inames != frozenset([sweep_iname]):
+            raise LoopyError("scan over group-parallel sweep iname '%s' "
+                    "is nested within iname(s) '%s'. This is not supported."
+                    % (sweep_iname,
+                        ", ".join(sorted(outer_insn_inames - set([sweep_iname])))))
+
+        block_size = group_scan_block_size
+        if block_size < 2 or block_size & (block_size - 1):
+            raise LoopyError("group_scan_block_size must be a power of two "
+                    "(and at least 2), got: %s" % block_size)
+
+        sweep_min = pw_aff_to_expr(sweep_min_value)
+        scan_min = pw_aff_to_expr(scan_min_value)
+        # index of the last element
+        last = pw_aff_to_expr(sweep_max_value) - sweep_min
+
+        nblocks = last // block_size + 1
+
+        global_barrier = lp.find_most_recent_global_barrier(temp_kernel, insn.id)
+        stage1_depends_on = insn.depends_on
+        if global_barrier is not None:
+            stage1_depends_on = stage1_depends_on | frozenset([global_barrier])
+
+        neutral = expr.operation.neutral_element(*arg_dtypes)
+
+        def make_vars(name_based_on, shape, scope):
+            return tuple(var(name) for name in make_temporaries(
+                    name_based_on=name_based_on,
+                    nvars=nresults,
+                    shape=shape,
+                    dtypes=reduction_dtypes,
+                    scope=scope))
+
+        def make_lane_iname(suffix):
+            iname = var_name_gen("%s__gscan_%s" % (sweep_iname, suffix))
+            domains.append(_make_slab_set(iname, block_size))
+            new_iname_tags[iname] = LocalIndexTag(0)
+            return iname
+
+        def at(ary_vars, index):
+            return tuple(ary_var[index] for ary_var in ary_vars)
+
+        def combine(operand1, operand2):
+            return expr.operation(arg_dtypes,
+                    _strip_if_scalar(operand1, operand1),
+                    _strip_if_scalar(operand2, operand2))
+
+        partial_vars = make_vars("partial_"+scan_iname, (last + 1,),
+                temp_var_scope.GLOBAL)
+        block_total_vars = make_vars("block_total_"+scan_iname, (nblocks,),
+                temp_var_scope.GLOBAL)
+        block_offset_vars = make_vars("block_offset_"+scan_iname, (nblocks,),
+                temp_var_scope.GLOBAL)
+
+        # {{{ first stage: scan within each block
+
+        block_iname = var_name_gen(sweep_iname + "__gscan_block")
+        load_iname = var_name_gen(sweep_iname + "__gscan_load")
+        store_iname = var_name_gen(sweep_iname + "__gscan_store")
+        block, load, store = var(block_iname), var(load_iname), var(store_iname)
+
+        stage1_inames = [block_iname, load_iname, store_iname]
+        stage1_inequalities = [block, last - block_size*block]
+        for lane in [load, store]:
+            stage1_inequalities.extend([
+                lane, block_size - 1 - lane, last - (block_size*block + lane)])
+
+        position = block_size*block + load
+        subst_map = {sweep_iname: sweep_min + position}
+        if stride == 1:
+            subst_map[scan_iname] = scan_min + position
+            element = substitute_within_expr(expr.expr, subst_map)
+        else:
+            # Each element is the reduction over one stride's worth of the
+            # scan iname.
+            track_iname = var_name_gen(sweep_iname + "__gscan_track")
+            inames_added_for_scan.add(track_iname)
+            track = var(track_iname) - scan_min
+
+            stage1_inames.append(track_iname)
+            stage1_inequalities.extend([
+                track,
+                stride*position - track,
+                track - stride*(position - 1) - 1])
+
+            subst_map[scan_iname] = var(track_iname)
+            element = Reduction(expr.operation, (track_iname,),
+                    substitute_within_expr(expr.expr, subst_map),
+                    allow_simultaneous=False)
+
+        domains.append(_make_set_from_inequalities(
+            stage1_inames, stage1_inequalities))
+        new_iname_tags[block_iname] = GroupIndexTag(0)
+        new_iname_tags[load_iname] = LocalIndexTag(0)
+        new_iname_tags[store_iname] = LocalIndexTag(0)
+
+        block_vars = make_vars("block_"+scan_iname, (block_size,),
+                temp_var_scope.LOCAL)
+        element_vars = make_vars("element_"+scan_iname, (),
+                temp_var_scope.PRIVATE)
+
+        load_depends_on = set(stage1_depends_on)
+        if nresults > 1 and not isinstance(element, (tuple, Reduction)):
+            get_args_insn_id = insn_id_gen(
+                    "%s_%s_get" % (insn.id, scan_iname))
+            element = expand_inner_reduction(
+                    id=get_args_insn_id,
+                    expr=element,
+                    nresults=nresults,
+                    depends_on=stage1_depends_on,
+                    within_inames=frozenset([block_iname, load_iname]),
+                    within_inames_is_final=insn.within_inames_is_final,
+                    predicates=insn.predicates)
+            load_depends_on.add(get_args_insn_id)
+
+        init_iname = make_lane_iname("init")
+        init_ids = _add_assignments(
+                "%s_%s_block_init" % (insn.id, scan_iname),
+                at(block_vars, var(init_iname)), neutral,
+                frozenset([block_iname, init_iname]), stage1_depends_on)
+        element_ids = _add_assignments(
+                "%s_%s_element" % (insn.id, scan_iname),
+                element_vars, element,
+                frozenset([block_iname, load_iname]), load_depends_on)
+        # Same work item as the initialization, no barrier needed.
+        load_ids = _add_assignments(
+                "%s_%s_load" % (insn.id, scan_iname),
+                at(block_vars, load), element_vars,
+                frozenset([block_iname, load_iname]),
+                init_ids + element_ids, no_sync_with=init_ids)
+
+        scan_ids, block_total_ids = _add_blelloch_scan_stages(
+                expr.operation, arg_dtypes, reduction_dtypes, block_vars,
+                block_size, "%s_%s_block_scan" % (insn.id, scan_iname),
+                frozenset([block_iname]), load_ids,
+                at(block_total_vars, block))
+
+        partial_ids = _add_assignments(
+                "%s_%s_store" % (insn.id, scan_iname),
+                at(partial_vars, block_size*block + store),
+                combine(at(block_vars, store), element_vars),
+                frozenset([block_iname, store_iname]),
+                scan_ids + element_ids)
+
+        barrier1_id = insn_id_gen("%s_%s_barrier" % (insn.id, scan_iname))
+        generated_insns.append(lp.BarrierInstruction(
+            id=barrier1_id,
+            depends_on=frozenset(partial_ids + block_total_ids),
+            within_inames=frozenset(),
+            within_inames_is_final=insn.within_inames_is_final,
+            synchronization_kind="global",
+            mem_kind="global"))
+
+        # }}}
+
+        # {{{ second stage: scan the block totals
+
+        chunk_iname = var_name_gen(sweep_iname + "__gscan_chunk")
+        load_iname = var_name_gen(sweep_iname + "__gscan_load")
+        store_iname = var_name_gen(sweep_iname + "__gscan_store")
+        chunk, load, store = var(chunk_iname), var(load_iname), var(store_iname)
+
+        # Chunk c is nonempty iff c*block_size < nblocks, i.e. iff
+        # c*block_size**2 <= last (and likewise for the blocks within it).
+        stage2_inequalities = [chunk, last - block_size**2*chunk]
+        for lane in [load, store]:
+            stage2_inequalities.extend([
+                lane, block_size - 1 - lane,
+                last - block_size*(block_size*chunk + lane)])
+
+        domains.append(_make_set_from_inequalities(
+            [chunk_iname, load_iname, store_iname], stage2_inequalities))
+        new_iname_tags[load_iname] = LocalIndexTag(0)
+        new_iname_tags[store_iname] = LocalIndexTag(0)
+
+        chunk_vars = make_vars("chunk_"+scan_iname, (block_size,),
+                temp_var_scope.LOCAL)
+        chunk_total_vars = make_vars("chunk_total_"+scan_iname, (),
+                temp_var_scope.LOCAL)
+        carry_vars = make_vars("carry_"+scan_iname, (),
+                temp_var_scope.PRIVATE)
+
+        carry_init_ids = _add_assignments(
+                "%s_%s_carry_init" % (insn.id, scan_iname),
+                carry_vars, neutral,
+                frozenset([make_lane_iname("carry_init")]), [barrier1_id])
+
+        init_iname = make_lane_iname("init")
+        init_ids = _add_assignments(
+                "%s_%s_chunk_init" % (insn.id, scan_iname),
+                at(chunk_vars, var(init_iname)), neutral,
+                frozenset([chunk_iname, init_iname]), [barrier1_id])
+        load_ids = _add_assignments(
+                "%s_%s_chunk_load" % (insn.id, scan_iname),
+                at(chunk_vars, load),
+                at(block_total_vars, block_size*chunk + load),
+                frozenset([chunk_iname, load_iname]),
+                init_ids + block_total_ids, no_sync_with=init_ids)
+
+        scan_ids, chunk_total_ids = _add_blelloch_scan_stages(
+                expr.operation, arg_dtypes, reduction_dtypes, chunk_vars,
+                block_size, "%s_%s_chunk_scan" % (insn.id, scan_iname),
+                frozenset([chunk_iname]), load_ids, chunk_total_vars)
+
+        offset_ids = _add_assignments(
+                "%s_%s_offset" % (insn.id, scan_iname),
+                at(block_offset_vars, block_size*chunk + store),
+                combine(carry_vars, at(chunk_vars, store)),
+                frozenset([chunk_iname, store_iname]),
+                scan_ids + carry_init_ids)
+
+        carry_ids = _add_assignments(
+                "%s_%s_carry" % (insn.id, scan_iname),
+                carry_vars, combine(carry_vars, chunk_total_vars),
+                frozenset([chunk_iname, make_lane_iname("carry")]),
+                offset_ids + chunk_total_ids)
+
+        barrier2_id = insn_id_gen("%s_%s_barrier" % (insn.id, scan_iname))
+        generated_insns.append(lp.BarrierInstruction(
+            id=barrier2_id,
+            depends_on=frozenset(offset_ids + carry_ids),
+            within_inames=frozenset(),
+            within_inames_is_final=insn.within_inames_is_final,
+            synchronization_kind="global",
+            mem_kind="global"))
+
+        # }}}
+
+        # {{{ third stage: add the block offsets
+
+        position = var(sweep_iname) - sweep_min
+        result = combine(
+                at(block_offset_vars, position // block_size),
+                at(partial_vars, position))
+
+        result_depends_on = [barrier2_id] + partial_ids + offset_ids
+
+        if nresults == 1:
+            new_insn_add_depends_on.update(result_depends_on)
+            return result
+
+        result_vars = make_vars("result_"+scan_iname, (),
+                temp_var_scope.PRIVATE)
+        result_ids = _add_assignments(
+                "%s_%s_result" % (insn.id, scan_iname),
+                result_vars, result, frozenset([sweep_iname]),
+                result_depends_on)
+        new_insn_add_depends_on.update(result_ids)
+
+        return list(result_vars)
+
+        # }}}
+
+    # }}}
+
     # {{{ seq/par dispatch
 
     def map_reduction(expr, rec, nresults=1):
@@ -1727,6 +2602,23 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
 
         # {{{ sanity checks
 
+        if n_nonlocal_par:
+            from loopy.kernel.data import GroupIndexTag
+            bad_inames = [
+                    iname for iname in iname_classes.nonlocal_parallel
+                    if not isinstance(
+                        temp_kernel.iname_to_tag[iname], GroupIndexTag)]
+            if bad_inames:
+                raise LoopyError("the only forms of parallelism supported "
+                        "by reductions are 'local' and 'group'--found "
+                        "iname(s) '%s' respectively tagged '%s'"
+                        % (", ".join(bad_inames),
+                           ", ".join(str(temp_kernel.iname_to_tag[iname])
+                                     for iname in bad_inames)))
+
+            return map_reduction_global(
+                    expr, rec, nresults, arg_dtypes, reduction_dtypes)
+
         if n_local_par and n_sequential:
             raise LoopyError("Reduction over '%s' contains both parallel and "
                     "sequential inames. It must be split "
@@ -1741,15 +2633,6 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                     "before code generation."
                     % ", ".join(expr.inames))
 
-        if n_nonlocal_par:
-            bad_inames = iname_classes.nonlocal_parallel
-            raise LoopyError("the only form of parallelism supported "
-                    "by reductions is 'local'--found iname(s) '%s' "
-                    "respectively tagged '%s'"
-                    % (", ".join(bad_inames),
-                       ", ".join(kernel.iname_to_tag[iname]
-                                 for iname in bad_inames)))
-
         if n_local_par == 0 and n_sequential == 0:
             from loopy.diagnostic import warn_with_kernel
             warn_with_kernel(kernel, "empty_reduction",
@@ -1777,14 +2660,26 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
                 parallel = sweep_iname in sweep_class.local_parallel
                 bad_parallel = sweep_iname in sweep_class.nonlocal_parallel
 
+                from loopy.kernel.data import GroupIndexTag
+
                 if sweep_iname not in outer_insn_inames:
                     _error_if_force_scan_on(LoopyError,
                             "Sweep iname '%s' was detected, but is not an iname "
                             "for the instruction." % sweep_iname)
+                elif bad_parallel and isinstance(
+                        temp_kernel.iname_to_tag[sweep_iname], GroupIndexTag):
+                    return map_scan_global(
+                            expr, rec, nresults, arg_dtypes, reduction_dtypes,
+                            sweep_iname, scan_param.scan_iname,
+                            scan_param.sweep_lower_bound,
+                            scan_param.sweep_upper_bound,
+                            scan_param.scan_lower_bound,
+                            scan_param.stride)
                 elif bad_parallel:
                     _error_if_force_scan_on(LoopyError,
                             "Sweep iname '%s' has an unsupported parallel tag '%s' "
-                            "- the only parallelism allowed is 'local'." %
+                            "- the only parallelism allowed is 'local' and "
+                            "'group'." %
                             (sweep_iname, temp_kernel.iname_to_tag[sweep_iname]))
                 elif parallel:
                     return map_scan_local(
@@ -1913,10 +2808,14 @@ def realize_reduction(kernel, insn_id_filter=None, unknown_types_ok=True,
             # The reduction expander needs an up-to-date kernel
             # object to find dependencies. Keep temp_kernel up-to-date.
 
+            new_iname_to_tag = kernel.iname_to_tag.copy()
+            new_iname_to_tag.update(new_iname_tags)
+
             temp_kernel = kernel.copy(
                     instructions=new_insns + insn_queue,
                     temporary_variables=new_temporary_variables,
-                    domains=domains)
+                    domains=domains,
+                    iname_to_tag=new_iname_to_tag)
             temp_kernel = lp.replace_instruction_ids(
                     temp_kernel, insn_id_replacements)
 
@@ -24,7 +24,7 @@ THE SOFTWARE.
 
 
 import six
-from pytools import ImmutableRecord
+from pytools import ImmutableRecord, memoize_on_first_arg
 import sys
 import islpy as isl
 from loopy.diagnostic import warn_with_kernel, LoopyError  # noqa
@@ -565,6 +565,123 @@ class ScheduleDebugInput(Exception):
 # }}}
 
 
+# {{{ schedule hints
+
+def _map_hint_iname(kernel, iname, iname_map):
+    if iname_map is not None and iname in iname_map:
+        new_inames = iname_map[iname]
+        if isinstance(new_inames, str):
+            new_inames = (new_inames,)
+        return tuple(new_inames)
+
+    all_inames = kernel.all_inames()
+    if iname in all_inames:
+        return (iname,)
+
+    # The loop may have been split (perhaps repeatedly) by split_iname
+    # since the hint was made. Replace it by the resulting loop nest.
+    result = ()
+    for suffix in ["_outer", "_inner"]:
+        sub_iname = iname + suffix
+        if any(other == sub_iname or other.startswith(sub_iname + "_")
+                for other in all_inames):
+            result = result + _map_hint_iname(kernel, sub_iname, None)
+
+    return result
+
+
+def map_schedule_hint(kernel, schedule_hint, iname_map=None):
+    """Translate *schedule_hint*, a schedule of a kernel related to *kernel*,
+    into a sequence of :class:`EnterLoop`, :class:`LeaveLoop` and
+    :class:`RunInstruction` items referring to the loops and instructions of
+    *kernel*, for use as the *schedule_hint* argument of
+    :func:`loopy.generate_loop_schedules`.
+
+    :arg schedule_hint: a scheduled :class:`loopy.LoopKernel` or a sequence
+        of schedule items. Items other than the three kinds above are
+        dropped, as are instructions not in *kernel*.
+    :arg iname_map: a mapping from inames of *schedule_hint* to an iname or
+        a sequence of (outer to inner) inames of *kernel* replacing it.
+        Inames not found in this mapping or in *kernel* are assumed to have
+        been split by :func:`loopy.split_iname` with the default names for
+        the resulting inames and are replaced by those. Inames that have
+        become parallel in *kernel* are dropped.
+
+    .. versionadded:: 2018.1
+    """
+    from loopy.kernel import LoopKernel
+    if isinstance(schedule_hint, LoopKernel):
+        if schedule_hint.schedule is None:
+            raise LoopyError("kernel '%s' passed as a schedule hint has not "
+                    "been scheduled" % schedule_hint.name)
+        schedule_hint = schedule_hint.schedule
+
+    from loopy.kernel.data import ConcurrentTag, IlpBaseTag
+    all_inames = kernel.all_inames()
+
+    def get_loop_inames(iname):
+        result = []
+        for new_iname in _map_hint_iname(kernel, iname, iname_map):
+            if new_iname not in all_inames:
+                continue
+
+            tag = kernel.iname_to_tag.get(new_iname)
+            if (isinstance(tag, ConcurrentTag)
+                    and not isinstance(tag, IlpBaseTag)):
+                # There's no notion of 'entering' a parallel loop.
+                continue
+
+            result.append(new_iname)
+
+        return result
+
+    result = []
+    for sched_item in schedule_hint:
+        if isinstance(sched_item, EnterLoop):
+            result.extend(
+                    EnterLoop(iname=iname)
+                    for iname in get_loop_inames(sched_item.iname))
+        elif isinstance(sched_item, LeaveLoop):
+            result.extend(
+                    LeaveLoop(iname=iname)
+                    for iname in reversed(get_loop_inames(sched_item.iname)))
+        elif isinstance(sched_item, RunInstruction):
+            if sched_item.insn_id in kernel.id_to_insn:
+                result.append(sched_item)
+
+    return tuple(result)
+
+
+def _get_schedule_hint_rank(sched_state, sched_item):
+    """Return the distance from the current position in the schedule hint to
+    the next occurrence of *sched_item*, or the length of the hint if
+    *sched_item* does not occur there.
+    """
+    indices = sched_state.schedule_hint_indices.get(sched_item)
+    hint_position = sched_state.schedule_hint_position
+    if indices:
+        from bisect import bisect_left
+        i = bisect_left(indices, hint_position)
+        if i < len(indices):
+            return indices[i] - hint_position
+
+    return len(sched_state.schedule_hint)
+
+
+def _advance_schedule_hint(sched_state, sched_item):
+    """Return the position in the schedule hint after scheduling *sched_item*.
+    If the hint does not contain *sched_item* from the current position on,
+    the schedule has diverged from the hint and the position stays put.
+    """
+    rank = _get_schedule_hint_rank(sched_state, sched_item)
+    if rank == len(sched_state.schedule_hint):
+        return sched_state.schedule_hint_position
+
+    return sched_state.schedule_hint_position + rank + 1
+
+# }}}
+
+
 # {{{ scheduling algorithm
 
 class SchedulerState(ImmutableRecord):
@@ -622,6 +739,23 @@ class SchedulerState(ImmutableRecord):
 
         A :class:`frozenset` of any iname that started prescheduled
 
+    .. attribute:: schedule_hint
+
+        A sequence of schedule items, as returned by
+        :func:`map_schedule_hint`. Unlike :attr:`preschedule`, this is only
+        used to choose the order in which the scheduler tries its options, so
+        that it follows the hint where it can and searches where it cannot.
+
+    .. attribute:: schedule_hint_indices
+
+        A mapping from schedule items to the sorted list of their positions
+        in :attr:`schedule_hint`.
+
+    .. attribute:: schedule_hint_position
+
+        The position in :attr:`schedule_hint` after the last scheduled item
+        that matched it.
+
     .. attribute:: may_schedule_global_barriers
 
         Whether global barrier scheduling is allowed
@@ -791,6 +925,17 @@ def generate_loop_schedules_internal(
         for item in sched_state.preschedule
         for insn_id in sched_item_to_insn_id(item))
 
+    if sched_state.schedule_hint:
+        # Try those instructions first that the hint runs next. Ties are
+        # broken as above: non-prescheduled instructions first, then by
+        # insn_sort_key.
+        insn_ids_to_try = sorted(
+                sorted(insn_ids_to_try, key=insn_sort_key, reverse=True),
+                key=lambda insn_id: (
+                    _get_schedule_hint_rank(
+                        sched_state, RunInstruction(insn_id=insn_id)),
+                    insn_id in sched_state.prescheduled_insn_ids))
+
     for insn_id in insn_ids_to_try:
         insn = kernel.id_to_insn[insn_id]
 
@@ -926,12 +1071,14 @@ def generate_loop_schedules_internal(
                     new_uses_of_boostability.append(
                             (insn.id, orig_have & insn.boostable_into))
 
+            sched_item = RunInstruction(insn_id=insn.id)
             new_sched_state = sched_state.copy(
                     scheduled_insn_ids=sched_state.scheduled_insn_ids | iid_set,
                     unscheduled_insn_ids=sched_state.unscheduled_insn_ids - iid_set,
                     insn_ids_to_try=new_insn_ids_to_try,
-                    schedule=(
-                        sched_state.schedule + (RunInstruction(insn_id=insn.id),)),
+                    schedule=sched_state.schedule + (sched_item,),
+                    schedule_hint_position=_advance_schedule_hint(
+                        sched_state, sched_item),
                     preschedule=(
                         sched_state.preschedule
                         if insn_id not in sched_state.prescheduled_insn_ids
@@ -1041,12 +1188,13 @@ def generate_loop_schedules_internal(
                         break
 
             if can_leave and not debug_mode:
+                sched_item = LeaveLoop(iname=last_entered_loop)
 
                 for sub_sched in generate_loop_schedules_internal(
                         sched_state.copy(
-                            schedule=(
-                                sched_state.schedule
-                                + (LeaveLoop(iname=last_entered_loop),)),
+                            schedule=sched_state.schedule + (sched_item,),
+                            schedule_hint_position=_advance_schedule_hint(
+                                sched_state, sched_item),
                             active_inames=sched_state.active_inames[:-1],
                             preschedule=(
                                 sched_state.preschedule
@@ -1246,19 +1394,28 @@ def generate_loop_schedules_internal(
             for tier in priority_tiers:
                 found_viable_schedule = False
 
-                for iname in sorted(tier,
+                tier_inames = sorted(tier,
                         key=lambda iname: (
                             iname_to_usefulness.get(iname, 0),
                             # Sort by iname to achieve deterministic
                             # ordering of generated schedules.
                             iname),
-                        reverse=True):
+                        reverse=True)
+
+                if sched_state.schedule_hint:
+                    # Try the loop that the hint enters next first.
+                    tier_inames.sort(
+                            key=lambda iname: _get_schedule_hint_rank(
+                                sched_state, EnterLoop(iname=iname)))
+
+                for iname in tier_inames:
+                    sched_item = EnterLoop(iname=iname)
 
                     for sub_sched in generate_loop_schedules_internal(
                             sched_state.copy(
-                                schedule=(
-                                    sched_state.schedule
-                                    + (EnterLoop(iname=iname),)),
+                                schedule=sched_state.schedule + (sched_item,),
+                                schedule_hint_position=_advance_schedule_hint(
+                                    sched_state, sched_item),
                                 active_inames=(
                                     sched_state.active_inames + (iname,)),
                                 entered_inames=(
@@ -1393,6 +1550,32 @@ class DependencyRecord(ImmutableRecord):
                 var_kind=var_kind)
 
 
+@memoize_on_first_arg
+def _get_insn_id_to_relevant_vars(kernel, var_kind):
+    """Return a tuple of two :class:`dict` instances mapping instruction ids
+    to the variables of kind *var_kind* the instruction writes and accesses,
+    respectively.
+    """
+
+    if var_kind == "local":
+        relevant_vars = kernel.local_var_names()
+    elif var_kind == "global":
+        relevant_vars = kernel.global_var_names()
+    else:
+        raise ValueError("unknown 'var_kind': %s" % var_kind)
+
+    insn_id_to_written_vars = {}
+    insn_id_to_accessed_vars = {}
+
+    for insn in kernel.instructions:
+        insn_id_to_written_vars[insn.id] = (
+                frozenset(insn.assignee_var_names()) & relevant_vars)
+        insn_id_to_accessed_vars[insn.id] = (
+                insn.dependency_names() & relevant_vars)
+
+    return insn_id_to_written_vars, insn_id_to_accessed_vars
+
+
 class DependencyTracker(object):
     """
     A utility to help track dependencies between originating from a set
@@ -1435,16 +1618,18 @@ class DependencyTracker(object):
         self.reverse = reverse
         self.var_kind = var_kind
 
-        from loopy.symbolic import AccessRangeOverlapChecker
-        self.overlap_checker = AccessRangeOverlapChecker(kernel)
+        # Shared among all trackers for the kernel, so that access ranges
+        # and their overlaps are only computed once across barrier kinds,
+        # loop levels and candidate schedules.
+        from loopy.symbolic import get_access_range_overlap_checker
+        self.overlap_checker = get_access_range_overlap_checker(kernel)
 
-        if var_kind == "local":
-            self.relevant_vars = kernel.local_var_names()
-        elif var_kind == "global":
-            self.relevant_vars = kernel.global_var_names()
-        else:
+        if var_kind not in ["local", "global"]:
             raise ValueError("unknown 'var_kind': %s" % var_kind)
 
+        self.insn_id_to_written_vars, self.insn_id_to_accessed_vars = (
+                _get_insn_id_to_relevant_vars(kernel, var_kind))
+
         from collections import defaultdict
         self.base_writer_map = defaultdict(set)
         self.base_access_map = defaultdict(set)
@@ -1476,11 +1661,11 @@ class DependencyTracker(object):
         source = self.kernel.id_to_insn.get(source, source)
 
         for written in self.map_to_base_storage(
-                set(source.assignee_var_names()) & self.relevant_vars):
+                self.insn_id_to_written_vars[source.id]):
             self.base_writer_map[written].add(source.id)
 
         for read in self.map_to_base_storage(
-                source.dependency_names() & self.relevant_vars):
+                self.insn_id_to_accessed_vars[source.id]):
             self.base_access_map[read].add(source.id)
 
     def gen_dependencies_with_target_at(self, target):
@@ -1509,10 +1694,10 @@ class DependencyTracker(object):
             src_base_var_to_accessor_map):
 
         def get_written_names(insn):
-            return set(insn.assignee_var_names()) & self.relevant_vars
+            return self.insn_id_to_written_vars[insn.id]
 
         def get_accessed_names(insn):
-            return insn.dependency_names() & self.relevant_vars
+            return self.insn_id_to_accessed_vars[insn.id]
 
         dir_to_getter = {"w": get_written_names, "any": get_accessed_names}
 
@@ -1836,8 +2021,16 @@ class MinRecursionLimitForScheduling(MinRecursionLimit):
 
 # {{{ main scheduling entrypoint
 
-def generate_loop_schedules(kernel, debug_args={}):
+def generate_loop_schedules(kernel, debug_args={}, schedule_hint=None):
     """
+    :arg schedule_hint: a schedule of a related kernel, e.g. one that differs
+        only in split factors or iname tags, as accepted by
+        :func:`map_schedule_hint`. The scheduler follows this schedule where
+        it is valid for *kernel* and only searches for alternatives where
+        it is not, which may save much of the scheduling time.
+
+        .. versionadded:: 2018.1
+
     .. warning::
 
         This function needs to be called inside (another layer) of a
@@ -1848,12 +2041,17 @@ def generate_loop_schedules(kernel, debug_args={}):
         internal error in the Python runtime.
     """
 
+    if schedule_hint is not None:
+        schedule_hint = map_schedule_hint(kernel, schedule_hint)
+
     with MinRecursionLimitForScheduling(kernel):
-        for sched in generate_loop_schedules_inner(kernel, debug_args=debug_args):
+        for sched in generate_loop_schedules_inner(kernel,
+                debug_args=debug_args, schedule_hint=schedule_hint):
             yield sched
 
 
-def generate_loop_schedules_inner(kernel, debug_args={}):
+def generate_loop_schedules_inner(kernel, debug_args={}, schedule_hint=None):
+    # *schedule_hint* must already have been translated by map_schedule_hint.
     from loopy.kernel import kernel_state
     if kernel.state not in (kernel_state.PREPROCESSED, kernel_state.SCHEDULED):
         raise LoopyError("cannot schedule a kernel that has not been "
@@ -1891,6 +2089,13 @@ def generate_loop_schedules_inner(kernel, debug_args={}):
             iname for iname in kernel.all_inames()
             if isinstance(kernel.iname_to_tag.get(iname), ConcurrentTag))
 
+    if schedule_hint is None:
+        schedule_hint = ()
+
+    schedule_hint_indices = {}
+    for i, sched_item in enumerate(schedule_hint):
+        schedule_hint_indices.setdefault(sched_item, []).append(i)
+
     loop_nest_with_map = find_loop_nest_with_map(kernel)
     loop_nest_around_map = find_loop_nest_around_map(kernel)
     sched_state = SchedulerState(
@@ -1922,6 +2127,10 @@ def generate_loop_schedules_inner(kernel, debug_args={}):
             preschedule=preschedule,
             insn_ids_to_try=None,
 
+            schedule_hint=schedule_hint,
+            schedule_hint_indices=schedule_hint_indices,
+            schedule_hint_position=0,
+
             # ilp and vec are not parallel for the purposes of the scheduler
             parallel_inames=parallel_inames - ilp_inames - vec_inames,
 
@@ -2037,7 +2246,7 @@ schedule_cache = WriteOncePersistentDict(
         key_builder=LoopyKeyBuilder())
 
 
-def _get_one_scheduled_kernel_inner(kernel):
+def _get_one_scheduled_kernel_inner(kernel, schedule_hint=None):
     # This helper function exists to ensure that the generator chain is fully
     # out of scope after the function returns. This allows it to be
     # garbage-collected in the exit handler of the
@@ -2047,13 +2256,35 @@ def _get_one_scheduled_kernel_inner(kernel):
     #
     # See https://gitlab.tiker.net/inducer/sumpy/issues/31 for context.
 
-    return next(iter(generate_loop_schedules(kernel)))
+    # *schedule_hint* has already been translated by the caller, so call
+    # generate_loop_schedules_inner directly.
+    return next(iter(generate_loop_schedules_inner(kernel,
+        schedule_hint=schedule_hint)))
+
 
+def get_one_scheduled_kernel(kernel, schedule_hint=None):
+    """Return *kernel* with the first schedule found by
+    :func:`generate_loop_schedules`.
 
-def get_one_scheduled_kernel(kernel):
+    :arg schedule_hint: see :func:`generate_loop_schedules`. This allows to
+        warm-start scheduling from the schedule of a similar kernel, e.g.
+        while autotuning::
+
+            sched_knl = lp.get_one_scheduled_kernel(
+                    lp.preprocess_kernel(lp.split_iname(knl, "i", 16)))
+            sched_knl_2 = lp.get_one_scheduled_kernel(
+                    lp.preprocess_kernel(lp.split_iname(knl, "i", 32)),
+                    schedule_hint=sched_knl)
+
+        .. versionadded:: 2018.1
+    """
     from loopy import CACHING_ENABLED
 
     sched_cache_key = kernel
+    if schedule_hint is not None:
+        schedule_hint = map_schedule_hint(kernel, schedule_hint)
+        sched_cache_key = (kernel, schedule_hint)
+
     from_cache = False
 
     if CACHING_ENABLED:
@@ -2072,7 +2303,8 @@ def get_one_scheduled_kernel(kernel):
         logger.info("%s: schedule start" % kernel.name)
 
         with MinRecursionLimitForScheduling(kernel):
-            result = _get_one_scheduled_kernel_inner(kernel)
+            result = _get_one_scheduled_kernel_inner(kernel,
+                    schedule_hint=schedule_hint)
 
         logger.info("%s: scheduling done after %.2f s" % (
             kernel.name, time()-start_time))
@@ -1025,11 +1025,18 @@ class AccessFootprintGatherer(CombineMapper):
         if not isinstance(subscript, tuple):
             subscript = (subscript,)
 
-        from loopy.symbolic import get_access_range
+        from loopy.symbolic import get_access_range, UnableToDetermineAccessRange
 
         try:
             access_range = get_access_range(self.domain, subscript,
                     self.kernel.assumptions)
+        except UnableToDetermineAccessRange:
+            # Likely: index was data-dependent.
+            if self.ignore_uncountable:
+                return {}
+            else:
+                raise LoopyError("failed to gather footprint: %s" % expr)
+
         except isl.Error:
             # Likely: index was non-linear, nothing we can do.
             if self.ignore_uncountable:
@@ -28,7 +28,8 @@ THE SOFTWARE.
 import six
 from six.moves import range, zip, reduce, intern
 
-from pytools import memoize, memoize_method, ImmutableRecord
+from pytools import (
+        memoize, memoize_method, memoize_on_first_arg, ImmutableRecord)
 import pytools.lex
 
 import pymbolic.primitives as p
@@ -1590,6 +1591,15 @@ def get_access_range(domain, subscript, assumptions, shape=None,
         permitted in the access range expressions. Names that are already
         parameters of *domain* may be repeated without ill effects.
     """
+    return get_access_map(domain, subscript, assumptions, shape=shape,
+            allowed_constant_names=allowed_constant_names).range()
+
+
+def get_access_map(domain, subscript, assumptions, shape=None,
+        allowed_constant_names=None):
+    """Like :func:`get_access_range`, but return an :class:`islpy.Map`
+    from the points of *domain* to the indices they access.
+    """
     domain, assumptions = isl.align_two(domain,
             assumptions)
     domain = domain & assumptions
@@ -1674,7 +1684,7 @@ def get_access_range(domain, subscript, assumptions, shape=None,
             dim_type.out, 0, dn)
     del access_map_as_map
 
-    return access_map.range()
+    return access_map
 
 # }}}
 
@@ -1786,6 +1796,9 @@ class AccessRangeOverlapChecker(object):
         self.kernel = kernel
         self.vars = kernel.get_written_variables() | kernel.get_read_variables()
 
+        # mapping: (var_name, (insn_a, dir_a), (insn_b, dir_b)) -> bool
+        self._overlap_cache = {}
+
     @memoize_method
     def _get_access_ranges(self, insn_id, access_dir):
         insn = self.kernel.id_to_insn[insn_id]
@@ -1826,6 +1839,21 @@ class AccessRangeOverlapChecker(object):
 
         return self._get_access_ranges(insn_id, access_dir)[var_name]
 
+    @memoize_method
+    def _get_fixed_indices(self, insn_id, access_dir, var_name):
+        """Return a tuple with an entry for each axis of the access range of
+        *var_name*, containing the index to which all accesses along that
+        axis are fixed, or *None* if there is no (obvious) such index.
+        """
+        arange = self._get_access_range_for_var(insn_id, access_dir, var_name)
+
+        result = []
+        for iaxis in range(arange.dim(dim_type.set)):
+            idx = arange.plain_get_val_if_fixed(dim_type.set, iaxis)
+            result.append(None if idx.is_nan() else idx.to_python())
+
+        return tuple(result)
+
     def do_access_ranges_overlap_conservative(
                 self, insn1, insn1_dir, insn2, insn2_dir, var_name):
         """Determine whether the access ranges to *var_name* in the two
@@ -1839,15 +1867,89 @@ class AccessRangeOverlapChecker(object):
         :returns: a :class:`bool`
         """
 
+        # overlap is symmetric
+        key = (var_name,) + tuple(sorted([(insn1, insn1_dir), (insn2, insn2_dir)]))
+
+        try:
+            return self._overlap_cache[key]
+        except KeyError:
+            pass
+
         insn1_arange = self._get_access_range_for_var(insn1, insn1_dir, var_name)
         insn2_arange = self._get_access_range_for_var(insn2, insn2_dir, var_name)
 
         if insn1_arange is False or insn2_arange is False:
-            return False
-        if insn1_arange is True or insn2_arange is True:
-            return True
+            result = False
+        elif insn1_arange is True or insn2_arange is True:
+            result = True
+        elif any(
+                idx1 is not None and idx2 is not None and idx1 != idx2
+                for idx1, idx2 in zip(
+                    self._get_fixed_indices(insn1, insn1_dir, var_name),
+                    self._get_fixed_indices(insn2, insn2_dir, var_name))):
+            # cheap test for the common case of accesses to distinct
+            # slices of an array
+            result = False
+        else:
+            result = not (insn1_arange & insn2_arange).is_empty()
+
+        self._overlap_cache[key] = result
+        return result
+
+    def find_overlapping_accesses_conservative(
+            self, insn, insn_dir, other_insns, other_dir, var_name):
+        """Return a :class:`list` of the instruction IDs in *other_insns* whose
+        access ranges to *var_name* overlap (as determined by
+        :meth:`do_access_ranges_overlap_conservative`) with that of *insn*.
+
+        The access range of *insn* is first intersected with the union of
+        the ranges of all of *other_insns*, so that only one query is needed
+        if none of them overlap.
+        """
 
-        return not (insn1_arange & insn2_arange).is_empty()
+        if not other_insns:
+            return []
+
+        arange = self._get_access_range_for_var(insn, insn_dir, var_name)
+        if arange is False:
+            return []
+
+        if arange is not True:
+            other_aranges = [
+                    self._get_access_range_for_var(other, other_dir, var_name)
+                    for other in other_insns]
+
+            other_arange_union = None
+            for other_arange in other_aranges:
+                if isinstance(other_arange, bool):
+                    continue
+                if other_arange_union is None:
+                    other_arange_union = other_arange
+                else:
+                    other_arange_union = other_arange_union | other_arange
+
+            if (other_arange_union is None
+                    or (arange & other_arange_union).is_empty()):
+                # only those with imprecise access ranges may overlap
+                return [
+                        other
+                        for other, other_arange in zip(other_insns, other_aranges)
+                        if other_arange is True]
+
+        return [
+                other
+                for other in other_insns
+                if self.do_access_ranges_overlap_conservative(
+                    insn, insn_dir, other, other_dir, var_name)]
+
+
+@memoize_on_first_arg
+def get_access_range_overlap_checker(kernel):
+    """Return an :class:`AccessRangeOverlapChecker` for *kernel*. The same
+    instance (and hence its cached access ranges and overlap results) is
+    returned for all calls with the same kernel.
+    """
+    return AccessRangeOverlapChecker(kernel)
 
 # }}}
 
@@ -97,6 +97,14 @@ class TargetBase(object):
         """
         raise NotImplementedError()
 
+    def get_subgroup_size(self):
+        """
+        :returns: the number of work items in a sub-group if reductions and
+            scans over local-parallel inames may use sub-group collective
+            operations, or *None* otherwise.
+        """
+        return None
+
     def get_host_ast_builder(self):
         """
         :returns: a class implementing :class:`ASTBuilderBase` for the host code
@@ -220,6 +228,22 @@ class ASTBuilderBase(object):
     def emit_if(self, condition_str, ast):
         raise NotImplementedError()
 
+    @property
+    def can_implement_version_dispatch(self):
+        return False
+
+    def get_version_dispatch(self, codegen_state, versions):
+        """Return the AST of a host program named
+        :attr:`loopy.codegen.CodeGenerationState.gen_program_name` that
+        passes its arguments on to one of several host programs taking
+        the same arguments.
+
+        :arg versions: a list of tuples ``(condition_str, program_name)``.
+            The first program whose condition holds is called. A
+            *condition_str* of *None* always holds.
+        """
+        raise NotImplementedError()
+
     def emit_initializer(self, codegen_state, dtype, name, val_str, is_const):
         raise NotImplementedError()
 
@@ -234,6 +258,13 @@ class ASTBuilderBase(object):
 
     # }}}
 
+    def minimize_guards(self, codegen_state, node):
+        """Return a tuple of an AST equivalent to *node* with redundant or
+        loop-invariant conditionals merged or hoisted, and the number of
+        conditionals that were eliminated from their original location.
+        """
+        return node, 0
+
     def process_ast(self, node):
         return node
 
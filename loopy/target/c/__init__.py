@@ -241,6 +241,228 @@ class ASTSubscriptCollector(CASTIdentityMapper):
 # }}}
 
 
+# {{{ guard minimization
+
+class GuardMinimizer(object):
+    """Simplifies the conditionals in a C AST generated by loopy:
+
+    * Adjacent conditionals with identical conditions are merged.
+    * Conditionals that are implied by an enclosing identical conditional
+      are removed.
+    * Conditionals making up the entire body of a loop that do not depend
+      on the loop variable are hoisted out of the loop (loop unswitching).
+
+    Only conditions that do not refer to variables written by the kernel are
+    moved. :attr:`n_eliminated` counts the conditionals that were merged,
+    removed or hoisted.
+    """
+
+    def __init__(self, kernel):
+        self.unsafe_names = (
+                kernel.get_written_variables()
+                | set(kernel.temporary_variables))
+        self.n_eliminated = 0
+
+    def get_movable_dependencies(self, expr):
+        """Return the variables that the condition *expr* depends on, or
+        *None* if *expr* may not be moved.
+        """
+        from loopy.symbolic import get_dependencies
+        try:
+            deps = get_dependencies(expr)
+        except ValueError:
+            # raised by pymbolic mappers for unsupported expression types
+            # and foreign objects
+            return None
+
+        if deps & self.unsafe_names:
+            return None
+
+        return deps
+
+    def get_condition_info(self, condition):
+        """Return a tuple ``(key, dependencies)`` for *condition*, or *None*
+        if *condition* may not be moved.
+        """
+        if not isinstance(condition, CExpression):
+            return None
+
+        deps = self.get_movable_dependencies(condition.expr)
+        if deps is None:
+            return None
+
+        return condition.expr, deps
+
+    @staticmethod
+    def get_declared_name(node):
+        from cgen import Initializer, Declarator, NestedDeclarator
+        if isinstance(node, Initializer):
+            node = node.vdecl
+        while isinstance(node, NestedDeclarator):
+            node = node.subdecl
+        if isinstance(node, Declarator):
+            _, name = node.get_decl_pair()
+            return name
+
+        return None
+
+    def __call__(self, node):
+        return self.rec(node, {})
+
+    def rec(self, node, known):
+        """
+        :arg known: a mapping from the keys of conditions known to be true to
+            their dependencies.
+        """
+        from cgen import If, For
+
+        if isinstance(node, Block):
+            return self.map_block(node, known)
+        elif isinstance(node, If):
+            return self.map_if(node, known)
+        elif isinstance(node, For):
+            return self.map_for(node, known)
+        else:
+            return node
+
+    def map_block(self, node, known):
+        from cgen import If, Declarator, Initializer, Comment, Line
+
+        known = dict(known)
+        contents = []
+        for child in node.contents:
+            if isinstance(child, (Declarator, Initializer)):
+                # Declarations may shadow names used in known conditions.
+                name = self.get_declared_name(child)
+                known = dict(
+                        (key, deps) for key, deps in six.iteritems(known)
+                        if name is not None and name not in deps)
+
+            child = self.rec(child, known)
+
+            if isinstance(child, If) and child.else_ is None:
+                # Look for a preceding conditional, possibly separated by
+                # comments.
+                prev_idx = len(contents) - 1
+                while (prev_idx >= 0
+                        and isinstance(contents[prev_idx], (Comment, Line))):
+                    prev_idx -= 1
+
+                prev = contents[prev_idx] if prev_idx >= 0 else None
+                if isinstance(prev, If) and prev.else_ is None:
+                    prev_info = self.get_condition_info(prev.condition)
+                    info = self.get_condition_info(child.condition)
+                    if (prev_info is not None and info is not None
+                            and prev_info[0] == info[0]):
+                        contents[prev_idx:] = [If(
+                                prev.condition,
+                                self.merge_bodies(
+                                    [prev.then_]
+                                    + contents[prev_idx+1:]
+                                    + [child.then_]))]
+                        self.n_eliminated += 1
+                        continue
+
+            contents.append(child)
+
+        return type(node)(contents)
+
+    @staticmethod
+    def merge_bodies(bodies):
+        from cgen import Declarator, Initializer
+
+        def get_contents(body):
+            # Bodies declaring names keep their own scope.
+            if (isinstance(body, Block)
+                    and not isinstance(body, ScopingBlock)
+                    and not any(
+                        isinstance(child, (Declarator, Initializer))
+                        for child in body.contents)):
+                return list(body.contents)
+            else:
+                return [body]
+
+        return Block([
+            child
+            for body in bodies
+            for child in get_contents(body)])
+
+    def map_if(self, node, known):
+        from cgen import If
+
+        condition = node.condition
+        inner_known = known
+
+        if node.else_ is None and isinstance(condition, CExpression):
+            if isinstance(condition.expr, p.LogicalAnd):
+                conjuncts = condition.expr.children
+            else:
+                conjuncts = (condition.expr,)
+
+            # Drop conjuncts implied by enclosing conditionals.
+            remaining = [cond for cond in conjuncts if cond not in known]
+            if not remaining:
+                self.n_eliminated += 1
+                return self.rec(node.then_, known)
+            elif len(remaining) < len(conjuncts):
+                condition = CExpression(
+                        condition.to_code_mapper,
+                        p.LogicalAnd(tuple(remaining))
+                        if len(remaining) > 1 else remaining[0])
+
+            inner_known = dict(known)
+            for cond in conjuncts:
+                deps = self.get_movable_dependencies(cond)
+                if deps is not None:
+                    inner_known[cond] = deps
+
+        return If(
+                condition,
+                self.rec(node.then_, inner_known),
+                self.rec(node.else_, known) if node.else_ is not None else None)
+
+    def map_for(self, node, known):
+        from cgen import If, For
+
+        loop_var = self.get_declared_name(node.start)
+
+        known = dict(
+                (key, deps) for key, deps in six.iteritems(known)
+                if loop_var is not None and loop_var not in deps)
+        body = self.rec(node.body, known)
+
+        # {{{ unswitch conditionals making up the entire loop body
+
+        hoisted_conditions = []
+        while True:
+            single = body
+            if (isinstance(single, Block)
+                    and not isinstance(single, ScopingBlock)
+                    and len(single.contents) == 1):
+                single, = single.contents
+
+            if not (isinstance(single, If) and single.else_ is None):
+                break
+
+            info = self.get_condition_info(single.condition)
+            if info is None or loop_var is None or loop_var in info[1]:
+                break
+
+            hoisted_conditions.append(single.condition)
+            body = single.then_
+            self.n_eliminated += 1
+
+        # }}}
+
+        result = For(node.start, node.condition, node.update, body)
+        for condition in reversed(hoisted_conditions):
+            result = If(condition, result)
+
+        return result
+
+# }}}
+
+
 # {{{ lazy expression generation
 
 class CExpression(object):
@@ -963,6 +1185,10 @@ class CASTBuilder(ASTBuilderBase):
 
     # }}}
 
+    def minimize_guards(self, codegen_state, node):
+        minimizer = GuardMinimizer(codegen_state.kernel)
+        return minimizer(node), minimizer.n_eliminated
+
     def process_ast(self, node):
         sc = ASTSubscriptCollector()
         sc(node)
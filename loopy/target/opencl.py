@@ -165,6 +165,12 @@ VECTOR_LITERAL_FUNCS = dict(
         )
 
 
+_CL_SUBGROUP_FUNCTIONS = frozenset(
+        "sub_group_%s_%s" % (kind, op)
+        for kind in ["reduce", "scan_inclusive", "scan_exclusive"]
+        for op in ["add", "min", "max"])
+
+
 def opencl_function_mangler(kernel, name, arg_dtypes):
     if not isinstance(name, str):
         return None
@@ -181,6 +187,13 @@ def opencl_function_mangler(kernel, name, arg_dtypes):
                     result_dtypes=(result_dtype,),
                     arg_dtypes=2*(result_dtype,))
 
+    if name in _CL_SUBGROUP_FUNCTIONS and len(arg_dtypes) == 1:
+        result_dtype, = arg_dtypes
+        return CallMangleInfo(
+                target_name=name,
+                result_dtypes=(result_dtype,),
+                arg_dtypes=(result_dtype,))
+
     if name == "dot":
         scalar_dtype, offset, field_name = arg_dtypes[0].numpy_dtype.fields["s0"]
         return CallMangleInfo(
@@ -277,6 +290,14 @@ def opencl_preamble_generator(preamble_info):
             #pragma OPENCL EXTENSION cl_khr_int64_base_atomics : enable
             """)
 
+    if any(func.name in _CL_SUBGROUP_FUNCTIONS
+            for func in preamble_info.seen_functions):
+        yield ("00_enable_subgroups", """
+            #ifdef cl_khr_subgroups
+            #pragma OPENCL EXTENSION cl_khr_subgroups : enable
+            #endif
+            """)
+
     from loopy.tools import remove_common_indentation
     kernel = preamble_info.kernel
     yield ("00_declare_gid_lid",
@@ -307,12 +328,22 @@ class OpenCLTarget(CTarget):
     """A target for the OpenCL C heterogeneous compute programming language.
     """
 
-    def __init__(self, atomics_flavor=None):
+    hash_fields = CTarget.hash_fields + ("subgroup_size",)
+    comparison_fields = CTarget.comparison_fields + ("subgroup_size",)
+
+    def __init__(self, atomics_flavor=None, subgroup_size=None):
         """
         :arg atomics_flavor: one of ``"cl1"`` (C11-style atomics from OpenCL 2.0),
             ``"cl1"`` (OpenCL 1.1 atomics, using bit-for-bit compare-and-swap
             for floating point), ``"cl1-exch"`` (OpenCL 1.1 atomics, using
             double-exchange for floating point--not yet supported).
+        :arg subgroup_size: if not *None*, the (power of two) number of work
+            items in a sub-group on the targeted device. Sum, min and max
+            reductions and scans over ``l.0``-tagged inames then use
+            sub-group collective functions (from ``cl_khr_subgroups``)
+            instead of the last levels of the reduction tree, saving the
+            barriers between them. The device must actually use sub-groups
+            of this size.
         """
         super(OpenCLTarget, self).__init__()
 
@@ -322,11 +353,20 @@ class OpenCLTarget(CTarget):
         if atomics_flavor not in ["cl1", "cl2"]:
             raise ValueError("unsupported atomics flavor: %s" % atomics_flavor)
 
+        if subgroup_size is not None and (
+                subgroup_size < 1 or subgroup_size & (subgroup_size - 1)):
+            raise ValueError("subgroup_size must be a power of two, got: %s"
+                    % subgroup_size)
+
         self.atomics_flavor = atomics_flavor
+        self.subgroup_size = subgroup_size
 
     def split_kernel_at_global_barriers(self):
         return True
 
+    def get_subgroup_size(self):
+        return self.subgroup_size
+
     def get_device_ast_builder(self):
         return OpenCLCASTBuilder(self)
 
@@ -288,17 +288,18 @@ class PyOpenCLTarget(OpenCLTarget):
     host_program_name_suffix = ""
 
     def __init__(self, device=None, pyopencl_module_name="_lpy_cl",
-            atomics_flavor=None):
+            atomics_flavor=None, subgroup_size=None):
         # This ensures the dtype registry is populated.
         import pyopencl.tools  # noqa
 
         super(PyOpenCLTarget, self).__init__(
-                atomics_flavor=atomics_flavor)
+                atomics_flavor=atomics_flavor,
+                subgroup_size=subgroup_size)
 
         self.device = device
         self.pyopencl_module_name = pyopencl_module_name
 
-    comparison_fields = ["device"]
+    comparison_fields = ["device", "subgroup_size"]
 
     def update_persistent_hash(self, key_hash, key_builder):
         super(PyOpenCLTarget, self).update_persistent_hash(key_hash, key_builder)
@@ -314,12 +315,14 @@ class PyOpenCLTarget(OpenCLTarget):
                 "atomics_flavor": self.atomics_flavor,
                 "fortran_abi": self.fortran_abi,
                 "pyopencl_module_name": self.pyopencl_module_name,
+                "subgroup_size": self.subgroup_size,
                 }
 
     def __setstate__(self, state):
         self.atomics_flavor = state["atomics_flavor"]
         self.fortran_abi = state["fortran_abi"]
         self.pyopencl_module_name = state["pyopencl_module_name"]
+        self.subgroup_size = state.get("subgroup_size")
 
         dev_id = state["device_id"]
         if dev_id is None:
@@ -606,13 +609,17 @@ class PyOpenCLPythonASTBuilder(PythonASTBuilderBase):
 
     # {{{ code generation guts
 
-    def get_function_definition(self, codegen_state, codegen_result,
-            schedule_index, function_decl, function_body):
+    def _get_host_program_arg_names(self, codegen_state):
         from loopy.kernel.data import TemporaryVariable
-        args = (
+        return (
                 ["_lpy_cl_kernels", "queue"]
                 + [idi.name for idi in codegen_state.implemented_data_info
-                    if not issubclass(idi.arg_class, TemporaryVariable)]
+                    if not issubclass(idi.arg_class, TemporaryVariable)])
+
+    def get_function_definition(self, codegen_state, codegen_result,
+            schedule_index, function_decl, function_body):
+        args = (
+                self._get_host_program_arg_names(codegen_state)
                 + ["wait_for=None", "allocator=None"])
 
         from genpy import (For, Function, Suite, Import, ImportAs, Return,
@@ -648,6 +655,30 @@ class PyOpenCLPythonASTBuilder(PythonASTBuilderBase):
         # no such thing in Python
         return None
 
+    @property
+    def can_implement_version_dispatch(self):
+        return True
+
+    def get_version_dispatch(self, codegen_state, versions):
+        arg_names = self._get_host_program_arg_names(codegen_state)
+        call_args = ", ".join(
+                arg_names + ["wait_for=wait_for", "allocator=allocator"])
+
+        from genpy import Function, Suite, If, Return
+        body = []
+        for condition_str, program_name in versions:
+            call = Return("%s(%s)" % (program_name, call_args))
+            if condition_str is None:
+                body.append(call)
+                break
+
+            body.append(If(condition_str, call))
+
+        return Function(
+                codegen_state.gen_program_name,
+                arg_names + ["wait_for=None", "allocator=None"],
+                Suite(body))
+
     def get_temporary_decls(self, codegen_state, schedule_state):
         from genpy import Assign, Comment, Line
 
@@ -0,0 +1,568 @@
+from __future__ import division, absolute_import
+
+__copyright__ = "Copyright (C) 2018 Andreas Kloeckner"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+import six
+import numpy as np
+
+import islpy as isl
+from islpy import dim_type
+import pymbolic.primitives as p
+
+from loopy.diagnostic import LoopyError
+from loopy.kernel.data import (
+        GroupIndexTag, LocalIndexTag, HardwareConcurrentTag,
+        TemporaryVariable, temp_var_scope)
+from loopy.kernel.instruction import (
+        Assignment, BarrierInstruction, AtomicInit, AtomicUpdate)
+from loopy.symbolic import Reduction
+
+__doc__ = """
+.. currentmodule:: loopy
+
+.. autofunction:: estimate_update_contention
+
+.. autofunction:: make_update_atomic
+"""
+
+
+# {{{ helpers
+
+def _get_target_variable(kernel, insn):
+    if not isinstance(insn, Assignment):
+        raise LoopyError("instruction '%s' is not an assignment" % insn.id)
+
+    var_name, = insn.assignee_var_names()
+
+    if var_name in kernel.arg_dict:
+        var = kernel.arg_dict[var_name]
+    elif var_name in kernel.temporary_variables:
+        var = kernel.temporary_variables[var_name]
+        if var.scope != temp_var_scope.GLOBAL:
+            raise LoopyError("temporary '%s' assigned in '%s' is not in "
+                    "global memory" % (var_name, insn.id))
+    else:
+        raise LoopyError("'%s' assigned in '%s' is neither an argument "
+                "nor a temporary" % (var_name, insn.id))
+
+    from loopy.kernel.data import auto
+    if var.dtype is None or var.dtype is auto:
+        raise LoopyError("the type of '%s' must be known to make its "
+                "updates atomic" % var_name)
+
+    return var
+
+
+def _with_atomic_dtype(kernel, var):
+    from loopy.types import to_loopy_type
+    new_var = var.copy(dtype=to_loopy_type(
+        var.dtype, for_atomic=True, target=kernel.target))
+
+    if var.name in kernel.temporary_variables:
+        new_temps = kernel.temporary_variables.copy()
+        new_temps[var.name] = new_var
+        return kernel.copy(temporary_variables=new_temps)
+    else:
+        return kernel.copy(args=[
+            new_var if arg.name == var.name else arg
+            for arg in kernel.args])
+
+
+def _get_update_operation(expr, assignee):
+    """Return the :class:`loopy.library.reduction.ReductionOperation` with
+    which *expr* combines *assignee* with the rest of *expr*, or *None* if
+    *expr* is not of such a form.
+    """
+    from loopy.library.reduction import parse_reduction_op
+
+    if isinstance(expr, p.Sum) and assignee in expr.children:
+        return parse_reduction_op("sum")
+    if isinstance(expr, p.Product) and assignee in expr.children:
+        return parse_reduction_op("product")
+    if (isinstance(expr, p.Call)
+            and isinstance(expr.function, p.Variable)
+            and expr.function.name in ["max", "min"]
+            and len(expr.parameters) == 2
+            and assignee in expr.parameters):
+        return parse_reduction_op(expr.function.name)
+
+    return None
+
+
+def _get_hw_axis(tag):
+    if isinstance(tag, GroupIndexTag):
+        return ("g", tag.axis)
+    if isinstance(tag, LocalIndexTag):
+        return ("l", tag.axis)
+    return None
+
+
+class _KernelExtender(object):
+    """Collects the instructions, domains, iname tags and temporaries
+    added by a transformation in this module.
+    """
+
+    def __init__(self, kernel):
+        self.kernel = kernel
+        self.var_name_gen = kernel.get_var_name_generator()
+        self.insn_id_gen = kernel.get_instruction_id_generator()
+        self.domains = list(kernel.domains)
+        self.iname_to_tag = kernel.iname_to_tag.copy()
+        self.temporary_variables = kernel.temporary_variables.copy()
+
+    def add_domain(self, based_on, constraints, tags):
+        inames = [self.var_name_gen(based_on=name) for name in based_on]
+        names = dict(zip(based_on, inames))
+
+        self.domains.append(isl.BasicSet(
+            "{ [%s]: %s }" % (", ".join(inames), constraints % names)))
+        for name, tag in six.iteritems(tags):
+            if tag is not None:
+                self.iname_to_tag[names[name]] = tag
+
+        return inames
+
+    def get_lane_inames(self, within_inames, based_on):
+        """Return inames of extent one that restrict an instruction within
+        *within_inames* to the first work item along every hardware axis
+        that the kernel uses but that *within_inames* does not cover.
+        Without them, the instruction would be executed once per work item
+        along that axis.
+        """
+        used_axes = {}
+        for tag in six.itervalues(self.kernel.iname_to_tag):
+            axis = _get_hw_axis(tag)
+            if axis is not None:
+                used_axes[axis] = tag
+
+        covered_axes = set(
+                _get_hw_axis(self.iname_to_tag.get(iname))
+                for iname in within_inames)
+
+        result = []
+        for axis, tag in sorted(six.iteritems(used_axes)):
+            if axis in covered_axes:
+                continue
+
+            name = "%s_lane_%s%d" % ((based_on,) + axis)
+            iname, = self.add_domain(
+                    [name], "0 <= %%(%s)s < 1" % name, {name: tag})
+            result.append(iname)
+
+        return frozenset(result)
+
+    def finish(self, instructions, **kwargs):
+        return self.kernel.copy(
+                instructions=instructions,
+                domains=self.domains,
+                iname_to_tag=self.iname_to_tag,
+                temporary_variables=self.temporary_variables,
+                **kwargs)
+
+# }}}
+
+
+# {{{ contention estimate
+
+def _evaluate_count(kernel, count, parameters):
+    try:
+        return count.eval_with_dict(parameters)
+    except Exception:
+        raise LoopyError("unable to evaluate access count--are values for "
+                "all kernel parameters given in 'parameters'?")
+
+
+def estimate_update_contention(kernel, insn_id, parameters=None):
+    """Estimate how many updates by the assignment *insn_id* target the same
+    element of its assignee, on average. The number of updates is that of
+    points in the domain of *insn_id*, including the inames of a reduction
+    on its right-hand side, and the number of distinct elements is obtained
+    from the access footprint of the assignee. If that footprint cannot be
+    determined (e.g. because of a data-dependent index as in a histogram),
+    the size of the assigned array is used instead.
+
+    :arg parameters: a :class:`dict` of values for the kernel's parameters,
+        needed if the counts depend on them.
+    :returns: a :class:`float`.
+    """
+    if parameters is None:
+        parameters = {}
+
+    insn = kernel.id_to_insn[insn_id]
+    var = _get_target_variable(kernel, insn)
+
+    inames = kernel.insn_inames(insn)
+    if isinstance(insn.expression, Reduction):
+        inames = inames | frozenset(insn.expression.inames)
+
+    domain = (kernel.get_inames_domain(inames)
+            .project_out_except(inames, [dim_type.set]))
+
+    from loopy.statistics import AccessFootprintGatherer, count
+    nupdates = _evaluate_count(kernel, count(kernel, domain), parameters)
+
+    footprint = AccessFootprintGatherer(
+            kernel, domain, ignore_uncountable=True)(insn.assignee).get(
+                    var.name)
+
+    if footprint is not None:
+        nlocations = _evaluate_count(
+                kernel, count(kernel, footprint), parameters)
+    else:
+        if var.shape is None:
+            raise LoopyError("unable to estimate contention in '%s': "
+                    "footprint of '%s' is unknown and so is its shape"
+                    % (insn_id, var.name))
+
+        from pymbolic import evaluate
+        nlocations = 1
+        for length in var.shape:
+            nlocations *= evaluate(length, parameters)
+
+    return nupdates / max(nlocations, 1)
+
+# }}}
+
+
+# {{{ lower reductions
+
+def _make_reduction_atomic(kernel, insn, var, privatize):
+    red = insn.expression
+    if red.is_tuple_typed:
+        raise LoopyError("'%s': only reductions with a single result can "
+                "be made atomic" % insn.id)
+
+    group_inames = frozenset(
+            iname for iname in red.inames
+            if isinstance(kernel.iname_to_tag.get(iname), GroupIndexTag))
+    inner_inames = tuple(
+            iname for iname in red.inames
+            if iname not in group_inames)
+
+    if not group_inames:
+        raise LoopyError("reduction in '%s' is not over any group-parallel "
+                "inames, so no atomics are needed" % insn.id)
+
+    outer_seq_inames = [
+            iname for iname in kernel.insn_inames(insn)
+            if not isinstance(kernel.iname_to_tag.get(iname),
+                HardwareConcurrentTag)]
+    if outer_seq_inames:
+        raise LoopyError("'%s': the result of the reduction needs to be "
+                "initialized ahead of a global barrier, which cannot be placed "
+                "inside the loop(s) over '%s'"
+                % (insn.id, ", ".join(sorted(outer_seq_inames))))
+
+    if privatize is None:
+        privatize = bool(inner_inames)
+
+    ext = _KernelExtender(kernel)
+    dtype = var.dtype
+    from loopy.types import NumpyType
+    value_dtype = NumpyType(dtype.numpy_dtype, target=kernel.target)
+
+    init_id = ext.insn_id_gen("%s_init" % insn.id)
+    init_insn = Assignment(
+            id=init_id,
+            assignee=insn.assignee,
+            expression=red.operation.neutral_element(value_dtype),
+            within_inames=(
+                insn.within_inames
+                | ext.get_lane_inames(insn.within_inames, var.name)),
+            depends_on=insn.depends_on,
+            predicates=insn.predicates,
+            atomicity=(AtomicInit(var.name),))
+
+    barrier_id = ext.insn_id_gen("%s_gbarrier" % insn.id)
+    barrier_insn = BarrierInstruction(
+            id=barrier_id,
+            depends_on=frozenset([init_id]),
+            synchronization_kind="global",
+            mem_kind="global")
+
+    new_insns = [init_insn, barrier_insn]
+
+    if privatize and inner_inames:
+        partial_name = ext.var_name_gen("%s_partial" % var.name)
+        ext.temporary_variables[partial_name] = TemporaryVariable(
+                name=partial_name,
+                shape=(),
+                dtype=value_dtype,
+                scope=temp_var_scope.PRIVATE)
+
+        partial_id = ext.insn_id_gen("%s_partial" % insn.id)
+        new_insns.append(Assignment(
+                id=partial_id,
+                assignee=p.Variable(partial_name),
+                expression=Reduction(
+                    red.operation, inner_inames, red.expr,
+                    allow_simultaneous=red.allow_simultaneous),
+                within_inames=insn.within_inames | group_inames,
+                depends_on=frozenset([barrier_id]),
+                predicates=insn.predicates))
+
+        update_within_inames = insn.within_inames | group_inames
+        update_expr = red.operation(
+                value_dtype, insn.assignee, p.Variable(partial_name))
+        update_depends_on = frozenset([partial_id])
+
+    else:
+        update_within_inames = insn.within_inames | frozenset(red.inames)
+        update_expr = red.operation(value_dtype, insn.assignee, red.expr)
+        update_depends_on = frozenset([barrier_id])
+
+    new_insns.append(insn.copy(
+            expression=update_expr,
+            within_inames=(
+                update_within_inames
+                | ext.get_lane_inames(update_within_inames, var.name)),
+            depends_on=update_depends_on,
+            atomicity=(AtomicUpdate(var.name),)))
+
+    return ext.finish([
+        new_insn
+        for old_insn in kernel.instructions
+        for new_insn in (
+            new_insns if old_insn.id == insn.id else [old_insn])])
+
+# }}}
+
+
+# {{{ lower in-place updates
+
+def _get_privatization_obstacle(kernel, insn, var, operation,
+        local_mem_bytes):
+    if operation is None:
+        return ("its right-hand side does not combine '%s' with a sum, "
+                "product, max or min" % var.name)
+
+    if var.shape is None or len(var.shape) != 1:
+        return "'%s' is not one-dimensional" % var.name
+
+    size, = var.shape
+    if not isinstance(size, (int, np.integer)):
+        return "the length of '%s' is not a constant" % var.name
+
+    if size * var.dtype.numpy_dtype.itemsize > local_mem_bytes:
+        return ("'%s' does not fit into %d bytes of local memory"
+                % (var.name, local_mem_bytes))
+
+    if not any(isinstance(kernel.iname_to_tag.get(iname), LocalIndexTag)
+            for iname in kernel.insn_inames(insn)):
+        return "it is not inside any local-parallel loop"
+
+    return None
+
+
+def _make_update_atomic(kernel, insn, var, privatize, local_mem_bytes):
+    if var.name not in insn.read_dependency_names():
+        raise LoopyError("'%s' neither is a reduction nor updates '%s' "
+                "in place" % (insn.id, var.name))
+
+    operation = _get_update_operation(insn.expression, insn.assignee)
+
+    obstacle = _get_privatization_obstacle(
+            kernel, insn, var, operation, local_mem_bytes)
+    if privatize is None:
+        privatize = obstacle is None
+    elif privatize and obstacle is not None:
+        raise LoopyError("cannot privatize updates in '%s': %s"
+                % (insn.id, obstacle))
+
+    if not privatize:
+        return kernel.copy(instructions=[
+            other_insn.copy(atomicity=(AtomicUpdate(var.name),))
+            if other_insn.id == insn.id
+            else other_insn
+            for other_insn in kernel.instructions])
+
+    # {{{ privatize into local memory
+
+    ext = _KernelExtender(kernel)
+    size, = var.shape
+
+    from loopy.types import NumpyType, to_loopy_type
+    value_dtype = NumpyType(var.dtype.numpy_dtype, target=kernel.target)
+
+    priv_name = ext.var_name_gen("%s_priv" % var.name)
+    ext.temporary_variables[priv_name] = TemporaryVariable(
+            name=priv_name,
+            shape=(size,),
+            dtype=to_loopy_type(
+                value_dtype, for_atomic=True, target=kernel.target),
+            scope=temp_var_scope.LOCAL)
+
+    insn_inames = kernel.insn_inames(insn)
+    group_inames = frozenset(
+            iname for iname in insn_inames
+            if isinstance(kernel.iname_to_tag.get(iname), GroupIndexTag))
+
+    # Initialization and flush are spread across the lowest-numbered local
+    # axis of the update.
+    lane_iname = min(
+            (iname for iname in insn_inames
+                if isinstance(kernel.iname_to_tag.get(iname), LocalIndexTag)),
+            key=lambda iname: kernel.iname_to_tag[iname].axis)
+    lane_tag = kernel.iname_to_tag[lane_iname]
+    try:
+        nlanes = int(kernel.get_constant_iname_length(lane_iname))
+    except Exception:
+        nlanes = 1
+        lane_tag = None
+
+    def make_element_loop(based_on):
+        outer, inner = ext.add_domain(
+                [based_on + "_outer", based_on + "_inner"],
+                "0 <= %%(%s_inner)s < %d and 0 <= %%(%s_outer)s "
+                "and %d*%%(%s_outer)s + %%(%s_inner)s < %d"
+                % (based_on, nlanes, based_on,
+                    nlanes, based_on, based_on, size),
+                {based_on + "_inner": lane_tag})
+        within_inames = group_inames | frozenset([outer, inner])
+        return (
+                p.Variable(outer)*nlanes + p.Variable(inner),
+                within_inames | ext.get_lane_inames(within_inames, priv_name))
+
+    neutral = operation.neutral_element(value_dtype)
+    priv = p.Variable(priv_name)
+
+    init_index, init_within_inames = make_element_loop(priv_name + "_init")
+    init_id = ext.insn_id_gen("%s_init" % priv_name)
+    init_insn = Assignment(
+            id=init_id,
+            assignee=priv.index(init_index),
+            expression=neutral,
+            within_inames=init_within_inames,
+            depends_on=insn.depends_on,
+            atomicity=(AtomicInit(priv_name),))
+
+    from loopy.symbolic import SubstitutionMapper
+    from pymbolic.mapper.substitutor import make_subst_func
+    to_priv = SubstitutionMapper(make_subst_func({var.name: priv}))
+
+    update_id = ext.insn_id_gen("%s_private" % insn.id)
+    update_insn = insn.copy(
+            id=update_id,
+            assignee=to_priv(insn.assignee),
+            expression=to_priv(insn.expression),
+            depends_on=insn.depends_on | frozenset([init_id]),
+            atomicity=(AtomicUpdate(priv_name),))
+
+    # Untouched entries still hold the neutral element, there is no need to
+    # send them to global memory.
+    flush_index, flush_within_inames = make_element_loop(priv_name + "_flush")
+    flush_insn = Assignment(
+            id=insn.id,
+            assignee=p.Variable(var.name).index(flush_index),
+            expression=operation(
+                value_dtype,
+                p.Variable(var.name).index(flush_index),
+                priv.index(flush_index)),
+            within_inames=flush_within_inames,
+            depends_on=frozenset([update_id]),
+            predicates=frozenset([
+                p.Comparison(priv.index(flush_index), "!=", neutral)]),
+            atomicity=(AtomicUpdate(var.name),))
+
+    # }}}
+
+    new_insns = []
+    for other_insn in kernel.instructions:
+        if other_insn.id == insn.id:
+            new_insns.extend([init_insn, update_insn, flush_insn])
+        else:
+            new_insns.append(other_insn)
+
+    return ext.finish(new_insns)
+
+# }}}
+
+
+def _get_default_local_mem_bytes(kernel):
+    device = getattr(kernel.target, "device", None)
+    if device is not None:
+        return device.local_mem_size
+
+    # the minimum required of an OpenCL device
+    return 32*1024
+
+
+def make_update_atomic(kernel, insn_id, privatize=None, max_contention=None,
+        parameters=None, local_mem_bytes=None):
+    """Make the assignment *insn_id*, which many work items carry out on the
+    same elements of an array in global memory, safe by turning it into an
+    atomic update of that array. *insn_id* may be of one of two forms:
+
+    * a reduction over group-parallel inames, such as ``out[k] = sum(i,
+      a[i, k])``. The result is initialized to the neutral element of the
+      reduction ahead of a global barrier, after which each iteration
+      atomically combines its contribution with it. With privatization
+      (the default if the reduction is also over local-parallel or
+      sequential inames), the part of the reduction within a work item or
+      work group is carried out first, so that each work group issues a
+      single atomic update per element of the result.
+
+    * an in-place update such as ``hist[bin[i]] = hist[bin[i]] + 1`` or the
+      scatter-add of finite element assembly. With privatization (the
+      default if possible), the updates of a work group go to a copy of
+      the array in local memory, which is then added to the array in global
+      memory by one atomic update per element touched. This needs the array
+      to be one-dimensional, of constant length, and to fit into
+      *local_mem_bytes* (by default, the local memory size of the target's
+      device, if known).
+
+    :arg max_contention: If not *None* and *insn_id* is a reduction, the
+        number of atomic updates per element of the result after the
+        transformation is estimated by :func:`estimate_update_contention`
+        (with *parameters*). If it exceeds *max_contention*, *kernel* is
+        returned unchanged, leaving the reduction to be carried out as a tree
+        by :func:`realize_reduction`.
+    """
+    insn = kernel.id_to_insn[insn_id]
+    var = _get_target_variable(kernel, insn)
+
+    if isinstance(insn.expression, Reduction):
+        new_kernel = _make_reduction_atomic(kernel, insn, var, privatize)
+
+        if max_contention is not None:
+            contention = estimate_update_contention(
+                    new_kernel, insn_id, parameters)
+            if contention > max_contention:
+                return kernel
+
+    else:
+        if max_contention is not None:
+            raise LoopyError("'%s' is not a reduction, so there is no "
+                    "alternative to atomic updates for 'max_contention' to "
+                    "choose" % insn_id)
+
+        if local_mem_bytes is None:
+            local_mem_bytes = _get_default_local_mem_bytes(kernel)
+
+        new_kernel = _make_update_atomic(
+                kernel, insn, var, privatize, local_mem_bytes)
+
+    return _with_atomic_dtype(new_kernel, var)
+
+# vim: foldmethod=marker
@@ -31,6 +31,9 @@ from loopy.kernel.data import ImageArg
 
 from pytools import MovedFunctionDeprecationWrapper
 
+import logging
+logger = logging.getLogger(__name__)
+
 
 # {{{ convenience: add_prefetch
 
@@ -142,7 +145,8 @@ def add_prefetch(kernel, var_name, sweep_inames=[], dim_arg_names=None,
         temporary_scope=None, temporary_is_local=None,
         footprint_subscripts=None,
         fetch_bounding_box=False,
-        fetch_outer_inames=None):
+        fetch_outer_inames=None,
+        double_buffer=False, double_buffer_iname=None):
     """Prefetch all accesses to the variable *var_name*, with all accesses
     being swept through *sweep_inames*.
 
@@ -229,6 +233,13 @@ def add_prefetch(kernel, var_name, sweep_inames=[], dim_arg_names=None,
     :arg fetch_outer_inames: The inames within which the fetch
         instruction is nested. If *None*, make an educated guess.
 
+    :arg double_buffer: If *True*, fetch into two alternating buffers, issuing
+        the fetch for the next iteration of the sequential loop
+        *double_buffer_iname* before the current buffer is used. See
+        :func:`precompute`.
+    :arg double_buffer_iname: The iname along which to pipeline the fetch.
+        If *None*, make an educated guess.
+
     This function internally uses :func:`extract_subst` and :func:`precompute`.
     """
 
@@ -323,7 +334,9 @@ def add_prefetch(kernel, var_name, sweep_inames=[], dim_arg_names=None,
             fetch_bounding_box=fetch_bounding_box,
             temporary_name=temporary_name,
             temporary_scope=temporary_scope, temporary_is_local=temporary_is_local,
-            precompute_outer_inames=fetch_outer_inames)
+            precompute_outer_inames=fetch_outer_inames,
+            double_buffer=double_buffer,
+            double_buffer_iname=double_buffer_iname)
 
     # {{{ remove inames that were temporarily added by slice sweeps
 
@@ -562,6 +575,213 @@ def alias_temporaries(knl, names, base_name_prefix=None,
 # }}}
 
 
+# {{{ alias temporaries by liveness
+
+def _get_temporary_lifetimes(kernel, temp_names):
+    """Return a :class:`dict` mapping each name in *temp_names* that is
+    accessed in the schedule of *kernel* to a tuple ``(start, end)`` of
+    schedule indices between which (inclusively) the storage of the temporary
+    may hold a value that is still to be read.
+    """
+    from loopy.transform.save import LivenessAnalysis
+    from loopy.schedule import RunInstruction
+
+    nsched = len(kernel.schedule)
+
+    accessed = dict((idx, set()) for idx in range(nsched))
+    for sched_idx, sched_item in enumerate(kernel.schedule):
+        if isinstance(sched_item, RunInstruction):
+            insn = kernel.id_to_insn[sched_item.insn_id]
+            accessed[sched_idx] = insn.dependency_names() & temp_names
+
+    class StorageLivenessAnalysis(LivenessAnalysis):
+        # Unlike for saving and reloading, a write to an array does not make
+        # its previous contents live. Only reads do.
+
+        def get_gen_and_kill_sets(self):
+            gen = dict((idx, set()) for idx in range(nsched))
+            kill = dict((idx, set()) for idx in range(nsched))
+
+            for sched_idx, sched_item in enumerate(self.schedule):
+                if not isinstance(sched_item, RunInstruction):
+                    continue
+                insn = self.kernel.id_to_insn[sched_item.insn_id]
+                for var in insn.assignee_var_names():
+                    if (var in temp_names
+                            and not insn.predicates
+                            and not self.kernel.temporary_variables[var].shape):
+                        kill[sched_idx].add(var)
+                gen[sched_idx].update(insn.read_dependency_names() & temp_names)
+
+            return gen, kill
+
+    liveness = StorageLivenessAnalysis(kernel)
+    successors = liveness.get_successor_relation()
+
+    # Values can only be live once something has been stored, so intersect
+    # with the temporaries that may have been accessed before each item.
+    accessed_before = dict((idx, set()) for idx in range(nsched))
+    changed = True
+    while changed:
+        changed = False
+        for idx in range(nsched):
+            accessed_after = accessed_before[idx] | accessed[idx]
+            for succ in successors[idx]:
+                if not accessed_after <= accessed_before[succ]:
+                    accessed_before[succ].update(accessed_after)
+                    changed = True
+
+    result = {}
+    for idx in range(nsched):
+        for name in accessed[idx] | (
+                accessed_before[idx] & liveness[idx].live_in):
+            start, end = result.get(name, (idx, idx))
+            result[name] = (min(start, idx), max(end, idx))
+
+    return result
+
+
+def alias_temporaries_by_liveness(kernel, scopes=None):
+    """Let temporaries whose values are never needed at the same time share
+    storage, as with :func:`alias_temporaries`, but found automatically
+    from a liveness analysis over the schedule of *kernel*, which must be
+    scheduled.
+
+    Each temporary is live from its first access to the last point in the
+    schedule at which a value stored in it may still be read. Temporaries
+    with disjoint live ranges are packed into shared base storage by greedy
+    coloring of the resulting interval graph, preferring the storage whose
+    size grows least. Local temporaries only share storage if a barrier
+    separates their uses, and their live ranges extend over any loop in which
+    they are used. The base storage is aligned for the most demanding of its
+    temporaries.
+
+    The local memory use per work group before and after is logged at the
+    ``info`` level.
+
+    :arg scopes: The scopes (from :class:`loopy.temp_var_scope`) of
+        the temporaries to consider. By default, only local temporaries are
+        aliased. Private temporaries may be included, but accessing them
+        through shared storage can keep a compiler from placing them in
+        registers.
+
+    :returns: The resulting kernel, still scheduled.
+    """
+    from loopy.kernel import kernel_state
+    if kernel.state != kernel_state.SCHEDULED:
+        raise LoopyError("kernel must be scheduled to alias temporaries "
+                "by liveness")
+
+    from loopy.kernel.data import temp_var_scope
+    from numbers import Integral
+    if scopes is None:
+        scopes = (temp_var_scope.LOCAL,)
+
+    candidates = set(
+            tv.name for tv in six.itervalues(kernel.temporary_variables)
+            if tv.scope in scopes
+            and tv.base_storage is None
+            and tv.initializer is None
+            and isinstance(tv.nbytes, Integral))
+
+    lifetimes = _get_temporary_lifetimes(kernel, candidates)
+
+    # {{{ extend lifetimes of local temporaries over the loops they are used in
+
+    from loopy.schedule import EnterLoop, Barrier, CallKernel, ReturnFromKernel
+    from loopy.schedule.tools import get_block_boundaries
+    block_bounds = get_block_boundaries(kernel.schedule)
+
+    outermost_loop = {}
+    loop_stack = []
+    for sched_idx, sched_item in enumerate(kernel.schedule):
+        if isinstance(sched_item, EnterLoop):
+            loop_stack.append(sched_idx)
+        elif sched_idx in block_bounds and loop_stack and (
+                block_bounds[sched_idx] == loop_stack[-1]):
+            loop_stack.pop()
+
+        if loop_stack:
+            outermost_loop[sched_idx] = (
+                    loop_stack[0], block_bounds[loop_stack[0]])
+
+    for name, (start, end) in list(six.iteritems(lifetimes)):
+        if kernel.temporary_variables[name].scope != temp_var_scope.LOCAL:
+            continue
+        start = min(outermost_loop.get(start, (start, end))[0], start)
+        end = max(outermost_loop.get(end, (start, end))[1], end)
+        lifetimes[name] = (start, end)
+
+    sync_indices = [
+            sched_idx
+            for sched_idx, sched_item in enumerate(kernel.schedule)
+            if isinstance(sched_item, (CallKernel, ReturnFromKernel))
+            or (isinstance(sched_item, Barrier)
+                and sched_item.synchronization_kind in ["local", "global"])]
+
+    def is_synchronized_between(first, last):
+        from bisect import bisect_right
+        pos = bisect_right(sync_indices, first)
+        return pos < len(sync_indices) and sync_indices[pos] < last
+
+    # }}}
+
+    # {{{ greedy interval coloring
+
+    storages = []
+
+    for name in sorted(lifetimes, key=lambda name: (lifetimes[name], name)):
+        tv = kernel.temporary_variables[name]
+        start, end = lifetimes[name]
+
+        best_storage = None
+        for storage in storages:
+            if storage["scope"] != tv.scope or storage["end"] >= start:
+                continue
+            if (tv.scope == temp_var_scope.LOCAL
+                    and not is_synchronized_between(storage["end"], start)):
+                continue
+
+            if best_storage is None or (
+                    (max(tv.nbytes, storage["nbytes"]) - storage["nbytes"],
+                        storage["nbytes"])
+                    < (max(tv.nbytes, best_storage["nbytes"])
+                        - best_storage["nbytes"],
+                        best_storage["nbytes"])):
+                best_storage = storage
+
+        if best_storage is None:
+            best_storage = {"scope": tv.scope, "nbytes": 0, "names": []}
+            storages.append(best_storage)
+
+        best_storage["names"].append(name)
+        best_storage["end"] = end
+        best_storage["nbytes"] = max(best_storage["nbytes"], tv.nbytes)
+
+    # }}}
+
+    vng = kernel.get_var_name_generator()
+    new_temporary_variables = kernel.temporary_variables.copy()
+    for storage in storages:
+        if len(storage["names"]) < 2:
+            continue
+
+        base_name = vng("temp_storage")
+        for name in storage["names"]:
+            new_temporary_variables[name] = (
+                    new_temporary_variables[name].copy(base_storage=base_name))
+
+    new_kernel = kernel.copy(temporary_variables=new_temporary_variables)
+
+    logger.info("%s: local memory use per work group: %s bytes before, "
+            "%s bytes after aliasing temporaries by liveness"
+            % (kernel.name, kernel.local_mem_use(), new_kernel.local_mem_use()))
+
+    return new_kernel
+
+# }}}
+
+
 # {{{ set argument order
 
 def set_argument_order(kernel, arg_names):
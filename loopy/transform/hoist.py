@@ -0,0 +1,463 @@
+from __future__ import division, absolute_import
+
+__copyright__ = "Copyright (C) 2018 Andreas Kloeckner"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+import six
+
+import islpy as isl
+import pymbolic.primitives as p
+
+from loopy.symbolic import (
+        IdentityMapper, LinearSubscript, TypeCast, TypeAnnotation,
+        SubstitutionRuleExpander, get_dependencies)
+from loopy.kernel.instruction import (
+        MultiAssignmentBase, Assignment, CallInstruction)
+
+__doc__ = """
+.. currentmodule:: loopy
+
+.. autofunction:: hoist_invariants
+"""
+
+
+# {{{ helpers
+
+def _get_reduction_inames(expr):
+    result = set()
+
+    def map_reduction(expr, rec):
+        rec(expr.expr)
+        result.update(expr.inames)
+
+    from loopy.symbolic import ReductionCallbackMapper
+    ReductionCallbackMapper(map_reduction)(expr)
+
+    return result
+
+
+def _is_trivial(expr):
+    """Return *True* if *expr* is no cheaper to read from a temporary than
+    to evaluate in place.
+    """
+    if p.is_constant(expr):
+        return True
+
+    if isinstance(expr, (p.Variable, p.Subscript, p.Lookup, LinearSubscript)):
+        return True
+
+    if isinstance(expr, (TypeCast, TypeAnnotation)):
+        return _is_trivial(expr.child)
+
+    if isinstance(expr, (p.Sum, p.Product)):
+        nonconst_children = [
+                child for child in expr.children
+                if not p.is_constant(child)]
+        return (
+                len(nonconst_children) <= 1
+                and all(_is_trivial(child) for child in nonconst_children))
+
+    return False
+
+
+class _InvariantHoistingMapper(IdentityMapper):
+    """Replaces maximal subexpressions for which *get_outer_inames* returns
+    a proper subset of the instruction's inames by the value returned from
+    *hoist*.
+    """
+
+    def __init__(self, within_inames, get_outer_inames, hoist):
+        self.within_inames = within_inames
+        self.get_outer_inames = get_outer_inames
+        self.hoist = hoist
+
+    def __call__(self, expr, *args):
+        if not _is_trivial(expr):
+            outer_inames = self.get_outer_inames(expr)
+            if outer_inames != self.within_inames:
+                return self.hoist(expr, outer_inames)
+
+        return super(_InvariantHoistingMapper, self).__call__(expr, *args)
+
+    rec = __call__
+
+    def _map_commutative(self, expr, flatten):
+        child_outer_inames = [
+                None if p.is_constant(child) else self.get_outer_inames(child)
+                for child in expr.children]
+
+        # Group as many children as possible that are invariant with respect
+        # to the same loops.
+        best_group_inames = None
+        best_group_size = 1
+        for group_inames in set(child_outer_inames):
+            if group_inames is None or group_inames == self.within_inames:
+                continue
+
+            group_size = sum(
+                    1 for outer_inames in child_outer_inames
+                    if outer_inames is not None and outer_inames <= group_inames)
+            if (group_size > best_group_size
+                    or (group_size == best_group_size
+                        and best_group_inames is not None
+                        and len(group_inames) < len(best_group_inames))):
+                best_group_inames = group_inames
+                best_group_size = group_size
+
+        invariant_children = []
+        other_children = []
+        for child, outer_inames in zip(expr.children, child_outer_inames):
+            if (best_group_inames is not None
+                    and outer_inames is not None
+                    and outer_inames <= best_group_inames):
+                invariant_children.append(child)
+            else:
+                other_children.append(child)
+
+        if invariant_children:
+            invariant_part = flatten(tuple(invariant_children))
+            outer_inames = self.get_outer_inames(invariant_part)
+            if outer_inames != self.within_inames:
+                return flatten(
+                        (self.hoist(invariant_part, outer_inames),)
+                        + tuple(self.rec(child) for child in other_children))
+
+        return flatten(tuple(self.rec(child) for child in expr.children))
+
+    def map_sum(self, expr):
+        return self._map_commutative(expr, p.flattened_sum)
+
+    def map_product(self, expr):
+        return self._map_commutative(expr, p.flattened_product)
+
+    # Index expressions are cheap and need to stay visible to access
+    # analysis, so they are never split up.
+
+    def map_subscript(self, expr):
+        return expr
+
+    map_linear_subscript = map_subscript
+
+    # Reductions may only be hoisted as a whole. Conditional expressions guard
+    # their branches, so nothing is moved out from under them.
+
+    def map_reduction(self, expr):
+        return expr
+
+    def map_if(self, expr):
+        return expr
+
+    map_if_positive = map_if
+    map_logical_and = map_if
+    map_logical_or = map_if
+
+# }}}
+
+
+# {{{ hoist_invariants
+
+def hoist_invariants(kernel, within=None, inames=None):
+    """Move loop-invariant computation out of loops in which it does not vary.
+
+    For each instruction matching *within*, determine the inames that the
+    instruction (or a subexpression of its right-hand side) actually depends
+    on. An instruction that is independent of some of its inames is moved out
+    of those loops in its entirety. Otherwise, maximal invariant
+    subexpressions (including invariant factors and terms of products and
+    sums) are computed into new private scalar temporaries by new instructions
+    at the outermost legal loop level, and the original expression reads the
+    temporary instead. The process is repeated on the newly created
+    instructions, so that invariants nested several levels deep end up at the
+    right level.
+
+    An iname is only hoisted out of if
+
+    - it is not tagged as hardware-parallel or vectorized,
+    - none of the variables read by the hoisted expression are written
+      inside that loop and no instruction in that loop is a dependency of the
+      hoisted computation,
+    - the domains of the remaining inames do not depend on it, and
+    - all other instructions in that loop are also nested inside every
+      remaining sequential loop, so that the scheduler is forced to nest the
+      loops such that the hoisted value is computed where it is needed.
+
+    Predicates of the instruction are carried over to the instructions
+    computing hoisted values.
+
+    :arg within: an instruction match as understood by
+        :func:`loopy.match.parse_match`.
+    :arg inames: if not *None*, a list of inames (or a comma-separated
+        string) limiting which loops computation may be hoisted out of.
+    :returns: the transformed kernel.
+
+    .. note::
+
+        Hoisted expressions are evaluated even if the loops they were hoisted
+        out of have no iterations. Invariant factors and terms of products
+        and sums are regrouped, which may change round-off.
+    """
+
+    from loopy.match import parse_match
+    within = parse_match(within)
+
+    if isinstance(inames, str):
+        inames = [iname.strip() for iname in inames.split(",")]
+    if inames is not None:
+        inames = frozenset(inames)
+
+    from loopy.kernel.data import (
+            auto, HardwareConcurrentTag, VectorizeTag, ConcurrentTag,
+            TemporaryVariable, temp_var_scope)
+
+    all_inames = kernel.all_inames()
+    sequential_inames = frozenset(
+            iname for iname in all_inames
+            if not isinstance(kernel.iname_to_tag.get(iname), ConcurrentTag))
+    immovable_inames = frozenset(
+            iname for iname in all_inames
+            if isinstance(kernel.iname_to_tag.get(iname),
+                (HardwareConcurrentTag, VectorizeTag)))
+    if inames is not None:
+        immovable_inames = immovable_inames | (all_inames - inames)
+
+    domain_params = {}
+    for iname in all_inames:
+        home_domain = kernel.domains[kernel.get_home_domain_index(iname)]
+        domain_params[iname] = frozenset(
+                home_domain.get_var_names(isl.dim_type.param))
+
+    # pairs (outer, inner) of inames ordered by loop priorities
+    nested_outside_pairs = set()
+    for priority in kernel.loop_priority:
+        for i, outer_iname in enumerate(priority):
+            for inner_iname in priority[i+1:]:
+                nested_outside_pairs.add((outer_iname, inner_iname))
+
+    expander = SubstitutionRuleExpander(kernel.substitutions)
+    recursive_deps = kernel.recursive_insn_dep_map()
+    reader_map = kernel.reader_map()
+
+    id_to_insn = kernel.id_to_insn.copy()
+    insn_order = [insn.id for insn in kernel.instructions]
+    writer_map = dict(
+            (var_name, set(writer_ids))
+            for var_name, writer_ids in six.iteritems(kernel.writer_map()))
+    iname_to_insns = dict(
+            (iname, set(insn_ids))
+            for iname, insn_ids in six.iteritems(kernel.iname_to_insns()))
+
+    var_name_gen = kernel.get_var_name_generator()
+    insn_id_gen = kernel.get_instruction_id_generator()
+    new_temporary_variables = kernel.temporary_variables.copy()
+
+    def get_outer_inames(insn, var_deps, dep_ids, exclude_insn_id=None):
+        """Return the subset of *insn*'s inames that a computation reading
+        *var_deps* and depending on *dep_ids* must remain within.
+        """
+        within_inames = insn.within_inames
+        outer_inames = set((var_deps & within_inames) | immovable_inames)
+        outer_inames.intersection_update(within_inames)
+
+        while True:
+            old_outer_inames = frozenset(outer_inames)
+
+            for iname in old_outer_inames:
+                outer_inames.update(domain_params[iname] & within_inames)
+
+            read_vars = var_deps.union(*(
+                    domain_params[iname] for iname in old_outer_inames))
+
+            for iname in within_inames - old_outer_inames:
+                loop_insn_ids = iname_to_insns[iname]
+                if (any(
+                            writer_id != exclude_insn_id
+                            and writer_id in loop_insn_ids
+                            for var_name in read_vars
+                            for writer_id in writer_map.get(var_name, ()))
+                        or dep_ids & loop_insn_ids
+                        or any(
+                            not loop_insn_ids - set([insn.id])
+                            <= iname_to_insns[outer_iname]
+                            for outer_iname in old_outer_inames
+                            if outer_iname in sequential_inames)
+                        or any(
+                            (iname, outer_iname) in nested_outside_pairs
+                            for outer_iname in old_outer_inames)):
+                    outer_inames.add(iname)
+
+            if outer_inames == old_outer_inames:
+                return frozenset(outer_inames)
+
+    def get_var_deps(expr):
+        expr = expander(expr)
+        result = get_dependencies(expr)
+
+        # The values of reductions also depend on the bounds of their inames.
+        for red_iname in _get_reduction_inames(expr):
+            result = result | domain_params[red_iname]
+
+        return result
+
+    def move_insn(insn, new_within_inames):
+        for iname in insn.within_inames - new_within_inames:
+            iname_to_insns[iname].discard(insn.id)
+
+        return insn.copy(within_inames=new_within_inames)
+
+    def hoist_subexpressions(insn):
+        """Return a tuple *(insn, new_insns)*."""
+
+        pred_deps = frozenset().union(*(
+                get_var_deps(pred) for pred in insn.predicates))
+        insn_recursive_deps = recursive_deps.get(insn.id, frozenset())
+
+        new_insns = []
+
+        def get_expr_outer_inames(expr):
+            var_deps = get_var_deps(expr) | pred_deps
+            return get_outer_inames(insn, var_deps, frozenset(
+                dep_id for dep_id in insn_recursive_deps
+                if set(id_to_insn[dep_id].assignee_var_names()) & var_deps))
+
+        def hoist(expr, outer_inames):
+            var_deps = get_var_deps(expr) | pred_deps
+
+            temp_name = var_name_gen("%s_inv" % insn.id)
+            new_temporary_variables[temp_name] = TemporaryVariable(
+                    name=temp_name,
+                    dtype=auto,
+                    shape=(),
+                    scope=temp_var_scope.PRIVATE)
+
+            new_insn = Assignment(
+                    id=insn_id_gen("%s_inv" % insn.id),
+                    assignee=p.Variable(temp_name),
+                    expression=expr,
+                    within_inames=outer_inames,
+                    predicates=insn.predicates,
+                    depends_on=frozenset(
+                        dep_id for dep_id in insn_recursive_deps
+                        if set(id_to_insn[dep_id].assignee_var_names())
+                        & var_deps))
+
+            new_insns.append(new_insn)
+
+            for iname in outer_inames:
+                iname_to_insns[iname].add(new_insn.id)
+            writer_map[temp_name] = set([new_insn.id])
+
+            return p.Variable(temp_name)
+
+        mapper = _InvariantHoistingMapper(
+                insn.within_inames, get_expr_outer_inames, hoist)
+        new_expression = mapper(insn.expression)
+
+        if not new_insns:
+            return insn, new_insns
+
+        return (
+                insn.copy(
+                    expression=new_expression,
+                    depends_on=insn.depends_on | frozenset(
+                        new_insn.id for new_insn in new_insns)),
+                new_insns)
+
+    def hoist_insn(insn):
+        """Return a copy of *insn* moved out of as many loops as is legal."""
+
+        if (not isinstance(insn, Assignment)
+                or insn.atomicity
+                or insn.within_inames <= immovable_inames):
+            return insn
+
+        assignee_name = insn.assignee_name
+
+        read_deps = insn.read_dependency_names()
+        if assignee_name in read_deps:
+            # Reading the assignee means the value carries over
+            # between iterations.
+            return insn
+
+        outer_inames = get_outer_inames(
+                insn,
+                read_deps | insn.write_dependency_names(),
+                insn.depends_on,
+                exclude_insn_id=insn.id)
+
+        # Other readers of the assignee within the loops being left must
+        # already see the value written by this instruction.
+        for iname in insn.within_inames - outer_inames:
+            for reader_id in reader_map.get(assignee_name, ()):
+                if (reader_id != insn.id
+                        and reader_id in iname_to_insns[iname]
+                        and insn.id not in recursive_deps[reader_id]):
+                    outer_inames = outer_inames | frozenset([iname])
+                    break
+
+        if outer_inames == insn.within_inames:
+            return insn
+
+        return move_insn(insn, outer_inames)
+
+    worklist = [
+            insn.id for insn in kernel.instructions
+            if isinstance(insn, MultiAssignmentBase)
+            and within(kernel, insn)]
+
+    hoisted_before = {}
+
+    while worklist:
+        insn_id = worklist.pop(0)
+        insn = id_to_insn[insn_id]
+
+        if insn_id in kernel.id_to_insn:
+            insn = hoist_insn(insn)
+
+        if not isinstance(insn, (Assignment, CallInstruction)):
+            id_to_insn[insn_id] = insn
+            continue
+
+        insn, new_insns = hoist_subexpressions(insn)
+        id_to_insn[insn_id] = insn
+
+        for new_insn in new_insns:
+            id_to_insn[new_insn.id] = new_insn
+            hoisted_before.setdefault(insn_id, []).append(new_insn.id)
+            worklist.append(new_insn.id)
+
+    def add_in_order(insn_id, result):
+        for new_insn_id in hoisted_before.get(insn_id, []):
+            add_in_order(new_insn_id, result)
+        result.append(id_to_insn[insn_id])
+
+    new_insns = []
+    for insn_id in insn_order:
+        add_in_order(insn_id, new_insns)
+
+    return kernel.copy(
+            instructions=new_insns,
+            temporary_variables=new_temporary_variables)
+
+# }}}
+
+# vim: foldmethod=marker
@@ -54,6 +54,8 @@ __doc__ = """
 
 .. autofunction:: prioritize_loops
 
+.. autofunction:: prioritize_loops_by_stride
+
 .. autofunction:: rename_iname
 
 .. autofunction:: remove_unused_inames
@@ -72,6 +74,8 @@ __doc__ = """
 
 .. autofunction:: add_inames_to_insn
 
+.. autofunction:: unroll_and_jam
+
 """
 
 
@@ -112,6 +116,177 @@ def prioritize_loops(kernel, loop_priority):
 
     return kernel.copy(loop_priority=kernel.loop_priority.union([loop_priority]))
 
+
+def _can_prioritize_loop_pair(kernel, outer_iname, inner_iname):
+    """Return whether the loop over *outer_iname* may be given priority over
+    the one over *inner_iname*, i.e. whether the two loops enclose the same
+    instructions, have not been ordered by the user, and may legally be
+    interchanged.
+    """
+    iname_to_insns = kernel.iname_to_insns()
+    if (iname_to_insns.get(outer_iname)
+            != iname_to_insns.get(inner_iname)):
+        return False
+
+    for prio in kernel.loop_priority:
+        if outer_iname in prio and inner_iname in prio:
+            return False
+
+    outer_domain = kernel.domains[kernel.get_home_domain_index(outer_iname)]
+    if inner_iname in outer_domain.get_var_dict(dim_type.param):
+        return False
+
+    from loopy.kernel.tools import find_interchange_preventing_dependences
+    return not find_interchange_preventing_dependences(
+            kernel, outer_iname, inner_iname)
+
+
+def _get_access_weights(kernel, parameters):
+    """Return a :class:`dict` mapping tuples *(var_name, is_write)* to the
+    number of accesses to global array *var_name* per access expression
+    in the kernel, as counted by :func:`loopy.get_mem_access_map`. Return
+    *None* if the counts cannot be evaluated.
+    """
+    from loopy.preprocess import infer_unknown_types
+    from loopy.statistics import get_mem_access_map
+    from loopy.kernel.data import ValueArg
+
+    param_values = dict(
+            (arg.name, arg.approximately) for arg in kernel.args
+            if isinstance(arg, ValueArg) and arg.approximately is not None)
+    param_values.update(parameters or {})
+
+    try:
+        typed_kernel = infer_unknown_types(kernel, expect_completion=True)
+    except LoopyError:
+        return None
+
+    try:
+        mem_map = get_mem_access_map(typed_kernel, subgroup_size="guess")
+    except (LoopyError, NotImplementedError, RuntimeError, ValueError,
+            isl.Error):
+        # e.g. nonlinear or unsupported index expressions
+        return None
+
+    result = {}
+    for access, count in six.iteritems(mem_map.count_map):
+        if access.mtype != "global":
+            continue
+
+        if not (set(count.pwqpolynomial.space.get_var_names(
+                    dim_type.param))
+                <= set(param_values)):
+            return None
+
+        try:
+            value = count.eval_with_dict(param_values)
+        except ValueError:
+            # parameter values outside of the domain of the count
+            return None
+
+        key = (access.variable, access.direction == "store")
+        result[key] = result.get(key, 0) + value
+
+    return result
+
+
+def prioritize_loops_by_stride(kernel, inames=None, parameters=None):
+    """Add loop priorities (see :func:`prioritize_loops`) so that, among
+    loops enclosing the same instructions, those in which the dominant
+    global array accesses have unit stride are nested innermost.
+
+    For each iname, the accesses in which it has unit stride count in its
+    favor and those in which it has a stride greater than one count against
+    it, as determined by :func:`loopy.kernel.tools.get_access_iname_strides`.
+    Accesses are weighted by their number as counted by
+    :func:`loopy.get_mem_access_map`, evaluated using *parameters* and the
+    :attr:`loopy.ValueArg.approximately` values of the kernel's arguments.
+    If these do not determine the counts, all accesses are weighted equally.
+
+    A priority is only added for a pair of loops if the user has not
+    already ordered them and interchanging them is legal, see
+    :func:`loopy.kernel.tools.find_interchange_preventing_dependences`.
+    Reduction inames are not reordered.
+
+    :arg inames: an iterable of inames to consider, or, for brevity, a
+        comma-separated string. By default, all inames without an
+        implementation tag are considered.
+    :arg parameters: a :class:`dict` of values for the domain parameters of
+        *kernel*.
+
+    .. versionadded:: 2018.1
+    """
+    from pymbolic.primitives import Subscript
+    from loopy.symbolic import ArrayAccessFinder, SubstitutionRuleExpander
+    from loopy.kernel.instruction import MultiAssignmentBase
+    from loopy.kernel.tools import get_access_iname_strides
+
+    if isinstance(inames, str):
+        inames = [iname.strip() for iname in inames.split(",")]
+
+    reduction_inames = set()
+    for insn in kernel.instructions:
+        if isinstance(insn, MultiAssignmentBase):
+            reduction_inames.update(insn.reduction_inames())
+
+    if inames is None:
+        inames = [
+                iname for iname in kernel.all_inames()
+                if kernel.iname_to_tag.get(iname) is None]
+
+    inames = set(inames) - reduction_inames
+
+    # {{{ score inames
+
+    weights = _get_access_weights(kernel, parameters)
+
+    expander = SubstitutionRuleExpander(kernel.substitutions)
+    accesses = []
+    for insn in kernel.instructions:
+        if not isinstance(insn, MultiAssignmentBase):
+            continue
+
+        accesses.extend(
+                (access, False)
+                for access in ArrayAccessFinder()(expander(insn.expression)))
+        accesses.extend(
+                (assignee, True) for assignee in insn.assignees
+                if isinstance(assignee, Subscript))
+
+    nexprs = {}
+    for access, is_write in accesses:
+        key = (access.aggregate.name, is_write)
+        nexprs[key] = nexprs.get(key, 0) + 1
+
+    scores = dict((iname, 0) for iname in inames)
+    for access, is_write in accesses:
+        strides = get_access_iname_strides(kernel, access, inames)
+        if strides is None:
+            continue
+
+        key = (access.aggregate.name, is_write)
+        if weights is None:
+            weight = 1
+        else:
+            weight = weights.get(key, 0) / nexprs[key]
+
+        for iname, stride in six.iteritems(strides):
+            if stride in [1, -1]:
+                scores[iname] += weight
+            elif stride != 0:
+                scores[iname] -= weight
+
+    # }}}
+
+    for inner_iname in sorted(inames):
+        for outer_iname in sorted(inames):
+            if (scores[inner_iname] > scores[outer_iname]
+                    and _can_prioritize_loop_pair(
+                        kernel, outer_iname, inner_iname)):
+                kernel = prioritize_loops(kernel, (outer_iname, inner_iname))
+
+    return kernel
+
 # }}}
 
 
@@ -1515,7 +1690,7 @@ def find_unused_axis_tag(kernel, kind, insn_match=None):
             dim_tag = kernel.iname_to_tag.get(iname)
 
             if isinstance(dim_tag, kind):
-                used_axes.add(kind.axis)
+                used_axes.add(dim_tag.axis)
 
     i = 0
     while i in used_axes:
@@ -1687,4 +1862,83 @@ def add_inames_to_insn(knl, inames, insn_match):
 # }}}
 
 
+# {{{ unroll and jam
+
+def unroll_and_jam(kernel, iname, factor, within=None,
+        outer_iname=None, inner_iname=None):
+    """Unroll the loop over *iname* by *factor* and jam the unrolled copies
+    into the innermost loops nested inside it ("register tiling"), so
+    that data not depending on *iname* is reused across the copies.
+
+    *iname* is split, and its inner part is tagged ``ilp.unr``. This
+    replicates each instruction *factor* times in place and gives each copy
+    its own private temporaries, including reduction accumulators. Separate
+    code is generated for the first and last iterations of the outer loop
+    unless the bounds of *iname* are known to be multiples of *factor*.
+
+    :arg within: a stack match as understood by
+        :func:`loopy.match.parse_stack_match`.
+    :arg outer_iname: as in :func:`split_iname`.
+    :arg inner_iname: as in :func:`split_iname`.
+
+    :raises LoopyError: if *iname* is a reduction iname, or if different
+        iterations of *iname* may access the same data, see
+        :func:`loopy.kernel.tools.find_loop_carried_dependences`.
+
+    .. versionadded:: 2018.1
+    """
+    if not isinstance(factor, int) or factor < 1:
+        raise ValueError("factor must be a positive integer")
+
+    from loopy.match import parse_stack_match
+    within_match = parse_stack_match(within)
+
+    insn_ids = frozenset(
+            insn.id for insn in kernel.instructions
+            if within_match(kernel, insn, ()))
+
+    from loopy.kernel.instruction import MultiAssignmentBase
+    for insn in kernel.instructions:
+        if (insn.id in insn_ids
+                and isinstance(insn, MultiAssignmentBase)
+                and iname in insn.reduction_inames()):
+            raise LoopyError("cannot unroll-and-jam reduction iname '%s' "
+                    "(in instruction '%s'), use split_reduction_outward "
+                    "first" % (iname, insn.id))
+
+    # {{{ check legality
+
+    from loopy.kernel.tools import find_loop_carried_dependences
+    deps = find_loop_carried_dependences(kernel, iname, insn_ids)
+
+    if deps:
+        raise LoopyError("cannot unroll-and-jam '%s': different iterations "
+                "may access the same data (%s)" % (
+                    iname,
+                    "; ".join(
+                        "'%s' in '%s' and '%s'" % dep for dep in deps)))
+
+    # }}}
+
+    # {{{ determine remainder slabs
+
+    bounds = kernel.get_iname_bounds(iname)
+    params = bounds.lower_bound_pw_aff.domain()
+
+    def is_multiple_of_factor(pw_aff):
+        return params <= pw_aff.mod_val(factor).zero_set()
+
+    slabs = (
+            0 if is_multiple_of_factor(bounds.lower_bound_pw_aff) else 1,
+            0 if is_multiple_of_factor(bounds.upper_bound_pw_aff + 1) else 1)
+
+    # }}}
+
+    return split_iname(kernel, iname, factor,
+            outer_iname=outer_iname, inner_iname=inner_iname,
+            inner_tag="ilp.unr", slabs=slabs, within=within)
+
+# }}}
+
+
 # vim: foldmethod=marker
@@ -0,0 +1,211 @@
+from __future__ import division, absolute_import
+
+__copyright__ = "Copyright (C) 2018 Andreas Kloeckner"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+import six
+
+from loopy.diagnostic import LoopyError
+
+import logging
+logger = logging.getLogger(__name__)
+
+__doc__ = """
+.. currentmodule:: loopy
+
+.. autofunction:: auto_parallelize
+
+.. autofunction:: loopy.kernel.tools.find_loop_carried_dependences
+
+.. autofunction:: loopy.kernel.tools.find_interchange_preventing_dependences
+"""
+
+
+# {{{ helpers
+
+def _target_has_hw_axes(target):
+    from loopy.target.opencl import OpenCLTarget
+    from loopy.target.cuda import CudaTarget
+    from loopy.target.ispc import ISPCTarget
+    return isinstance(target, (OpenCLTarget, CudaTarget, ISPCTarget))
+
+
+def _get_unit_stride_access_counts(kernel, inames):
+    """Return a :class:`dict` mapping each of *inames* to the number of
+    accesses to global arrays in which it has a stride of one.
+    """
+    from pymbolic.primitives import Subscript
+    from loopy.symbolic import ArrayAccessFinder, SubstitutionRuleExpander
+    from loopy.kernel.instruction import MultiAssignmentBase
+    from loopy.kernel.tools import get_access_iname_strides
+
+    expander = SubstitutionRuleExpander(kernel.substitutions)
+    result = dict((iname, 0) for iname in inames)
+
+    for insn in kernel.instructions:
+        if not isinstance(insn, MultiAssignmentBase):
+            continue
+
+        accesses = list(ArrayAccessFinder()(expander(insn.expression)))
+        accesses.extend(
+                assignee for assignee in insn.assignees
+                if isinstance(assignee, Subscript))
+
+        for access in accesses:
+            strides = get_access_iname_strides(kernel, access, inames)
+            if strides is None:
+                continue
+
+            for iname, stride in six.iteritems(strides):
+                if stride in [1, -1]:
+                    result[iname] += 1
+
+    return result
+
+# }}}
+
+
+# {{{ auto_parallelize
+
+def auto_parallelize(kernel, local_size=32, max_group_axes=3, hw_axes=None):
+    """Find the loops of *kernel* whose iterations may execute in parallel,
+    using :func:`loopy.kernel.tools.find_loop_carried_dependences`, and map
+    them to hardware axes.
+
+    Only inames that are not yet tagged, are not reduction inames, and
+    that every instruction writing to a kernel argument is nested within are
+    considered. Of these, the iname with a unit stride in the most global
+    array accesses is split by *local_size*, with the inner part becoming
+    local axis 0 and the outer part a group axis. Further parallel inames
+    (taken in order of their names) become group axes, up to a total of
+    *max_group_axes*. Remaining parallel loops are prioritized (see
+    :func:`loopy.prioritize_loops`) to nest outside the loops carrying
+    dependences wherever the two form a nest that may legally be
+    interchanged, as determined by
+    :func:`loopy.kernel.tools.find_interchange_preventing_dependences`.
+
+    :arg hw_axes: whether to tag inames with hardware axes. If *None*, this
+        is done if the kernel's target supports hardware axes (i.e. OpenCL,
+        CUDA and ISPC). Otherwise, only loop priorities are recorded.
+
+    .. versionadded:: 2018.1
+    """
+    from loopy.kernel.tools import find_loop_carried_dependences
+    from loopy.kernel.instruction import MultiAssignmentBase
+
+    if local_size < 1:
+        raise LoopyError("local_size must be positive")
+
+    if hw_axes is None:
+        hw_axes = _target_has_hw_axes(kernel.target)
+
+    # {{{ find parallel inames
+
+    reduction_inames = set()
+    for insn in kernel.instructions:
+        if isinstance(insn, MultiAssignmentBase):
+            reduction_inames.update(insn.reduction_inames())
+
+    untagged_inames = set(
+            iname for iname in kernel.all_inames()
+            if kernel.iname_to_tag.get(iname) is None
+            and iname not in reduction_inames
+            and kernel.iname_to_insns().get(iname))
+
+    parallel_inames = set(
+            iname for iname in untagged_inames
+            if not find_loop_carried_dependences(kernel, iname))
+
+    logger.info("%s: parallel inames: %s" % (
+            kernel.name, ", ".join(sorted(parallel_inames))))
+
+    # }}}
+
+    # {{{ tag hardware axes
+
+    if hw_axes:
+        arg_names = set(arg.name for arg in kernel.args)
+        hw_candidates = set(
+                iname for iname in parallel_inames
+                if all(
+                    iname in kernel.insn_inames(insn)
+                    for insn in kernel.instructions
+                    if set(insn.assignee_var_names()) & arg_names))
+
+        from loopy.kernel.data import GroupIndexTag, LocalIndexTag
+        from loopy.transform.iname import (
+                split_iname, tag_inames, find_unused_axis_tag)
+
+        local_axis_used = any(
+                isinstance(tag, LocalIndexTag)
+                for tag in six.itervalues(kernel.iname_to_tag))
+
+        def get_group_axis(kernel):
+            tag = find_unused_axis_tag(kernel, GroupIndexTag)
+            if tag.axis < max_group_axes:
+                return tag
+            return None
+
+        if hw_candidates and not local_axis_used:
+            unit_stride_counts = _get_unit_stride_access_counts(
+                    kernel, hw_candidates)
+            local_iname = max(
+                    sorted(hw_candidates),
+                    key=lambda iname: unit_stride_counts[iname])
+
+            group_tag = get_group_axis(kernel)
+            if group_tag is not None:
+                kernel = split_iname(kernel, local_iname, local_size,
+                        outer_tag=group_tag, inner_tag="l.0")
+                hw_candidates.remove(local_iname)
+                parallel_inames.remove(local_iname)
+                untagged_inames.remove(local_iname)
+
+        for iname in sorted(hw_candidates):
+            group_tag = get_group_axis(kernel)
+            if group_tag is None:
+                break
+
+            kernel = tag_inames(kernel, {iname: group_tag})
+            parallel_inames.remove(iname)
+            untagged_inames.remove(iname)
+
+    # }}}
+
+    # {{{ prioritize parallel loops outward
+
+    from loopy.transform.iname import (
+            prioritize_loops, _can_prioritize_loop_pair)
+
+    for par_iname in sorted(parallel_inames):
+        for seq_iname in sorted(untagged_inames - parallel_inames):
+            if _can_prioritize_loop_pair(kernel, par_iname, seq_iname):
+                kernel = prioritize_loops(kernel, (par_iname, seq_iname))
+
+    # }}}
+
+    return kernel
+
+# }}}
+
+# vim: foldmethod=marker
@@ -35,18 +35,14 @@ __doc__ = """
 .. autofunction:: fix_parameters
 
 .. autofunction:: assume
+
+.. autofunction:: add_assumption_versions
 """
 
 
 # {{{ assume
 
-def assume(kernel, assumptions):
-    """Include an assumption about :ref:`domain-parameters` in the kernel, e.g.
-    `n mod 4 = 0`.
-
-    :arg assumptions: a :class:`islpy.BasicSet` or a string representation of
-        the assumptions in :ref:`isl-syntax`.
-    """
+def _parse_assumptions(kernel, assumptions):
     if isinstance(assumptions, str):
         assumptions_set_str = "[%s] -> { : %s}" \
                 % (",".join(s for s in kernel.outer_params()),
@@ -57,6 +53,18 @@ def assume(kernel, assumptions):
     if not isinstance(assumptions, isl.BasicSet):
         raise TypeError("'assumptions' must be a BasicSet or a string")
 
+    return assumptions
+
+
+def assume(kernel, assumptions):
+    """Include an assumption about :ref:`domain-parameters` in the kernel, e.g.
+    `n mod 4 = 0`.
+
+    :arg assumptions: a :class:`islpy.BasicSet` or a string representation of
+        the assumptions in :ref:`isl-syntax`.
+    """
+    assumptions = _parse_assumptions(kernel, assumptions)
+
     old_assumptions, new_assumptions = isl.align_two(kernel.assumptions, assumptions)
 
     return kernel.copy(
@@ -65,6 +73,48 @@ def assume(kernel, assumptions):
 # }}}
 
 
+# {{{ add_assumption_versions
+
+def add_assumption_versions(kernel, assumptions_list):
+    """Have code generation emit a specialized version of *kernel* for each
+    entry of *assumptions_list*, in addition to a generic version. At run
+    time, the generated host code checks the :ref:`domain-parameters` and
+    calls the first version whose assumptions hold, falling back to the
+    generic version if none do. A version whose assumptions imply those of
+    another is tried before it, irrespective of its position in the list.
+
+    For example, with ``["n mod 16 = 0"]``, the specialized version of a
+    kernel split by 16 along an axis of length *n* does without the
+    conditionals guarding the remainder.
+
+    :arg assumptions_list: a list of assumptions, each in any form accepted
+        by :func:`assume`.
+
+    Versions are additional to those already present on *kernel*. Only
+    targets with host code that is able to dispatch, such as
+    :class:`loopy.PyOpenCLTarget`, support kernels with versions.
+
+    .. versionadded:: 2018.1
+    """
+    versions = []
+    for assumptions in assumptions_list:
+        assumptions = _parse_assumptions(kernel, assumptions)
+
+        aligned_kernel_assumptions, aligned_assumptions = isl.align_two(
+                kernel.assumptions, assumptions)
+        if (aligned_kernel_assumptions & aligned_assumptions).is_empty():
+            from loopy.diagnostic import LoopyError
+            raise LoopyError("assumptions '%s' contradict those of kernel "
+                    "'%s'" % (assumptions, kernel.name))
+
+        versions.append(assumptions.params())
+
+    return kernel.copy(
+            assumption_versions=kernel.assumption_versions + tuple(versions))
+
+# }}}
+
+
 # {{{ fix_parameter
 
 def _fix_parameter(kernel, name, value):
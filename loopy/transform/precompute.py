@@ -26,7 +26,7 @@ THE SOFTWARE.
 import six
 from six.moves import range, zip
 import islpy as isl
-from loopy.symbolic import (get_dependencies,
+from loopy.symbolic import (get_dependencies, IdentityMapper,
         RuleAwareIdentityMapper, RuleAwareSubstitutionMapper,
         SubstitutionRuleMappingContext)
 from loopy.diagnostic import LoopyError
@@ -254,13 +254,409 @@ class RuleInvocationReplacer(RuleAwareIdentityMapper):
 # }}}
 
 
+# {{{ double buffering
+
+class _BufferSelector(IdentityMapper):
+    """Prepends *buffer_index* to all subscripts of *temporary_name*."""
+
+    def __init__(self, temporary_name, buffer_index):
+        self.temporary_name = temporary_name
+        self.buffer_index = buffer_index
+
+    def map_variable(self, expr):
+        if expr.name == self.temporary_name:
+            return expr.index(self.buffer_index)
+        return expr
+
+    def map_subscript(self, expr):
+        if expr.aggregate.name != self.temporary_name:
+            return super(_BufferSelector, self).map_subscript(expr)
+
+        index = expr.index
+        if not isinstance(index, tuple):
+            index = (index,)
+
+        return expr.aggregate.index(
+                (self.buffer_index,) + tuple(self.rec(idx) for idx in index))
+
+
+def _move_set_dims_to_params(set_, names):
+    for name in names:
+        dt, idx = set_.get_var_dict()[name]
+        set_ = set_.move_dims(
+                isl.dim_type.param, set_.dim(isl.dim_type.param), dt, idx, 1)
+
+    return set_
+
+
+def _get_iname_lower_bound(kernel, iname, outer_inames):
+    """Return an :class:`islpy.PwAff` for the lower bound of *iname*, defined
+    on a parameter space that includes *outer_inames*.
+    """
+    domain = kernel.get_inames_domain(frozenset([iname]) | outer_inames)
+    var_dict = domain.get_var_dict(isl.dim_type.set)
+    outer_inames = sorted(outer_inames & frozenset(var_dict))
+    domain = domain.project_out_except(
+            [iname] + outer_inames, [isl.dim_type.set])
+    domain = _move_set_dims_to_params(domain, outer_inames)
+
+    assumptions, domain = isl.align_two(kernel.assumptions, domain)
+    domain = domain & assumptions
+
+    return domain.dim_min(0).coalesce().gist(domain.params())
+
+
+def _get_domain_for_iname_value(domain, iname, value):
+    """Return the set of points from which setting *iname* to *value* leads
+    to a point in *domain*, as a parameter set in which all inames occur as
+    parameters.
+
+    :arg value: an :class:`islpy.PwAff` on a parameter space, in which
+        inames may occur as parameters.
+    """
+    other_inames = [
+            name for name in domain.get_var_names(isl.dim_type.set)
+            if name != iname]
+    iname_domain = _move_set_dims_to_params(domain, other_inames)
+
+    value = value.add_dims(isl.dim_type.in_, 1)
+    value_set = isl.PwAff.var_on_domain(
+            value.get_domain_space(), isl.dim_type.set, 0).eq_set(value)
+    value_set = value_set.set_dim_name(
+            isl.dim_type.set, 0, iname_domain.get_dim_name(isl.dim_type.set, 0))
+
+    value_set = value_set.align_params(iname_domain.space)
+    iname_domain = iname_domain.align_params(value_set.space)
+    return (iname_domain & value_set).params()
+
+
+def _get_conditions_for_iname_value(domain, iname, value, context):
+    """Return a list of conditions under which *domain* contains the point
+    obtained from a point of *context* by setting *iname* to *value* (see
+    :func:`_get_domain_for_iname_value`). Conditions implied by *context*
+    are omitted.
+    """
+    from loopy.symbolic import constraint_to_cond_expr, set_to_cond_expr
+
+    cond_set = _get_domain_for_iname_value(domain, iname, value)
+    context = _move_set_dims_to_params(
+            context, context.get_var_names(isl.dim_type.set)).params()
+
+    cond_set = cond_set.align_params(context.space)
+    context = context.align_params(cond_set.space)
+    cond_set = cond_set.gist(context).coalesce()
+
+    basic_sets = cond_set.get_basic_sets()
+    if len(basic_sets) == 1:
+        basic_set, = basic_sets
+        return [
+                constraint_to_cond_expr(cns)
+                for cns in basic_set.get_constraints()]
+    else:
+        return [set_to_cond_expr(cond_set)]
+
+
+def _double_buffer_precompute(kernel, compute_insn_id, storage_inames, iname):
+    """Give the temporary written by *compute_insn_id* a leading axis of
+    length two and pipeline the computation across *iname*: a prologue
+    computes the first buffer before the loop, and each iteration of the
+    loop computes the buffer for the next iteration before the current
+    one gets used.
+
+    For local temporaries, a single barrier at the start of each iteration
+    replaces the two barriers around the uses.
+    """
+    import loopy as lp
+    from loopy.kernel.data import (
+            temp_var_scope, ConcurrentTag, GroupIndexTag, VectorizeTag)
+    from loopy.kernel.instruction import BarrierInstruction
+    from loopy.symbolic import SubstitutionRuleExpander, SubstitutionMapper
+    from pymbolic.primitives import Remainder
+
+    compute_insn = kernel.id_to_insn[compute_insn_id]
+    temporary_name, = compute_insn.assignee_var_names()
+
+    # {{{ find readers and the pipelined iname
+
+    expander = SubstitutionRuleExpander(kernel.substitutions)
+
+    def get_read_variables(insn):
+        result = set()
+
+        def gather(expr):
+            result.update(get_dependencies(expander(expr)))
+            return expr
+
+        insn.with_transformed_expressions(gather)
+        return result
+
+    readers = [
+            insn for insn in kernel.instructions
+            if insn.id != compute_insn_id
+            and temporary_name in get_read_variables(insn)]
+
+    if not readers:
+        raise LoopyError("cannot double-buffer '%s': it is not used"
+                % temporary_name)
+
+    if any(temporary_name in insn.assignee_var_names()
+            for insn in kernel.instructions if insn.id != compute_insn_id):
+        raise LoopyError("cannot double-buffer '%s': it has writers other "
+                "than '%s'" % (temporary_name, compute_insn_id))
+
+    def is_sequential(name):
+        tag = kernel.iname_to_tag.get(name)
+        return not isinstance(tag, (ConcurrentTag, VectorizeTag))
+
+    reader_inames = None
+    for insn in readers:
+        insn_inames = kernel.insn_inames(insn) | insn.reduction_inames()
+        if reader_inames is None:
+            reader_inames = insn_inames
+        else:
+            reader_inames = reader_inames & insn_inames
+
+    common_inames = kernel.insn_inames(compute_insn) & reader_inames
+
+    if iname is None:
+        candidates = sorted(
+                cand_iname for cand_iname in common_inames
+                if is_sequential(cand_iname))
+        if len(candidates) != 1:
+            raise LoopyError("cannot determine the iname along which to "
+                    "double-buffer '%s' (candidates: %s), specify "
+                    "double_buffer_iname" % (
+                        temporary_name, ", ".join(candidates) or "none"))
+        iname, = candidates
+
+    if iname not in common_inames:
+        raise LoopyError("cannot double-buffer '%s' along '%s': "
+                "its computation and all its uses must be nested "
+                "within '%s'" % (temporary_name, iname, iname))
+    if not is_sequential(iname):
+        raise LoopyError("cannot double-buffer '%s' along '%s': "
+                "'%s' is not sequential" % (temporary_name, iname, iname))
+
+    # }}}
+
+    # {{{ determine scope
+
+    temp_var = kernel.temporary_variables[temporary_name]
+
+    scope = temp_var.scope
+    if scope is lp.auto:
+        from loopy.preprocess import find_temporary_scope
+        scope = (find_temporary_scope(kernel)
+                .temporary_variables[temporary_name].scope)
+
+    if scope == temp_var_scope.GLOBAL:
+        raise LoopyError("cannot double-buffer '%s': double buffering "
+                "is only supported for local and private temporaries"
+                % temporary_name)
+
+    if scope == temp_var_scope.LOCAL:
+        # The barrier placement below is only valid for local
+        # temporaries, so pin the scope.
+        temp_var = temp_var.copy(scope=scope)
+
+    new_temporary_variables = kernel.temporary_variables.copy()
+    new_temporary_variables[temporary_name] = temp_var.copy(
+            shape=(2,) + temp_var.shape,
+            base_indices=(0,) + temp_var.base_indices,
+            dim_tags=None,
+            dim_names=(
+                None if temp_var.dim_names is None
+                else (iname + "_buf",) + temp_var.dim_names))
+
+    # }}}
+
+    outer_inames = kernel.insn_inames(compute_insn) - frozenset([iname])
+    lower_pwaff = _get_iname_lower_bound(
+            kernel, iname, outer_inames - storage_inames)
+
+    from loopy.symbolic import pw_aff_to_expr
+    lower = pw_aff_to_expr(lower_pwaff, int_ok=True)
+
+    domain = (kernel.get_inames_domain(kernel.insn_inames(compute_insn))
+            .project_out_except(
+                kernel.insn_inames(compute_insn), [isl.dim_type.set]))
+    assumptions, domain = isl.align_two(kernel.assumptions, domain)
+    domain = domain & assumptions
+
+    def buffer_index(expr):
+        if lower != 0:
+            expr = expr - lower
+        return Remainder(expr, 2)
+
+    def select_buffer(index):
+        return _BufferSelector(temporary_name, index)
+
+    def with_iname_value(insn, value):
+        subst_mapper = SubstitutionMapper(make_subst_func({iname: value}))
+        return insn.with_transformed_expressions(
+                lambda expr: subst_mapper(expander(expr)))
+
+    # {{{ prologue: compute the first buffer ahead of the loop
+
+    dt, idx = domain.get_var_dict()[iname]
+    prologue_insn = (
+            with_iname_value(compute_insn, lower)
+            .with_transformed_expressions(select_buffer(0)))
+    prologue_insn = prologue_insn.copy(
+            id=kernel.make_unique_instruction_id(
+                based_on=compute_insn_id + "_prologue"),
+            within_inames=outer_inames,
+            predicates=prologue_insn.predicates | frozenset(
+                _get_conditions_for_iname_value(
+                    domain, iname, lower_pwaff,
+                    context=domain.project_out(dt, idx, 1))))
+
+    # }}}
+
+    # {{{ in-loop computation of the next buffer
+
+    from loopy.symbolic import aff_from_expr
+    next_value = isl.PwAff.from_aff(aff_from_expr(
+            _move_set_dims_to_params(
+                domain, [iname]).params().space,
+            var(iname) + 1))
+
+    # The next buffer gets computed in the storage loops of the current
+    # iteration, so those must cover the storage needed by the next one.
+    all_inames = domain.get_var_names(isl.dim_type.set)
+    cur_domain = _move_set_dims_to_params(domain, all_inames).params()
+    next_domain = _get_domain_for_iname_value(domain, iname, next_value)
+    loop_domain = domain
+    for storage_iname in storage_inames & frozenset(all_inames):
+        # project out, but keep the storage iname unconstrained
+        sdt, sidx = loop_domain.get_var_dict()[storage_iname]
+        loop_domain = (loop_domain
+                .project_out(sdt, sidx, 1)
+                .insert_dims(sdt, sidx, 1)
+                .set_dim_name(sdt, sidx, storage_iname))
+    loop_domain = _move_set_dims_to_params(
+            loop_domain, all_inames).params()
+
+    next_domain, loop_domain = isl.align_two(next_domain, loop_domain)
+    next_domain, cur_domain = isl.align_two(next_domain & loop_domain, cur_domain)
+    if not next_domain <= cur_domain:
+        raise LoopyError("cannot double-buffer '%s' along '%s': the extent "
+                "of its storage depends on '%s'" % (
+                    temporary_name, iname, iname))
+
+    pipelined_insn = (
+            with_iname_value(compute_insn, var(iname) + 1)
+            .with_transformed_expressions(
+                select_buffer(buffer_index(var(iname) + 1))))
+    pipelined_insn = pipelined_insn.copy(
+            depends_on=compute_insn.depends_on | frozenset([prologue_insn.id]),
+            predicates=pipelined_insn.predicates | frozenset(
+                _get_conditions_for_iname_value(
+                    domain, iname, next_value, context=domain)))
+
+    # }}}
+
+    # {{{ barrier
+
+    barrier_insn = None
+    if scope == temp_var_scope.LOCAL:
+        # Loops over storage inames do not enclose the uses. Group inames
+        # may be added freely, which lets the barrier be shared with other
+        # buffers below.
+        barrier_inames = frozenset(
+                barrier_iname for barrier_iname in reader_inames
+                if isinstance(
+                    kernel.iname_to_tag.get(barrier_iname), GroupIndexTag)
+                or (barrier_iname in common_inames
+                    and barrier_iname not in storage_inames
+                    and is_sequential(barrier_iname)))
+
+        # Any barrier at the start of an iteration serves the purpose, so
+        # share one between all buffers pipelined across the same loop.
+        for insn in kernel.instructions:
+            if (isinstance(insn, BarrierInstruction)
+                    and insn.synchronization_kind == "local"
+                    and not insn.depends_on
+                    and insn.within_inames == barrier_inames):
+                barrier_insn = insn
+                break
+
+        if barrier_insn is None:
+            barrier_insn = BarrierInstruction(
+                    id=kernel.make_unique_instruction_id(
+                        based_on=temporary_name + "_barrier"),
+                    within_inames=barrier_inames,
+                    synchronization_kind="local",
+                    mem_kind="local")
+            kernel = kernel.copy(
+                    instructions=[barrier_insn] + kernel.instructions)
+
+        # The barrier separates the uses of one buffer from its being
+        # overwritten in the next iteration, as well as the computation of a
+        # buffer from its uses in the next iteration.
+        pipelined_insn = pipelined_insn.copy(
+                depends_on=pipelined_insn.depends_on
+                | frozenset([barrier_insn.id]))
+
+    # }}}
+
+    this_buffer = select_buffer(buffer_index(var(iname)))
+    reader_ids = frozenset(insn.id for insn in readers)
+
+    new_insns = []
+    for insn in kernel.instructions:
+        if insn.id == compute_insn_id:
+            new_insns.append(prologue_insn)
+            new_insns.append(pipelined_insn)
+
+        elif insn.id in reader_ids:
+            # Depending on the in-loop computation makes the next buffer get
+            # computed before this one is used. The two use different
+            # buffers, so they need no synchronization.
+            insn = insn.with_transformed_expressions(this_buffer)
+            insn = insn.copy(
+                    depends_on=insn.depends_on | frozenset([prologue_insn.id]))
+            if barrier_insn is not None:
+                insn = insn.copy(
+                        no_sync_with=insn.no_sync_with
+                        | frozenset([(compute_insn_id, "local")]))
+
+            new_insns.append(insn)
+
+        else:
+            new_insns.append(insn)
+
+    new_substs = dict(
+            (name, rule.copy(expression=this_buffer(rule.expression)))
+            for name, rule in six.iteritems(kernel.substitutions))
+
+    kernel = kernel.copy(
+            instructions=new_insns,
+            substitutions=new_substs,
+            temporary_variables=new_temporary_variables)
+
+    # The prologue runs outside of the pipelined loop, so it needs its own
+    # loops over the storage inames.
+    seq_storage_inames = sorted(
+            storage_iname for storage_iname in storage_inames
+            if is_sequential(storage_iname))
+    if seq_storage_inames:
+        from loopy.transform.iname import duplicate_inames
+        kernel = duplicate_inames(kernel, seq_storage_inames,
+                within="id:"+prologue_insn.id)
+
+    return kernel
+
+# }}}
+
+
 def precompute(kernel, subst_use, sweep_inames=[], within=None,
         storage_axes=None, temporary_name=None, precompute_inames=None,
         precompute_outer_inames=None,
         storage_axis_to_tag={}, default_tag="l.auto", dtype=None,
         fetch_bounding_box=False,
         temporary_scope=None, temporary_is_local=None,
-        compute_insn_id=None):
+        compute_insn_id=None, double_buffer=False, double_buffer_iname=None):
     """Precompute the expression described in the substitution rule determined by
     *subst_use* and store it in a temporary array. A precomputation needs two
     things to operate, a list of *sweep_inames* (order irrelevant) and an
@@ -331,6 +727,20 @@ def precompute(kernel, subst_use, sweep_inames=[], within=None,
     :arg compute_insn_id: The ID of the instruction generated to perform the
         precomputation.
 
+    :arg double_buffer: If *True*, allocate two copies of the temporary and
+        software-pipeline the precomputation across the sequential loop
+        *double_buffer_iname*: The precomputation for the first iteration is
+        hoisted in front of the loop, and each iteration performs the
+        precomputation for the next one before using its own copy, so that
+        (e.g.) fetch latency may overlap with computation. For local
+        temporaries, this needs only one barrier per iteration. The
+        precomputation and all its uses must be nested inside
+        *double_buffer_iname*.
+
+    :arg double_buffer_iname: The iname along which to pipeline if
+        *double_buffer* is *True*. If *None*, the only sequential iname
+        shared by the precomputation and all its uses is chosen.
+
     If `storage_axes` is not specified, it defaults to the arrangement
     `<direct sweep axes><arguments>` with the direct sweep axes being the
     slower-varying indices.
@@ -1002,6 +1412,14 @@ def precompute(kernel, subst_use, sweep_inames=[], within=None,
         from loopy.kernel.tools import assign_automatic_axes
         kernel = assign_automatic_axes(kernel)
 
+    if double_buffer:
+        if temporary_scope == temp_var_scope.GLOBAL:
+            raise LoopyError("double buffering is only supported for local "
+                    "and private temporaries")
+
+        kernel = _double_buffer_precompute(kernel, compute_insn_id,
+                frozenset(non1_storage_axis_names), double_buffer_iname)
+
     return kernel
 
 # vim: foldmethod=marker
@@ -251,6 +251,7 @@ class TemporarySaver(object):
         from collections import defaultdict
         self.temporary_to_save_ids = defaultdict(set)
         self.temporary_to_reload_ids = defaultdict(set)
+        self.save_slot_to_subkernels = defaultdict(set)
         self.subkernel_to_newly_added_insn_ids = defaultdict(set)
 
         # Maps names of base_storage to the name of the temporary
@@ -297,6 +298,186 @@ class TemporarySaver(object):
 
         return frozenset(accessing_insns_in_subkernel)
 
+    @memoize_method
+    def get_access_footprint(self, temporary, subkernel, direction):
+        """Return the indices of *temporary* accessed in *subkernel* as an
+        :class:`islpy.Set`, *None* if there are none, or *True* if they
+        could not be determined.
+
+        :arg direction: ``"read"`` or ``"write"``
+        """
+        assert direction in ("read", "write")
+
+        temp = self.kernel.temporary_variables[temporary]
+
+        from loopy.kernel.tools import get_subkernel_to_insn_id_map
+        subkernel_insns = get_subkernel_to_insn_id_map(self.kernel)[subkernel]
+        if direction == "read":
+            accessor_ids = self.kernel.reader_map().get(temporary, set())
+        else:
+            accessor_ids = self.kernel.writer_map().get(temporary, set())
+        accessor_ids = accessor_ids & subkernel_insns
+
+        if not accessor_ids:
+            return None
+        if not temp.shape or temp.base_storage is not None:
+            return True
+
+        from loopy.kernel.instruction import MultiAssignmentBase
+        from loopy.symbolic import BatchedAccessRangeMapper
+        arm = BatchedAccessRangeMapper(self.kernel, [temporary])
+
+        for insn_id in accessor_ids:
+            insn = self.kernel.id_to_insn[insn_id]
+            if not isinstance(insn, MultiAssignmentBase):
+                return True
+
+            if direction == "read":
+                exprs = [insn.expression] + list(insn.predicates)
+            else:
+                exprs = insn.assignees
+
+            for expr in exprs:
+                arm(expr, self.kernel.insn_inames(insn))
+
+        if arm.bad_subscripts[temporary] or arm.access_ranges[temporary] is None:
+            # e.g. unsubscripted use
+            return True
+
+        footprint = arm.access_ranges[temporary]
+        import islpy as isl
+        for iaxis in range(footprint.dim(isl.dim_type.set)):
+            footprint = footprint.set_dim_name(
+                    isl.dim_type.set, iaxis, "i%d" % iaxis)
+
+        return footprint
+
+    @memoize_method
+    def is_write_footprint_exact(self, temporary, subkernel):
+        """Return whether every index in the write footprint of *temporary* in
+        *subkernel* is written by each work item (for private temporaries)
+        or each work group (for local temporaries) executing *subkernel*,
+        in each iteration of the loops surrounding *subkernel*.
+        """
+        from loopy.kernel.data import GroupIndexTag, LocalIndexTagBase
+        from loopy.kernel.tools import get_subkernel_to_insn_id_map
+        from loopy.symbolic import get_dependencies
+        import islpy as isl
+
+        temp = self.kernel.temporary_variables[temporary]
+        instance_tag_types = (
+                (GroupIndexTag,) if temp.scope == temp_var_scope.LOCAL
+                else (GroupIndexTag, LocalIndexTagBase))
+
+        instance_inames = set(self.subkernel_to_surrounding_inames[subkernel])
+        instance_inames.update(
+                iname for iname, tag in six.iteritems(self.kernel.iname_to_tag)
+                if isinstance(tag, instance_tag_types))
+
+        subkernel_insns = get_subkernel_to_insn_id_map(self.kernel)[subkernel]
+        writer_ids = (
+                self.kernel.writer_map().get(temporary, set())
+                & subkernel_insns)
+
+        def eliminate(domain, inames):
+            var_dict = domain.get_var_dict()
+            for iname in inames:
+                dt, idx = var_dict[iname]
+                domain = domain.eliminate(dt, idx, 1)
+            return domain
+
+        for insn_id in writer_ids:
+            insn = self.kernel.id_to_insn[insn_id]
+            if insn.predicates:
+                return False
+
+            if any(
+                    get_dependencies(assignee) & instance_inames
+                    for assignee, name in zip(
+                        insn.assignees, insn.assignee_var_names())
+                    if name == temporary):
+                return False
+
+            insn_inames = self.kernel.insn_inames(insn)
+            insn_instance_inames = insn_inames & instance_inames
+            if not insn_instance_inames:
+                continue
+
+            # Check that the iteration space of the instruction within
+            # one instance does not depend on the instance.
+            domain = isl.Set.from_basic_set(
+                    self.kernel.get_inames_domain(insn_inames))
+            if domain != (
+                    eliminate(domain, insn_instance_inames)
+                    & eliminate(domain, insn_inames - insn_instance_inames)):
+                return False
+
+        return True
+
+    def get_bounding_box(self, temporary, footprint):
+        """Return a tuple of an inclusive lower and upper bound along each
+        axis of *temporary* and the :class:`islpy.Set` of indices within these
+        bounds, or *None* if no bounding box in terms of the kernel's
+        parameters could be found for *footprint*.
+        """
+        if footprint is None or footprint is True:
+            return None
+
+        from loopy.isl_helpers import (
+                static_min_of_pw_aff, static_max_of_pw_aff)
+        from loopy.symbolic import aff_to_expr, aff_from_expr, get_dependencies
+        from loopy.diagnostic import StaticValueFindingError
+        import islpy as isl
+
+        from loopy.kernel.data import ValueArg
+        param_names = set(
+                arg.name for arg in self.kernel.args
+                if isinstance(arg, ValueArg))
+
+        temp = self.kernel.temporary_variables[temporary]
+        space = footprint.space
+        affs = isl.affs_from_space(space)
+
+        bounds = []
+        box = isl.Set.universe(space)
+        for iaxis, axis_len in enumerate(temp.shape):
+            try:
+                lower = aff_to_expr(static_min_of_pw_aff(
+                    footprint.dim_min(iaxis), constants_only=False))
+                upper = aff_to_expr(static_max_of_pw_aff(
+                    footprint.dim_max(iaxis), constants_only=False))
+            except StaticValueFindingError:
+                return None
+
+            if not (get_dependencies(lower) | get_dependencies(upper)
+                    <= param_names):
+                return None
+
+            axis_name = space.get_dim_name(isl.dim_type.set, iaxis)
+            box = (box
+                    & affs[axis_name].ge_set(aff_from_expr(space, lower))
+                    & affs[axis_name].le_set(aff_from_expr(space, upper)))
+            bounds.append((lower, upper))
+
+        return tuple(bounds), box
+
+    def get_index_bounds(self, temporary, footprint):
+        """Return the bounds of the bounding box of *footprint* for use
+        with :meth:`save` and :meth:`reload`, or *None* if the entire
+        temporary should be covered.
+        """
+        bbox = self.get_bounding_box(temporary, footprint)
+        if bbox is None:
+            return None
+
+        bounds, _ = bbox
+        temp = self.kernel.temporary_variables[temporary]
+        if all(lower == 0 and upper == axis_len - 1
+                for (lower, upper), axis_len in zip(bounds, temp.shape)):
+            return None
+
+        return bounds
+
     @property
     @memoize_method
     def base_storage_to_temporary_map(self):
@@ -492,7 +673,7 @@ class TemporarySaver(object):
         return backing_temporary
 
     def save_or_reload_impl(self, temporary, subkernel, mode,
-                             promoted_temporary=lp.auto):
+                             promoted_temporary=lp.auto, index_bounds=None):
         assert mode in ("save", "reload")
 
         if promoted_temporary is auto:
@@ -503,7 +684,8 @@ class TemporarySaver(object):
 
         new_subdomain, hw_inames, dim_inames, iname_to_tag = (
             self.augment_domain_for_save_or_reload(
-                self.new_subdomain, promoted_temporary, mode, subkernel))
+                self.new_subdomain, promoted_temporary, mode, subkernel,
+                index_bounds))
 
         self.new_subdomain = new_subdomain
 
@@ -569,6 +751,8 @@ class TemporarySaver(object):
         else:
             self.temporary_to_reload_ids[temporary].add(save_or_load_insn_id)
 
+        self.save_slot_to_subkernels[promoted_temporary.name].add(subkernel)
+
         self.subkernel_to_newly_added_insn_ids[subkernel].add(save_or_load_insn_id)
 
         self.insns_to_insert.append(save_or_load_insn)
@@ -583,10 +767,103 @@ class TemporarySaver(object):
 
         self.updated_iname_to_tag.update(iname_to_tag)
 
+    def get_save_slot_pooling(self):
+        """Return a mapping from names of save slots to the name of the save
+        slot whose storage they share. Save slots of identical type and shape
+        share storage if the ranges of subkernels in which they are used do
+        not overlap.
+        """
+        from loopy.kernel.tools import get_subkernels
+        subkernel_to_ordinal = dict(
+                (subkernel, i)
+                for i, subkernel in enumerate(get_subkernels(self.kernel)))
+
+        # A value saved within a loop may be reloaded in a later iteration of
+        # the loop, so slots are live throughout their outermost loops.
+        outer_loop_to_ordinals = {}
+        subkernel_to_outer_loop = {}
+        loop_depth = 0
+        outer_loop = None
+        for sched_item in self.kernel.schedule:
+            if isinstance(sched_item, EnterLoop):
+                if loop_depth == 0:
+                    outer_loop = sched_item.iname
+                    outer_loop_to_ordinals[outer_loop] = set()
+                loop_depth += 1
+            elif isinstance(sched_item, LeaveLoop):
+                loop_depth -= 1
+            elif isinstance(sched_item, CallKernel):
+                if loop_depth > 0:
+                    subkernel_to_outer_loop[sched_item.kernel_name] = outer_loop
+                    outer_loop_to_ordinals[outer_loop].add(
+                            subkernel_to_ordinal[sched_item.kernel_name])
+
+        slot_to_range = {}
+        for slot, subkernels in six.iteritems(self.save_slot_to_subkernels):
+            ordinals = set()
+            for subkernel in subkernels:
+                ordinals.add(subkernel_to_ordinal[subkernel])
+                if subkernel in subkernel_to_outer_loop:
+                    ordinals.update(outer_loop_to_ordinals[
+                        subkernel_to_outer_loop[subkernel]])
+            slot_to_range[slot] = (min(ordinals), max(ordinals))
+
+        # {{{ greedily assign slots to pools
+
+        # (dtype, shape) -> list of [representative slot, last ordinal]
+        pools = {}
+        result = {}
+
+        for slot in sorted(slot_to_range,
+                key=lambda slot: (slot_to_range[slot], slot)):
+            start, end = slot_to_range[slot]
+            temporary = self.updated_temporary_variables[slot]
+            slot_pools = pools.setdefault(
+                    (temporary.dtype, temporary.shape), [])
+
+            for pool in slot_pools:
+                if pool[1] < start:
+                    result[slot] = pool[0]
+                    pool[1] = end
+                    break
+            else:
+                slot_pools.append([slot, end])
+                result[slot] = slot
+
+        # }}}
+
+        return result
+
     @memoize_method
     def finish(self):
         new_instructions = []
 
+        slot_pooling = self.get_save_slot_pooling()
+        renamed_slots = dict(
+                (slot, representative)
+                for slot, representative in six.iteritems(slot_pooling)
+                if slot != representative)
+
+        if renamed_slots:
+            from pymbolic import var
+            from pymbolic.mapper.substitutor import make_subst_func
+            from loopy.symbolic import SubstitutionMapper
+            subst_mapper = SubstitutionMapper(make_subst_func(dict(
+                    (slot, var(representative))
+                    for slot, representative in six.iteritems(renamed_slots))))
+
+            self.insns_to_insert = [
+                    insn.with_transformed_expressions(subst_mapper)
+                    for insn in self.insns_to_insert]
+
+            for slot in renamed_slots:
+                del self.updated_temporary_variables[slot]
+
+            logger.info("pooled save slots: {0}".format(
+                ", ".join("{0} -> {1}".format(slot, representative)
+                    for slot, representative in sorted(
+                        six.iteritems(renamed_slots)))))
+
         insns_to_insert = dict((insn.id, insn) for insn in self.insns_to_insert)
 
         for orig_insn in self.kernel.instructions:
@@ -628,18 +905,23 @@ class TemporarySaver(object):
         from loopy.kernel.tools import assign_automatic_axes
         return assign_automatic_axes(kernel)
 
-    def save(self, temporary, subkernel):
-        self.save_or_reload_impl(temporary, subkernel, "save")
+    def save(self, temporary, subkernel, index_bounds=None):
+        self.save_or_reload_impl(temporary, subkernel, "save",
+                index_bounds=index_bounds)
 
-    def reload(self, temporary, subkernel):
-        self.save_or_reload_impl(temporary, subkernel, "reload")
+    def reload(self, temporary, subkernel, index_bounds=None):
+        self.save_or_reload_impl(temporary, subkernel, "reload",
+                index_bounds=index_bounds)
 
     def augment_domain_for_save_or_reload(self,
-            domain, promoted_temporary, mode, subkernel):
+            domain, promoted_temporary, mode, subkernel, index_bounds=None):
         """
         Add new axes to the domain corresponding to the dimensions of
         `promoted_temporary`. These axes will be used in the save/
         reload stage. These get prefixed onto the already existing axes.
+
+        If *index_bounds* is given, it is a tuple of inclusive lower and upper
+        bounds to which the axes of the temporary are restricted.
         """
         assert mode in ("save", "reload")
         import islpy as isl
@@ -654,8 +936,6 @@ class TemporarySaver(object):
 
         from loopy.symbolic import aff_from_expr
 
-        # FIXME: Restrict size of new inames to access footprint.
-
         # Add dimension-dependent inames.
         dim_inames = []
         domain = domain.add_dims(isl.dim_type.set,
@@ -681,8 +961,16 @@ class TemporarySaver(object):
 
             # Add size information.
             aff = isl.affs_from_space(domain.space)
-            domain &= aff[0].le_set(aff[new_iname])
-            domain &= aff[new_iname].lt_set(aff_from_expr(domain.space, dim_size))
+            if index_bounds is None:
+                domain &= aff[0].le_set(aff[new_iname])
+                domain &= aff[new_iname].lt_set(
+                        aff_from_expr(domain.space, dim_size))
+            else:
+                lower, upper = index_bounds[dim_idx]
+                domain &= aff_from_expr(domain.space, lower).le_set(
+                        aff[new_iname])
+                domain &= aff[new_iname].le_set(
+                        aff_from_expr(domain.space, upper))
 
         dim_offset = orig_dim + len(promoted_temporary.non_hw_dims)
 
@@ -741,6 +1029,13 @@ def save_and_reload_temporaries(knl):
 
     where `t_save_slot` is a newly-created global temporary variable.
 
+    Where the access ranges of the temporary within a subkernel can be
+    determined, only the bounding box of the indices written in the subkernel
+    is saved, and only the indices that are read (or saved without being
+    written) are reloaded. Reloads of temporaries that are not read are
+    omitted. Save slots of identical type and shape that are used by disjoint
+    ranges of subkernels share storage.
+
     :returns: The resulting kernel
     """
     liveness = LivenessAnalysis(knl)
@@ -749,6 +1044,49 @@ def save_and_reload_temporaries(knl):
     from loopy.schedule.tools import (
         temporaries_read_in_subkernel, temporaries_written_in_subkernel)
 
+    def get_reload_bounds(temporary, subkernel):
+        # Returns *None* if the entire temporary needs to be reloaded, or
+        # *False* if nothing needs to be reloaded.
+
+        read_footprint = saver.get_access_footprint(
+                temporary, subkernel, "read")
+        write_footprint = saver.get_access_footprint(
+                temporary, subkernel, "write")
+
+        if read_footprint is True or write_footprint is True:
+            return None
+
+        # Indices that are saved at the end of the subkernel but not written
+        # within it need to hold their previous values.
+        needed = read_footprint
+        if write_footprint is not None:
+            write_bbox = saver.get_bounding_box(temporary, write_footprint)
+            if write_bbox is None:
+                return None
+
+            _, box = write_bbox
+            if saver.is_write_footprint_exact(temporary, subkernel):
+                unwritten = box - write_footprint
+            else:
+                unwritten = box
+
+            if not unwritten.is_empty():
+                if needed is None:
+                    needed = unwritten
+                else:
+                    from islpy import align_two
+                    needed, unwritten = align_two(needed, unwritten)
+                    needed = needed | unwritten
+
+        if needed is None:
+            return False
+
+        return saver.get_index_bounds(temporary, needed)
+
+    def get_save_bounds(temporary, subkernel):
+        return saver.get_index_bounds(temporary,
+                saver.get_access_footprint(temporary, subkernel, "write"))
+
     for sched_idx, sched_item in enumerate(knl.schedule):
 
         if isinstance(sched_item, CallKernel):
@@ -763,10 +1101,17 @@ def save_and_reload_temporaries(knl):
                     temporaries_read_in_subkernel(knl, subkernel)
                     | temporaries_written_in_subkernel(knl, subkernel))
 
-            for temporary in liveness[sched_idx].live_out & interesting_temporaries:
+            for temporary in sorted(
+                    liveness[sched_idx].live_out & interesting_temporaries):
+                bounds = get_reload_bounds(temporary, sched_item.kernel_name)
+                if bounds is False:
+                    logger.info("skipping reload of {0} at entry of {1}: "
+                            "not read".format(temporary, sched_item.kernel_name))
+                    continue
+
                 logger.info("reloading {0} at entry of {1}"
                         .format(temporary, sched_item.kernel_name))
-                saver.reload(temporary, sched_item.kernel_name)
+                saver.reload(temporary, sched_item.kernel_name, bounds)
 
         elif isinstance(sched_item, ReturnFromKernel):
             if sched_idx == len(knl.schedule) - 1:
@@ -777,10 +1122,12 @@ def save_and_reload_temporaries(knl):
                 interesting_temporaries = (
                     temporaries_written_in_subkernel(knl, subkernel))
 
-            for temporary in liveness[sched_idx].live_in & interesting_temporaries:
+            for temporary in sorted(
+                    liveness[sched_idx].live_in & interesting_temporaries):
                 logger.info("saving {0} before return of {1}"
                         .format(temporary, sched_item.kernel_name))
-                saver.save(temporary, sched_item.kernel_name)
+                saver.save(temporary, sched_item.kernel_name,
+                        get_save_bounds(temporary, sched_item.kernel_name))
 
     return saver.finish()
 
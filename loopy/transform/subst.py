@@ -139,9 +139,12 @@ def extract_subst(kernel, subst_name, template, parameters=()):
             CallbackMapper, WalkMapper, IdentityMapper)
     dfmapper = CallbackMapper(gather_exprs, WalkMapper())
 
+    def gather_insn_exprs(expr):
+        dfmapper(expr)
+        return expr
+
     for insn in kernel.instructions:
-        dfmapper(insn.assignees)
-        dfmapper(insn.expression)
+        insn.with_transformed_expressions(gather_insn_exprs)
 
     for sr in six.itervalues(kernel.substitutions):
         dfmapper(sr.expression)
@@ -0,0 +1,389 @@
+from __future__ import division, absolute_import
+
+__copyright__ = "Copyright (C) 2018 Andreas Kloeckner"
+
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+
+import six
+
+import islpy as isl
+from islpy import dim_type
+
+from loopy.diagnostic import LoopyError, StaticValueFindingError
+
+__doc__ = """
+.. currentmodule:: loopy
+
+.. autodata:: DEFAULT_CACHE_SIZES
+
+.. autofunction:: choose_cache_tile_sizes
+
+.. autofunction:: tile_for_cache
+"""
+
+
+#: Sizes (in bytes) of the data caches of a typical x86 core, innermost
+#: (L1) first.
+DEFAULT_CACHE_SIZES = (32*1024, 256*1024, 8*1024*1024)
+
+
+# {{{ tile footprint model
+
+class _TileFootprintModel(object):
+    """Evaluates the number of bytes of global arrays touched by one tile of
+    the iteration space. The tile is modeled by bounding each tiled iname
+    to its first *size* values by way of an extra domain parameter, so that
+    the footprint only needs to be computed once.
+    """
+
+    def __init__(self, kernel, inames, parameters):
+        from loopy.transform.parameter import fix_parameters
+        if parameters:
+            kernel = fix_parameters(kernel, **parameters)
+
+        from loopy.preprocess import preprocess_kernel, infer_unknown_types
+        kernel = infer_unknown_types(kernel, expect_completion=True)
+        kernel = preprocess_kernel(kernel)
+
+        self.extents = {}
+        for iname in inames:
+            try:
+                self.extents[iname] = kernel.get_constant_iname_length(iname)
+            except StaticValueFindingError:
+                raise LoopyError("could not determine a constant length for "
+                        "iname '%s'--pass values for all domain parameters "
+                        "in 'parameters'" % iname)
+
+        var_name_gen = kernel.get_var_name_generator()
+        self.size_params = dict(
+                (iname, var_name_gen("%s_tile_size" % iname))
+                for iname in inames)
+
+        new_domains = list(kernel.domains)
+        for iname in inames:
+            dom_idx = kernel.get_home_domain_index(iname)
+            dom = new_domains[dom_idx]
+            size_param = self.size_params[iname]
+
+            iname_idx = dom.get_var_dict()[iname][1]
+            lower_bound = dom.dim_min(iname_idx)
+
+            nparams = dom.dim(dim_type.param)
+            dom = (dom
+                    .add_dims(dim_type.param, 1)
+                    .set_dim_name(dim_type.param, nparams, size_param))
+
+            size_pwaff = isl.PwAff.var_on_domain(
+                    dom.space.params(), dim_type.param, nparams)
+            lower_bound = lower_bound.align_params(dom.space.params())
+
+            from loopy.isl_helpers import make_loop_bounds_from_pwaffs
+            new_domains[dom_idx] = dom & make_loop_bounds_from_pwaffs(
+                    dom.space, iname, lower_bound, lower_bound + size_pwaff - 1)
+
+        assumptions = kernel.assumptions
+        for size_param in six.itervalues(self.size_params):
+            nparams = assumptions.dim(dim_type.param)
+            assumptions = (assumptions
+                    .add_dims(dim_type.param, 1)
+                    .set_dim_name(dim_type.param, nparams, size_param))
+
+        tile_kernel = kernel.copy(domains=new_domains, assumptions=assumptions)
+
+        from loopy.statistics import gather_access_footprints, count
+        footprints = {}
+        for (var_name, _), footprint in six.iteritems(
+                gather_access_footprints(tile_kernel, ignore_uncountable=True)):
+            if var_name not in tile_kernel.arg_dict:
+                continue
+
+            if var_name in footprints:
+                footprints[var_name] = footprints[var_name] | footprint
+            else:
+                footprints[var_name] = footprint
+
+        self.footprint_bytes = dict(
+                (var_name,
+                    int(tile_kernel.arg_dict[var_name].dtype.numpy_dtype.itemsize)
+                    * count(tile_kernel, footprint))
+                for var_name, footprint in six.iteritems(footprints))
+
+    def __call__(self, tile_sizes):
+        """Return the total footprint in bytes of a tile with edge lengths
+        given by the :class:`dict` *tile_sizes*.
+        """
+        param_values = dict(
+                (self.size_params[iname], size)
+                for iname, size in six.iteritems(tile_sizes))
+
+        return sum(
+                fp_bytes.eval_with_dict(param_values)
+                for fp_bytes in six.itervalues(self.footprint_bytes))
+
+# }}}
+
+
+# {{{ choose_cache_tile_sizes
+
+def choose_cache_tile_sizes(kernel, inames, cache_sizes=DEFAULT_CACHE_SIZES,
+        parameters=None, fill_fraction=0.5):
+    """Choose tile sizes for *inames* for each level of a cache hierarchy.
+
+    Tiles are grown greedily, one cache level at a time starting from the
+    innermost, by repeatedly doubling the tile length along the iname that
+    adds the fewest bytes of footprint (as determined from
+    :func:`loopy.gather_access_footprints`) per iteration gained, for as
+    long as the footprint of all global arrays within one tile stays below
+    *fill_fraction* times the size of that cache level. Tiles at each level
+    are multiples of the tiles at the level inside of it, unless they span
+    the entire loop.
+
+    Reduction inames may not be tiled, since their loops are nested inside
+    the loops of the instruction containing the reduction. The footprint of
+    a tile spans their entire range. To tile across a reduction, write it as
+    an explicit accumulation.
+
+    :arg inames: a list of inames (or a comma-separated string) to tile.
+    :arg cache_sizes: a sequence of cache sizes in bytes, innermost first.
+        Sizes must not decrease from one level to the next.
+    :arg parameters: a :class:`dict` of values for the domain parameters of
+        *kernel*, used to evaluate loop lengths and footprints.
+    :returns: a list of :class:`dict` instances, one per entry of
+        *cache_sizes*, mapping each iname in *inames* to its tile length
+        for that cache level.
+    """
+
+    if isinstance(inames, str):
+        inames = [iname.strip() for iname in inames.split(",")]
+
+    result, _ = _choose_cache_tile_sizes(kernel, inames, cache_sizes,
+            parameters, fill_fraction)
+    return result
+
+
+def _choose_cache_tile_sizes(kernel, inames, cache_sizes, parameters,
+        fill_fraction):
+    cache_sizes = list(cache_sizes)
+    if any(inner_size > outer_size
+            for inner_size, outer_size in zip(cache_sizes, cache_sizes[1:])):
+        raise LoopyError("cache sizes must be given innermost first and "
+                "must not decrease, got %s" % cache_sizes)
+
+    from loopy.kernel.instruction import MultiAssignmentBase
+    for insn in kernel.instructions:
+        if not isinstance(insn, MultiAssignmentBase):
+            continue
+
+        reduction_inames = insn.reduction_inames() & frozenset(inames)
+        if reduction_inames:
+            raise LoopyError("cannot tile reduction inames %s of "
+                    "instruction '%s'--write the reduction as an explicit "
+                    "accumulation instead"
+                    % (", ".join(sorted(reduction_inames)), insn.id))
+
+    model = _TileFootprintModel(kernel, inames, parameters)
+
+    def volume(tile_sizes):
+        result = 1
+        for size in six.itervalues(tile_sizes):
+            result *= size
+        return result
+
+    tile_sizes = dict((iname, 1) for iname in inames)
+    result = []
+
+    for cache_size in cache_sizes:
+        capacity = fill_fraction * cache_size
+
+        while True:
+            best_tile_sizes = None
+            best_score = None
+
+            for iname in inames:
+                extent = model.extents[iname]
+                if tile_sizes[iname] >= extent:
+                    continue
+
+                trial_tile_sizes = tile_sizes.copy()
+                trial_tile_sizes[iname] = min(2*tile_sizes[iname], extent)
+
+                footprint = model(trial_tile_sizes)
+                if footprint > capacity:
+                    continue
+
+                score = footprint / volume(trial_tile_sizes)
+                if best_score is None or score < best_score:
+                    best_tile_sizes = trial_tile_sizes
+                    best_score = score
+
+            if best_tile_sizes is None:
+                break
+
+            tile_sizes = best_tile_sizes
+
+        result.append(tile_sizes.copy())
+
+    return result, model.extents
+
+# }}}
+
+
+# {{{ tile_for_cache
+
+def _get_access_inames(kernel, var_name):
+    """Return a tuple *(index_inames, outer_inames)* of the inames occurring
+    in the indices of the accesses to *var_name* and the inames shared by
+    all instructions containing these accesses.
+    """
+    from loopy.symbolic import (
+            ArrayAccessFinder, SubstitutionRuleExpander, get_dependencies)
+    from loopy.kernel.instruction import MultiAssignmentBase
+
+    expander = SubstitutionRuleExpander(kernel.substitutions)
+    finder = ArrayAccessFinder(var_name)
+
+    index_inames = set()
+    outer_inames = None
+    for insn in kernel.instructions:
+        if not isinstance(insn, MultiAssignmentBase):
+            continue
+
+        accesses = [
+                access
+                for expr in (insn.expression,) + tuple(insn.assignees)
+                for access in finder(expander(expr))]
+        if not accesses:
+            continue
+
+        for access in accesses:
+            index_inames.update(get_dependencies(access.index))
+
+        if outer_inames is None:
+            outer_inames = insn.within_inames
+        else:
+            outer_inames = outer_inames & insn.within_inames
+
+    return (
+            frozenset(index_inames) & kernel.all_inames(),
+            outer_inames or frozenset())
+
+
+def tile_for_cache(kernel, inames, cache_sizes=DEFAULT_CACHE_SIZES,
+        parameters=None, fill_fraction=0.5, prefetch=()):
+    """Tile the loops over *inames* for a cache hierarchy.
+
+    Tile sizes are determined using :func:`choose_cache_tile_sizes`. Each
+    iname is then split (using :func:`loopy.split_iname`) once per cache level
+    in which its tile length changes, and the loops are prioritized (using
+    :func:`loopy.prioritize_loops`) so that the tile loops of outer cache
+    levels nest around those of inner ones, with the point loops innermost.
+    Within one level, loops are nested in the order given in *inames*.
+
+    For an iname ``i``, the loop over tiles for cache level *k* (counting
+    from 1 for the innermost cache) is named ``i_l<k>``, the point loop is
+    named ``i_inner``.
+
+    :arg prefetch: a list of names of arrays for which to add private buffers
+        spanning one innermost tile, using :func:`loopy.add_prefetch`. The
+        fetch is placed inside the innermost tile loops, around the point
+        loops, so the accesses to these arrays may not depend on reduction
+        inames.
+
+    See :func:`choose_cache_tile_sizes` for the remaining arguments.
+    """
+
+    if isinstance(inames, str):
+        inames = [iname.strip() for iname in inames.split(",")]
+
+    level_tile_sizes, extents = _choose_cache_tile_sizes(kernel, inames,
+            cache_sizes, parameters, fill_fraction)
+
+    var_name_gen = kernel.get_var_name_generator()
+
+    nlevels = len(level_tile_sizes)
+    level_inames = [[] for i in range(nlevels)]
+    point_inames = []
+
+    from loopy.transform.iname import split_iname, prioritize_loops
+
+    for iname in inames:
+        splits = []
+        outer_size = extents[iname]
+        for level in range(nlevels-1, -1, -1):
+            size = level_tile_sizes[level][iname]
+            if size < outer_size:
+                splits.append((level, size))
+                outer_size = size
+
+        current_iname = iname
+        for i, (level, size) in enumerate(splits):
+            outer_iname = var_name_gen("%s_l%d" % (iname, level+1))
+            if i + 1 == len(splits):
+                inner_iname = var_name_gen("%s_inner" % iname)
+            else:
+                # gets split further below
+                inner_iname = var_name_gen("%s_inner_l%d" % (iname, level+1))
+
+            kernel = split_iname(kernel, current_iname, size,
+                    outer_iname=outer_iname, inner_iname=inner_iname)
+
+            level_inames[level].append(outer_iname)
+            current_iname = inner_iname
+
+        point_inames.append(current_iname)
+
+    loop_order = [
+            iname
+            for level in range(nlevels-1, -1, -1)
+            for iname in level_inames[level]] + point_inames
+
+    if len(loop_order) > 1:
+        kernel = prioritize_loops(kernel, loop_order)
+
+    from loopy.kernel.data import temp_var_scope
+    from loopy.transform.data import add_prefetch
+    for var_name in prefetch:
+        access_inames, outer_inames = _get_access_inames(kernel, var_name)
+        sweep_inames = [
+                iname for iname in point_inames
+                if iname in access_inames]
+        fetch_outer_inames = outer_inames - frozenset(point_inames)
+
+        other_inames = access_inames - fetch_outer_inames - set(sweep_inames)
+        if other_inames:
+            raise LoopyError("cannot prefetch '%s' around the point loops, "
+                    "since its accesses depend on inames %s inside of them "
+                    "(e.g. reduction inames)--write reductions as explicit "
+                    "accumulations"
+                    % (var_name, ", ".join(sorted(other_inames))))
+
+        kernel = add_prefetch(kernel, var_name,
+                sweep_inames=sweep_inames,
+                fetch_outer_inames=fetch_outer_inames,
+                default_tag=None,
+                temporary_scope=temp_var_scope.PRIVATE)
+
+    return kernel
+
+# }}}
+
+# vim: foldmethod=marker
@@ -25,6 +25,7 @@ THE SOFTWARE.
 import six
 
 from pymbolic.mapper import CombineMapper
+from pymbolic.primitives import Expression
 import numpy as np
 
 from loopy.tools import is_integer
@@ -47,27 +48,34 @@ def _debug(kernel, s, *args):
 # {{{ type inference mapper
 
 class TypeInferenceMapper(CombineMapper):
-    def __init__(self, kernel, new_assignments=None):
+    def __init__(self, kernel, new_assignments=None, type_cache=None):
         """
         :arg new_assignments: mapping from names to either
             :class:`loopy.kernel.data.TemporaryVariable`
             or
             :class:`loopy.kernel.data.KernelArgument`
             instances
+        :arg type_cache: *None* or a :class:`dict` in which the inferred
+            types of (sub)expressions are memoized by object identity. It
+            may only be shared among mappers that see the same types for all
+            variables, and it keeps the expressions it holds alive, so it
+            should be short-lived (e.g. local to one call of
+            :func:`infer_unknown_types`).
         """
         self.kernel = kernel
         if new_assignments is None:
             new_assignments = {}
         self.new_assignments = new_assignments
         self.symbols_with_unknown_types = set()
+        self.type_cache = type_cache
+        self._encountered_unknown_type = False
 
     def __call__(self, expr, return_tuple=False, return_dtype_set=False):
         kwargs = {}
         if return_tuple:
             kwargs["return_tuple"] = True
 
-        result = super(TypeInferenceMapper, self).__call__(
-                expr, **kwargs)
+        result = self.rec(expr, **kwargs)
 
         assert isinstance(result, list)
 
@@ -90,15 +98,50 @@ class TypeInferenceMapper(CombineMapper):
                 return result
 
     # /!\ Introduce caches with care--numpy.float32(x) and numpy.float64(x)
-    # are Python-equal (for many common constants such as integers).
+    # are Python-equal (for many common constants such as integers). This is
+    # why the type cache is keyed on object identity.
+
+    def rec(self, expr, *args, **kwargs):
+        if (self.type_cache is None
+                or args
+                or not isinstance(expr, Expression)):
+            return CombineMapper.rec(self, expr, *args, **kwargs)
+
+        key = (id(expr), kwargs.get("return_tuple", False))
+
+        try:
+            cached_expr, result = self.type_cache[key]
+        except KeyError:
+            pass
+        else:
+            # The cache holds a reference to the expression, so its id
+            # cannot have been reused.
+            if cached_expr is expr:
+                return result
+
+        encountered_unknown_type_outside = self._encountered_unknown_type
+        self._encountered_unknown_type = False
+
+        result = CombineMapper.rec(self, expr, *args, **kwargs)
+
+        # Results that depend on variables of unknown type are incomplete.
+        if not self._encountered_unknown_type:
+            self.type_cache[key] = (expr, result)
+
+        self._encountered_unknown_type = (
+                self._encountered_unknown_type
+                or encountered_unknown_type_outside)
+
+        return result
 
     def copy(self):
-        return type(self)(self.kernel, self.new_assignments)
+        return type(self)(self.kernel, self.new_assignments, self.type_cache)
 
     def with_assignments(self, names_to_vars):
         new_ass = self.new_assignments.copy()
         new_ass.update(names_to_vars)
-        return type(self)(self.kernel, new_ass)
+        return type(self)(self.kernel, new_ass,
+                {} if self.type_cache is not None else None)
 
     @staticmethod
     def combine(dtype_sets):
@@ -317,6 +360,7 @@ class TypeInferenceMapper(CombineMapper):
             result = [obj.dtype]
             if result[0] is None:
                 self.symbols_with_unknown_types.add(expr.name)
+                self._encountered_unknown_type = True
                 return []
             else:
                 return result
@@ -540,11 +584,22 @@ def infer_unknown_types(kernel, expect_completion=False):
     # topological order.
     sccs = compute_sccs(dep_graph)
 
+    # Vars whose types may need to be revisited once that of a given var changes
+    reverse_dep_graph = dict(
+            (var_name, set()) for var_name in names_for_type_inference)
+    for written_var, read_vars in six.iteritems(dep_graph):
+        for read_var in read_vars:
+            reverse_dep_graph[read_var].add(written_var)
+
     item_lookup = _DictUnionView([
             new_temp_vars,
             new_arg_dict
             ])
-    type_inf_mapper = TypeInferenceMapper(kernel, item_lookup)
+
+    # Inferred types of expressions are memoized, but only as long as the
+    # types of the variables do not change.
+    type_cache = {}
+    type_inf_mapper = TypeInferenceMapper(kernel, item_lookup, type_cache)
 
     from loopy.symbolic import SubstitutionRuleExpander
     subst_expander = SubstitutionRuleExpander(kernel.substitutions)
@@ -552,26 +607,19 @@ def infer_unknown_types(kernel, expect_completion=False):
     # {{{ work on type inference queue
 
     from loopy.kernel.data import TemporaryVariable, KernelArgument
+    from collections import deque
 
     for var_chain in sccs:
-        changed_during_last_queue_run = False
-        queue = var_chain[:]
+        # Within an SCC, only variables whose inputs have changed type are
+        # revisited.
+        scc_names = set(var_chain)
+        queue = deque(var_chain)
+        queued = set(var_chain)
         failed_names = set()
 
-        while queue or changed_during_last_queue_run:
-            if not queue and changed_during_last_queue_run:
-                changed_during_last_queue_run = False
-                # Optimization: If there's a single variable in the SCC without
-                # a self-referential dependency, then the type is known after a
-                # single iteration (we don't need to look at the expressions
-                # again).
-                if len(var_chain) == 1:
-                    single_var, = var_chain
-                    if single_var not in dep_graph[single_var]:
-                        break
-                queue = var_chain[:]
-
-            name = queue.pop(0)
+        while queue:
+            name = queue.popleft()
+            queued.remove(name)
             item = item_lookup[name]
 
             debug("inferring type for %s %s", type(item).__name__, item.name)
@@ -589,7 +637,6 @@ def infer_unknown_types(kernel, expect_completion=False):
                 debug("     success: %s", new_dtype)
                 if new_dtype != item.dtype:
                     debug("     changed from: %s", item.dtype)
-                    changed_during_last_queue_run = True
 
                     if isinstance(item, TemporaryVariable):
                         new_temp_vars[name] = item.copy(dtype=new_dtype)
@@ -597,6 +644,14 @@ def infer_unknown_types(kernel, expect_completion=False):
                         new_arg_dict[name] = item.copy(dtype=new_dtype)
                     else:
                         raise LoopyError("unexpected item type in type inference")
+
+                    type_cache.clear()
+
+                    for dependent_name in reverse_dep_graph[name]:
+                        if (dependent_name in scc_names
+                                and dependent_name not in queued):
+                            queue.append(dependent_name)
+                            queued.add(dependent_name)
             else:
                 debug("     failure")
 
@@ -629,6 +684,7 @@ def infer_unknown_types(kernel, expect_completion=False):
 
                 # can't infer type yet, put back into queue
                 queue.append(name)
+                queued.add(name)
             else:
                 # we've made progress, reset failure markers
                 failed_names = set()
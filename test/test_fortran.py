@@ -494,6 +494,67 @@ def test_precompute_some_exist(ctx_factory):
     lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=128, m=128, ell=128))
 
 
+def test_auto_parallelize(ctx_factory):
+    fortran_src = """
+        subroutine dgemm(m,n,ell,a,b,c)
+          implicit none
+          real*8 a(m,ell),b(ell,n),c(m,n)
+          integer m,n,k,i,j,ell
+
+          do j = 1,n
+            do i = 1,m
+              do k = 1,ell
+                c(i,j) = c(i,j) + b(k,j)*a(i,k)
+              end do
+            end do
+          end do
+        end subroutine
+        """
+
+    knl, = lp.parse_fortran(fortran_src)
+    ref_knl = knl
+
+    knl = lp.auto_parallelize(knl, local_size=16)
+    from loopy.kernel.data import LocalIndexTag, GroupIndexTag
+
+    # column-major: 'i' has unit stride
+    assert knl.iname_to_tag["i_inner"] == LocalIndexTag(0)
+    assert isinstance(knl.iname_to_tag["j"], GroupIndexTag)
+    assert knl.iname_to_tag.get("k") is None
+
+    ctx = ctx_factory()
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=20, m=35, ell=10))
+
+
+def test_prioritize_loops_by_stride(ctx_factory):
+    fortran_src = """
+        subroutine dgemm(m,n,ell,a,b,c)
+          implicit none
+          real*8 a(m,ell),b(ell,n),c(m,n)
+          integer m,n,k,i,j,ell
+
+          do i = 1,m
+            do j = 1,n
+              do k = 1,ell
+                c(i,j) = c(i,j) + b(k,j)*a(i,k)
+              end do
+            end do
+          end do
+        end subroutine
+        """
+
+    knl, = lp.parse_fortran(fortran_src)
+    ref_knl = knl
+
+    knl = lp.prioritize_loops_by_stride(knl)
+
+    # column-major: 'i' innermost, then 'k' for the accesses to 'b'
+    assert knl.loop_priority == frozenset([("j", "k"), ("k", "i"), ("j", "i")])
+
+    ctx = ctx_factory()
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=20, m=35, ell=10))
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         exec(sys.argv[1])
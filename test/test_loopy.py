@@ -152,6 +152,36 @@ def test_type_inference_with_type_dependencies():
     assert knl.temporary_variables["d"].dtype == to_loopy_type(np.complex128)
 
 
+def test_type_inference_cache():
+    from pymbolic import parse
+    from loopy.type_inference import TypeInferenceMapper
+    from loopy.types import to_loopy_type
+
+    knl = lp.make_kernel(
+            "{[i]: 0<=i<n}",
+            """
+            <> tmp = a[i] + 1
+            out[i] = 2*tmp
+            """,
+            [lp.GlobalArg("a", np.float32, shape="n"), "..."])
+
+    expr = parse("2*tmp + a[i]")
+    a_i = expr.children[1]
+
+    # type of tmp still unknown: only the type of a[i] gets cached
+    type_cache = {}
+    mapper = TypeInferenceMapper(knl, type_cache=type_cache)
+    mapper(expr, return_dtype_set=True)
+    assert (id(a_i), False) in type_cache
+    assert (id(expr), False) not in type_cache
+
+    knl = lp.infer_unknown_types(knl, expect_completion=True)
+    type_cache = {}
+    mapper = TypeInferenceMapper(knl, type_cache=type_cache)
+    assert mapper(expr) == to_loopy_type(np.float32)
+    assert type_cache[id(expr), False] == (expr, [to_loopy_type(np.float32)])
+
+
 def test_sized_and_complex_literals(ctx_factory):
     ctx = ctx_factory()
 
@@ -547,6 +577,59 @@ def test_arg_guessing_with_reduction(ctx_factory):
     print(lp.CompiledKernel(ctx, knl).get_highlighted_code())
 
 
+def test_make_kernel_reuses_parse_results():
+    from loopy.kernel.creation import (
+            _PARSED_INSTRUCTIONS_CACHE, _PARSED_DOMAINS_CACHE)
+
+    domain = "{[i]: 0<=i<n}"
+    insns = """
+        <> tmp = a[i] * 2  {id=scale}
+        out[i] = tmp + 1  {id=shift}
+        """
+
+    def make(data, **kwargs):
+        return lp.make_kernel(domain, insns, data, name="parse_cache_test",
+                **kwargs)
+
+    knl1 = make([lp.GlobalArg("a", np.float32), "..."])
+    n_cached_insns = len(_PARSED_INSTRUCTIONS_CACHE)
+    n_cached_domains = len(_PARSED_DOMAINS_CACHE)
+
+    knl2 = make([lp.GlobalArg("a", np.float64), "..."])
+    assert len(_PARSED_INSTRUCTIONS_CACHE) == n_cached_insns
+    assert len(_PARSED_DOMAINS_CACHE) == n_cached_domains
+
+    # the kernels are not affected by each other's transformations
+    assert knl1.id_to_insn["scale"] == knl2.id_to_insn["scale"]
+    assert knl1.arg_dict["a"].dtype != knl2.arg_dict["a"].dtype
+    knl2 = lp.split_iname(knl2, "i", 16)
+    assert knl1.id_to_insn["shift"].within_inames == frozenset(["i"])
+
+    # defines take part in the cache key
+    knl3 = make(["..."], defines={"n": 16})
+    assert len(_PARSED_DOMAINS_CACHE) == n_cached_domains + 1
+    assert knl3.get_constant_iname_length("i") == 16
+
+
+def test_arg_guessing_for_many_instructions():
+    # ArgumentGuesser, shape guessing and iname inference each handle all
+    # variables in a single pass
+    n = 300
+    insns = "\n".join(
+            "<> t{k} = a{k}[i] * b[i, {k}]\nout{k}[i] = t{k} + {k}".format(k=k)
+            for k in range(n))
+
+    knl = lp.make_kernel("{[i]: 0<=i<m}", insns,
+            [lp.GlobalArg("b", np.float32, shape=("m", n)), "..."])
+
+    assert len(knl.instructions) == 2*n
+    assert knl.arg_dict["a17"].shape == (lp.symbolic.parse("m"),)
+    assert knl.arg_dict["out%d" % (n-1)].shape == (lp.symbolic.parse("m"),)
+    assert all(
+            insn.within_inames == frozenset(["i"])
+            for insn in knl.instructions)
+
+
 def test_unknown_arg_shape(ctx_factory):
     ctx = ctx_factory()
     from loopy.target.pyopencl import PyOpenCLTarget
@@ -885,6 +968,95 @@ def test_slab_decomposition_does_not_double_execute(ctx_factory):
         print("_________________________________")
 
 
+def test_auto_peel_loops(ctx_factory):
+    ctx = ctx_factory()
+
+    ref_knl = lp.make_kernel(
+        "{ [i]: 0<=i<n and i<m }",
+        "out[i] = 2*a[i]",
+        assumptions="n,m>=1")
+    ref_knl = lp.add_and_infer_dtypes(ref_knl, {"a": np.float32})
+
+    knl = lp.split_iname(ref_knl, "i", 16)
+    knl = lp.set_options(knl, auto_peel_loops=True)
+
+    code = lp.generate_code_v2(knl).device_code()
+    print(code)
+    assert "bulk slab for 'i_outer'" in code
+    assert "final slab for 'i_outer'" in code
+    assert "i_inner <= 15;" in code
+
+    # multi-piece bounds with explicit slabs
+    slab_knl = lp.split_iname(ref_knl, "i", 16, slabs=(1, 1))
+
+    for n, m in [(37, 30), (30, 37), (32, 32), (5, 40)]:
+        for test_knl in [knl, slab_knl]:
+            lp.auto_test_vs_ref(ref_knl, ctx, test_knl,
+                    parameters=dict(n=n, m=m))
+
+
+def test_guard_minimization(ctx_factory):
+    ctx = ctx_factory()
+
+    ref_knl = lp.make_kernel(
+        "{[j,i,k]: 0<=j<m and 0<=i<n and 0<=k<2n}",
+        """
+        for j
+            out[j,i] = 2*a[j,i] {id=a}
+            out2[j,k] = 3*b[j,k] {id=b,dep=a}
+        end
+        """)
+    ref_knl = lp.add_and_infer_dtypes(ref_knl, {"a,b": np.float32})
+    ref_knl = lp.set_options(ref_knl, disable_guard_minimization=True)
+
+    knl = lp.set_options(ref_knl, disable_guard_minimization=False)
+
+    assert lp.generate_code_v2(ref_knl).n_eliminated_conditionals == 0
+
+    # the check for n >= 1 is hoisted out of the loop over j
+    cgr = lp.generate_code_v2(knl)
+    print(cgr.device_code())
+    assert cgr.n_eliminated_conditionals == 1
+    code = cgr.device_code()
+    assert code.index("if (-1 + n >= 0)") < code.index("for (int j")
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=5, m=7))
+
+    # {{{ merging of adjacent and nested identical conditionals
+
+    from cgen import Block, If, For, Comment, Assign, InlineInitializer, POD
+    from loopy.target.c import CExpression, GuardMinimizer
+    from pymbolic import var
+    from pymbolic.primitives import LogicalAnd
+
+    def cexpr(expr):
+        return CExpression(lambda expr, prec: str(expr), expr)
+
+    cond = cexpr(var("n").gt(0))
+    ast = Block([
+        If(cond, Assign("x[0]", "1")),
+        Comment("comment"),
+        If(cond, Block([
+            Assign("x[1]", "2"),
+            If(cexpr(LogicalAnd((var("n").gt(0), var("m").gt(0)))),
+                Assign("x[2]", "3"))])),
+        For(InlineInitializer(POD(np.int32, "i"), 0), "i < n", "++i",
+            If(cexpr(var("n").gt(var("i"))), Assign("x[i]", "0"))),
+        ])
+
+    minimizer = GuardMinimizer(ref_knl)
+    result = minimizer(ast)
+    print(result)
+
+    assert minimizer.n_eliminated == 1
+    outer_if, loop = result.contents
+    assert isinstance(outer_if, If) and isinstance(loop, For)
+    assert "n > 0" not in str(outer_if.then_)
+    assert "m > 0" in str(outer_if.then_)
+
+    # }}}
+
+
 def test_multiple_writes_to_local_temporary():
     # Loopy would previously only handle barrier insertion correctly if exactly
     # one instruction wrote to each local temporary. This tests that multiple
@@ -1592,6 +1764,58 @@ def test_save_across_inames_with_same_tag(ctx_factory, debug=False):
     save_and_reload_temporaries_test(queue, knl, np.arange(10), debug)
 
 
+def test_save_of_partially_written_local_arrays(ctx_factory, debug=False):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    knl = lp.make_kernel(
+            "{[j]: 0 <= j < 8}",
+            """
+            a[j] = j
+            ... gbarrier
+            c[j] = a[j] + 1
+            ... gbarrier
+            d[j] = 2*c[j]
+            ... gbarrier
+            out[j] = d[j]
+            """,
+            [
+                lp.GlobalArg("out", np.int32, shape=(8,)),
+                ] + [
+                lp.TemporaryVariable(name, np.int32, shape=(16,),
+                    scope=lp.temp_var_scope.LOCAL)
+                for name in ["a", "c", "d"]],
+            seq_dependencies=True)
+
+    knl = lp.tag_inames(knl, dict(j="l.0"))
+
+    save_and_reload_temporaries_test(queue, knl, 2*np.arange(1, 9), debug)
+
+    knl = lp.preprocess_kernel(knl)
+    knl = lp.get_one_scheduled_kernel(knl)
+    knl = lp.save_and_reload_temporaries(knl)
+
+    # Only the written part of each temporary is saved.
+    for insn in knl.instructions:
+        if insn.id.endswith(".save"):
+            iname, = (
+                    iname for iname in insn.within_inames
+                    if "_save_axis_" in iname)
+            assert knl.get_constant_iname_length(iname) == 8
+
+    # c is only reloaded in the subkernel that reads it, not in the one that
+    # writes it.
+    assert len([
+            insn for insn in knl.instructions
+            if insn.id.startswith("c.reload")]) == 1
+
+    # The save slots for a and d are used in disjoint subkernels.
+    save_slots = [
+            name for name in knl.temporary_variables
+            if "_save_slot" in name]
+    assert len(save_slots) == 2
+
+
 def test_missing_temporary_definition_detection():
     knl = lp.make_kernel(
             "{ [i]: 0<=i<10 }",
@@ -2831,6 +3055,34 @@ def test_check_for_variable_access_ordering_with_aliasing():
         lp.get_one_scheduled_kernel(knl)
 
 
+def test_check_for_variable_access_ordering_long_dependency_chain():
+    nchain = 1100
+
+    insns = ["a[0, i] = 0 {id=w0}"]
+    insns.extend(
+            "a[%d, i] = a[%d, i] + 1 {id=w%d, dep=w%d}"
+            % (k % 10, (k-1) % 10, k, k-1)
+            for k in range(1, nchain))
+    insns.append("a[0, i] = 17 {id=unordered}")
+
+    knl = lp.make_kernel(
+            "{[i]: 0<=i<n}",
+            insns,
+            [lp.GlobalArg("a", np.float32, shape=(10, "n")), "..."])
+
+    from loopy.check import check_variable_access_ordered
+    from loopy.diagnostic import VariableAccessNotOrdered
+
+    with pytest.raises(VariableAccessNotOrdered) as exc_info:
+        check_variable_access_ordered(knl)
+    assert "'w0' which writes the variable 'a' and 'unordered'" in str(
+            exc_info.value)
+
+    # ordering the last write after the chain resolves the issue
+    check_variable_access_ordered(lp.add_dependency(knl, "id:unordered",
+        "id:w%d" % (nchain-1)))
+
+
 @pytest.mark.parametrize(("second_index", "expect_barrier"),
         [
             ("2*i", True),
@@ -2856,6 +3108,31 @@ def test_no_barriers_for_nonoverlapping_access(second_index, expect_barrier):
     assert barrier_between(knl, "first", "second") == expect_barrier
 
 
+@pytest.mark.parametrize(("second_row", "expect_barrier"),
+        [
+            (0, True),
+            (1, False),
+            ])
+def test_no_barriers_for_accesses_to_distinct_rows(second_row, expect_barrier):
+    knl = lp.make_kernel(
+            "{[i]: 0<=i<128}",
+            """
+            a[0, i] = 12  {id=first}
+            a[%d, 127-i] = 13  {id=second,dep=first}
+            """ % second_row,
+            [
+                lp.TemporaryVariable("a", lp.auto, shape=(2, 128),
+                    scope=lp.temp_var_scope.LOCAL),
+                ])
+
+    knl = lp.tag_inames(knl, "i:l.0")
+
+    knl = lp.preprocess_kernel(knl)
+    knl = lp.get_one_scheduled_kernel(knl)
+
+    assert barrier_between(knl, "first", "second") == expect_barrier
+
+
 def test_half_complex_conditional(ctx_factory):
     ctx = ctx_factory()
     queue = cl.CommandQueue(ctx)
@@ -2869,6 +3146,175 @@ def test_half_complex_conditional(ctx_factory):
     knl(queue)
 
 
+def test_kernel_copy_carries_over_derived_data():
+    knl = lp.make_kernel(
+            "{[i,j]: 0 <= i,j < n}",
+            """
+            a[i, j] = 2*b[i, j] {id=first}
+            c[i, j] = a[i, j] {id=second}
+            """)
+
+    writer_map = knl.writer_map()
+    all_inames = knl.all_inames()
+    id_to_insn = knl.id_to_insn
+
+    # tagging leaves instructions and domains untouched
+    tagged_knl = lp.tag_inames(knl, {"i": "g.0"})
+    assert tagged_knl.writer_map() is writer_map
+    assert tagged_knl.all_inames() is all_inames
+    assert tagged_knl.id_to_insn is id_to_insn
+
+    # changing the instructions invalidates instruction-derived data only
+    new_knl = lp.set_instruction_priority(knl, "id:second", 5)
+    assert new_knl.writer_map() is not writer_map
+    assert new_knl.writer_map() == writer_map
+    assert new_knl.id_to_insn["second"].priority == 5
+    assert new_knl.all_inames() is all_inames
+
+    # changing the domains invalidates domain-derived data
+    split_knl = lp.split_iname(knl, "i", 4)
+    assert split_knl.all_inames() == frozenset(["i_outer", "i_inner", "j"])
+
+
+def test_incremental_persistent_hash():
+    from pymbolic import parse
+    from loopy.tools import LoopyKeyBuilder
+    lkb = LoopyKeyBuilder()
+
+    def make_knl(factor):
+        return lp.make_kernel(
+                "{[i]: 0 <= i < n}",
+                """
+                a[i] = 2*b[i] {id=first}
+                c[i] = %d*a[i] {id=second}
+                """ % factor)
+
+    knl = make_knl(3)
+    knl_key = lkb(knl)
+    assert hash(knl) == hash(make_knl(3))
+
+    # hashes of copies reuse the digests of unchanged fields...
+    tagged_knl = lp.tag_inames(knl, {"i": "g.0"})
+    assert (tagged_knl._field_persistent_hash_digests["instructions"]
+            is knl._field_persistent_hash_digests["instructions"])
+    assert lkb(tagged_knl) != knl_key
+
+    # ...and agree with hashes computed from scratch
+    changed_knl = knl.copy(instructions=[
+        knl.id_to_insn["first"],
+        knl.id_to_insn["second"].copy(expression=parse("4*a[i]"))])
+    assert lkb(changed_knl) != knl_key
+    assert lkb(changed_knl) == lkb(make_knl(4))
+
+
+def test_schedule_hint():
+    from loopy.schedule import EnterLoop, LeaveLoop, RunInstruction
+
+    knl = lp.make_kernel(
+            "{[i,j,k]: 0<=i,j,k<n}",
+            """
+            b[j] = 2 {id=b}
+            c[k, i] = 3 {id=c}
+            a[i] = 1 {id=a, dep=c}
+            """,
+            [lp.GlobalArg("a,b,c", np.float32, shape=lp.auto), "..."])
+
+    # not the order the scheduler would pick on its own
+    hint = [
+            EnterLoop(iname="i"),
+            EnterLoop(iname="k"), RunInstruction(insn_id="c"), LeaveLoop(iname="k"),
+            RunInstruction(insn_id="a"),
+            LeaveLoop(iname="i"),
+            EnterLoop(iname="j"), RunInstruction(insn_id="b"), LeaveLoop(iname="j")]
+
+    def get_schedule(knl, schedule_hint=None):
+        knl = lp.get_one_scheduled_kernel(
+                lp.preprocess_kernel(knl), schedule_hint=schedule_hint)
+        return [
+                sched_item for sched_item in knl.schedule
+                if isinstance(sched_item, (EnterLoop, LeaveLoop, RunInstruction))]
+
+    assert get_schedule(knl) != hint
+    assert get_schedule(knl, hint) == hint
+
+    # the hint takes precedence over instruction priorities
+    prio_knl = lp.set_instruction_priority(knl, "id:b", 10)
+    assert get_schedule(prio_knl)[1] == RunInstruction(insn_id="b")
+    assert get_schedule(prio_knl, hint) == hint
+
+    # the hint is mapped through split_iname renames
+    split_knl = lp.split_iname(knl, "k", 4)
+    split_knl = lp.split_iname(split_knl, "i", 16, outer_tag="g.0")
+    assert get_schedule(split_knl, hint) == [
+            EnterLoop(iname="i_inner"),
+            EnterLoop(iname="k_outer"), EnterLoop(iname="k_inner"),
+            RunInstruction(insn_id="c"),
+            LeaveLoop(iname="k_inner"), LeaveLoop(iname="k_outer"),
+            RunInstruction(insn_id="a"),
+            LeaveLoop(iname="i_inner"),
+            EnterLoop(iname="j"), RunInstruction(insn_id="b"), LeaveLoop(iname="j")]
+
+    # a hint that cannot be followed only affects the search order
+    bad_hint = [
+            EnterLoop(iname="k"), EnterLoop(iname="i"),
+            RunInstruction(insn_id="c"), RunInstruction(insn_id="a"),
+            LeaveLoop(iname="i"), LeaveLoop(iname="k")]
+    sched = get_schedule(knl, bad_hint)
+    assert set(
+            sched_item.insn_id for sched_item in sched
+            if isinstance(sched_item, RunInstruction)) == set(["a", "b", "c"])
+    assert sched.index(EnterLoop(iname="i")) < sched.index(EnterLoop(iname="k"))
+
+
+def test_assumption_versions(ctx_factory):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    knl = lp.make_kernel(
+            "{[i]: 0<=i<n}",
+            "out[i] = 2*a[i]",
+            [lp.GlobalArg("a,out", np.float32, shape="n"), "..."],
+            assumptions="n>=1")
+    knl = lp.split_iname(knl, "i", 16, outer_tag="g.0", inner_tag="l.0")
+
+    with pytest.raises(lp.LoopyError):
+        lp.add_assumption_versions(knl, ["n <= 0"])
+
+    # listed in the 'wrong' order: the more specialized version comes last
+    ver_knl = lp.add_assumption_versions(knl, ["n mod 4 = 0", "n mod 16 = 0"])
+
+    code = lp.generate_code_v2(ver_knl)
+    assert [dp.name for dp in code.device_programs] == [
+            "loopy_kernel_v1", "loopy_kernel_v0", "loopy_kernel_generic"]
+    assert "if" not in str(code.device_programs[0].ast)
+    assert "if" in str(code.device_programs[-1].ast)
+
+    # run the dispatcher with the host code of each version replaced by a
+    # function recording its name
+    host_ns = {}
+    exec(code.host_code(), host_ns)
+
+    def make_recorder(name):
+        def record(*args, **kwargs):
+            return name
+        return record
+
+    for name in ["v1", "v0", "generic"]:
+        host_name = "_lpy_host_loopy_kernel_" + name
+        host_ns[host_name] = make_recorder(name)
+
+    dispatch = host_ns["_lpy_host_loopy_kernel"]
+    for n, version in [(16*5, "v1"), (4*5, "v0"), (17, "generic")]:
+        assert dispatch(None, queue, a=None, out=None, n=n) == version
+
+        a = np.random.rand(n).astype(np.float32)
+        evt, (out,) = ver_knl(queue, a=a)
+        assert np.array_equal(out, 2*a)
+
+    with pytest.raises(lp.LoopyError):
+        lp.generate_code_v2(ver_knl.copy(target=lp.CTarget()))
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         exec(sys.argv[1])
@@ -287,6 +287,95 @@ def test_LazilyUnpicklingListWithEqAndPersistentHashing():
     # }}}
 
 
+def test_SetOperationCache():  # noqa
+    import islpy as isl
+    from loopy.kernel.tools import SetOperationCache, SetOperationCacheManager
+
+    cache = SetOperationCache(max_size=2)
+    cache_manager = SetOperationCacheManager(cache)
+
+    dom_i = isl.BasicSet("[n] -> {[i]: 0 <= i < n}")
+    dom_j = isl.BasicSet("[n] -> {[j]: 0 <= j < 2n}")
+
+    ubound = cache_manager.dim_max(dom_i, 0)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # an equal set that is a different object
+    assert cache_manager.dim_max(
+            isl.BasicSet("[n] -> {[i]: 0 <= i < n}"), 0) is ubound
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # isl considers these equal, but the parameter name differs
+    dom_k = isl.BasicSet("[m] -> {[i]: 0 <= i < m}")
+    assert "m" in str(cache_manager.dim_max(dom_k, 0))
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # least recently used entry (for dom_i) gets evicted
+    cache_manager.dim_min(dom_j, 0)
+    assert cache.evictions == 1
+    cache_manager.dim_max(dom_k, 0)
+    assert (cache.hits, cache.misses) == (2, 3)
+    cache_manager.dim_max(dom_i, 0)
+    assert (cache.hits, cache.misses) == (2, 4)
+
+    assert cache.hit_rate() == 2/6
+    cache.clear()
+    assert cache.hit_rate() is None
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+        reason="lazy imports need module-level __getattr__")
+def test_import_is_lazy():
+    # Run in a fresh interpreter, since other tests will have imported
+    # everything already.
+    import subprocess
+    script = "\n".join([
+        "import sys",
+        "import loopy as lp",
+        "heavy = [name for name in [",
+        "        'loopy.transform.iname', 'loopy.statistics',",
+        "        'loopy.frontend.fortran', 'loopy.auto_test',",
+        "        'loopy.codegen', 'loopy.target.pyopencl', 'pyopencl',",
+        "        'cgen', 'genpy']",
+        "    if name in sys.modules]",
+        "assert not heavy, heavy",
+        # attribute access goes through the module's __getattr__
+        "assert 'split_iname' not in vars(lp)",
+        "assert lp.split_iname.__module__ == 'loopy.transform.iname'",
+        "assert 'loopy.transform.iname' in sys.modules",
+        "assert 'split_iname' in vars(lp)",
+        "assert 'tile_for_cache' in dir(lp)",
+        "namespace = {}",
+        "exec('from loopy import *', namespace)",
+        "assert set(lp.__all__) <= set(namespace)",
+        ])
+
+    subprocess.check_call([sys.executable, "-c", script])
+
+
+@pytest.mark.skipif(sys.version_info < (3, 3),
+        reason="needs time.process_time")
+def test_import_time():
+    # Measured in a fresh interpreter, excluding its startup. CPU time is
+    # used so that a loaded test machine does not cause spurious failures.
+    # The bound is generous, it only catches gross regressions such as
+    # heavy modules being imported eagerly again.
+    import subprocess
+    script = "\n".join([
+        "import time",
+        "start = time.process_time()",
+        "import loopy",
+        "print(time.process_time() - start)",
+        ])
+
+    import_time = min(
+            float(subprocess.check_output([sys.executable, "-c", script]))
+            for i in range(3))
+    print("import loopy: %.2f s CPU time" % import_time)
+
+    assert import_time < 5
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         exec(sys.argv[1])
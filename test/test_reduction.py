@@ -288,6 +288,136 @@ def test_global_mc_parallel_reduction(ctx_factory, size):
             ref_knl, ctx, knl, parameters={"n": size})
 
 
+@pytest.mark.parametrize("op_name, uses_subgroups", [
+    ("sum", True),
+    ("max", True),
+    ("product", False),
+    ])
+@pytest.mark.parametrize("size", [100, 256])
+def test_subgroup_local_reduction(op_name, uses_subgroups, size):
+    # The sub-group collectives cannot be assumed to be available on the
+    # test device, so only the generated code is checked.
+    def make_knl(subgroup_size):
+        knl = lp.make_kernel(
+                "{[i]: 0<=i<%d}" % size,
+                "out[0] = %s(i, a[i])" % op_name,
+                [lp.GlobalArg("a", np.float32, shape=(size,)), "..."],
+                target=lp.PyOpenCLTarget(subgroup_size=subgroup_size))
+        return lp.tag_inames(knl, "i:l.0")
+
+    knl = make_knl(32)
+    code = lp.generate_code_v2(knl).device_code()
+    print(code)
+
+    assert ("sub_group_reduce_" in code) == uses_subgroups
+    assert ("cl_khr_subgroups" in code) == uses_subgroups
+
+    def count_barriers(knl):
+        return lp.get_synchronization_map(knl)["barrier_local"].eval_with_dict({})
+
+    if uses_subgroups:
+        # log2(32) fewer tree stages, one extra barrier before the result
+        assert count_barriers(knl) == count_barriers(make_knl(None)) - 4
+    else:
+        assert count_barriers(knl) == count_barriers(make_knl(None))
+
+    from pickle import loads, dumps
+    assert loads(dumps(knl.target)) == knl.target
+    assert knl.target != make_knl(None).target
+
+
+@pytest.mark.parametrize("size", [1000, 16, 1])
+def test_two_stage_global_reduction(ctx_factory, size):
+    ctx = ctx_factory()
+
+    knl = lp.make_kernel(
+            "{[i, j]: 0 <= i < n and 0 <= j < 3}",
+            """
+            z[j] = sum(i, a[i] + j)
+            """,
+            assumptions="n >= 1")
+    knl = lp.add_and_infer_dtypes(knl, {"a": np.float32})
+
+    ref_knl = knl
+
+    # The second stage runs only across the groups of 'j', so 'j' has to be
+    # mapped to the first group axis.
+    with pytest.raises(lp.LoopyError):
+        lp.preprocess_kernel(lp.tag_inames(knl, "j:g.1,i:g.0"))
+
+    def variant_group_only(knl):
+        return lp.tag_inames(knl, "j:g.0,i:g.1")
+
+    def variant_group_and_local(knl):
+        knl = lp.tag_inames(knl, "j:g.0")
+        return lp.split_iname(knl, "i", 16, outer_tag="g.1", inner_tag="l.0")
+
+    def variant_group_and_seq(knl):
+        knl = lp.tag_inames(knl, "j:g.0")
+        return lp.split_iname(knl, "i", 16, outer_tag="g.1")
+
+    def variant_two_group_inames(knl):
+        knl = lp.tag_inames(knl, "j:g.0")
+        return lp.split_iname(knl, "i", 16, outer_tag="g.1", inner_tag="g.2")
+
+    for variant in [
+            variant_group_only,
+            variant_group_and_local,
+            variant_group_and_seq,
+            variant_two_group_inames,
+            ]:
+        knl = variant(ref_knl)
+
+        lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters={"n": size})
+
+
+def test_two_stage_global_argmax(ctx_factory):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    knl = lp.make_kernel(
+            "{[i]: 0 <= i < n}",
+            """
+            max_val, max_idx = argmax(i, fabs(a[i]), i)
+            """)
+    knl = lp.add_and_infer_dtypes(knl, {"a": np.float32})
+    knl = lp.split_iname(knl, "i", 32, outer_tag="g.0", inner_tag="l.0")
+
+    from loopy.kernel.instruction import BarrierInstruction
+    assert any(
+            isinstance(insn, BarrierInstruction)
+            and insn.synchronization_kind == "global"
+            for insn in lp.preprocess_kernel(knl).instructions)
+
+    a = np.random.randn(10000).astype(np.float32)
+    evt, (max_idx, max_val) = knl(queue, a=a, out_host=True)
+    assert max_val == np.max(np.abs(a))
+    assert max_idx == np.argmax(np.abs(a))
+
+
+def test_two_stage_global_segmented_reduction(ctx_factory):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    knl = lp.make_kernel(
+            "{[i]: 0 <= i < n}",
+            """
+            out, <>flag_out = reduce(segmented(sum), i, arr[i], segflag[i])
+            """)
+    knl = lp.add_and_infer_dtypes(knl, {"arr": np.float32, "segflag": np.int32})
+    # The local-parallel tree does not preserve the order of the operands,
+    # so keep the inner loop sequential.
+    knl = lp.split_iname(knl, "i", 16, outer_tag="g.0")
+
+    n = 1000
+    arr = np.random.rand(n).astype(np.float32)
+    segflag = np.zeros(n, dtype=np.int32)
+    segflag[[0, 300, 577]] = 1
+
+    evt, (out,) = knl(queue, arr=arr, segflag=segflag, out_host=True)
+    assert np.allclose(out, arr[577:].sum())
+
+
 def test_argmax(ctx_factory):
     logging.basicConfig(level=logging.INFO)
 
@@ -233,6 +233,41 @@ def test_local_parallel_scan(ctx_factory, n):
     assert (a == np.cumsum(np.arange(n)**2)).all()
 
 
+@pytest.mark.parametrize("n, expected_barriers", [
+    # no sub-group collectives: Hillis-Steele scan
+    (48, None),
+    # one sub-group
+    (32, 1),
+    # scan within sub-groups, scan of sub-group totals, update
+    (128, 3),
+    ])
+def test_subgroup_local_parallel_scan(n, expected_barriers):
+    # The sub-group collectives cannot be assumed to be available on the
+    # test device, so only the generated code is checked.
+    knl = lp.make_kernel(
+        "{[i,j]: 0<=i<%d and 0<=j<=i}" % n,
+        """
+        out[i] = sum(j, a[j])
+        """,
+        [lp.GlobalArg("a", np.int32, shape=(n,)), "..."],
+        target=lp.PyOpenCLTarget(subgroup_size=32))
+
+    knl = lp.tag_inames(knl, dict(i="l.0"))
+    knl = lp.realize_reduction(knl, force_scan=True)
+
+    code = lp.generate_code_v2(knl).device_code()
+    print(code)
+
+    assert ("sub_group_scan_inclusive_add" in code) == (
+            expected_barriers is not None)
+    assert ("sub_group_scan_exclusive_add" in code) == (
+            expected_barriers is not None and n > 32)
+
+    nbarriers = lp.get_synchronization_map(knl)["barrier_local"].eval_with_dict({})
+    if expected_barriers is not None:
+        assert nbarriers == expected_barriers
+
+
 def test_local_parallel_scan_with_nonzero_lower_bounds(ctx_factory):
     ctx = ctx_factory()
     queue = cl.CommandQueue(ctx)
@@ -256,6 +291,45 @@ def test_local_parallel_scan_with_nonzero_lower_bounds(ctx_factory):
     assert (out == np.cumsum(np.arange(1, 17)**2)).all()
 
 
+@pytest.mark.parametrize("n, block_size", [
+    (1, 2),
+    (100, 8),
+    # more block totals than fit into one work group
+    (5000, 16),
+    ])
+@pytest.mark.parametrize("stride", [1, 2])
+def test_multi_group_scan(ctx_factory, n, block_size, stride):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    knl = lp.make_kernel(
+        "[n] -> {[i,j]: 1<=i<n+1 and 0<=j<=%d*(i-1)}" % stride,
+        """
+        out[i-1] = sum(j, a[j])
+        """,
+        "...")
+
+    knl = lp.tag_inames(knl, dict(i="g.0"))
+    knl = lp.add_dtypes(knl, dict(a=np.int32))
+
+    # all dependencies are explicit, the single-writer heuristic is not used
+    from warnings import catch_warnings, simplefilter
+    with catch_warnings(record=True) as warn_list:
+        simplefilter("always")
+        knl = lp.realize_reduction(knl, force_scan=True,
+                group_scan_block_size=block_size)
+        with lp.CacheMode(False):
+            lp.generate_code_v2(knl)
+
+    assert not [w for w in warn_list
+            if issubclass(w.category, lp.LoopyWarning)]
+
+    a = np.random.randint(0, 10, stride*(n-1)+1).astype(np.int32)
+    evt, (out,) = knl(queue, a=a, n=n)
+
+    assert (out == np.cumsum(a)[::stride]).all()
+
+
 def test_scan_extra_constraints_on_domain():
     knl = lp.make_kernel(
         "{[i,j,k]: 0<=i<n and 0<=j<=i and i=k}",
@@ -338,7 +412,7 @@ def test_scan_unsupported_tags():
     pass
 
 
-@pytest.mark.parametrize("i_tag", ["for", "l.0"])
+@pytest.mark.parametrize("i_tag", ["for", "l.0", "g.0"])
 def test_argmax(ctx_factory, i_tag):
     logging.basicConfig(level=logging.INFO)
 
@@ -398,7 +472,7 @@ def check_segmented_scan_output(arr, segment_boundaries_indices, out):
     (3, (0, 2)),
     (3, (0, 1, 2)),
     (16, (0, 4, 8, 12))])
-@pytest.mark.parametrize("iname_tag", ("for", "l.0"))
+@pytest.mark.parametrize("iname_tag", ("for", "l.0", "g.0"))
 def test_segmented_scan(ctx_factory, n, segment_boundaries_indices, iname_tag):
     ctx = ctx_factory()
     queue = cl.CommandQueue(ctx)
@@ -24,6 +24,7 @@ THE SOFTWARE.
 
 import six
 import sys
+import pytest
 from pyopencl.tools import (  # noqa
         pytest_generate_tests_for_pyopencl
         as pytest_generate_tests)
@@ -1092,6 +1093,60 @@ def test_strided_footprint():
     assert 2*num < denom
 
 
+def test_estimate_cache_misses():
+    knl = lp.make_kernel(
+            "{[i,j]: 0<=i,j<n}",
+            "b[i,j] = 2*a[i,j]",
+            target=lp.CTarget())
+    knl = lp.add_and_infer_dtypes(knl, dict(a=np.float64))
+
+    n = 128
+    nlines = n*n*8 // lp.DEFAULT_CACHE_LINE_SIZE
+
+    def get_misses(loop_order, cache_sizes):
+        misses = lp.estimate_cache_misses(
+                lp.prioritize_loops(knl, loop_order), dict(n=n),
+                cache_sizes=cache_sizes, nsamples=n*n)
+        return [
+                [level_misses.filter_by(variable=[name]).sum()
+                    for name in ["a", "b"]]
+                for level_misses in misses]
+
+    # unit stride: only the first access to each line misses
+    assert get_misses("i,j", [8*1024]) == [[nlines, nlines]]
+
+    # every access misses the small cache, the large one holds everything
+    assert get_misses("j,i", [8*1024, 1024**2]) == [
+            [n*n, n*n], [nlines, nlines]]
+
+    # everything fits: misses are computed without simulating
+    misses = lp.estimate_cache_misses(knl, dict(n=8))
+    profile = lp.get_reuse_distance_profile(knl, dict(n=8))
+    for level_misses in misses + profile.predict_misses(
+            lp.DEFAULT_CACHE_SIZES):
+        assert level_misses.filter_by(variable=["a"]).sum() == 8
+        assert level_misses.filter_by(variable=["b"]).sum() == 8
+
+    # split loops have piecewise bounds
+    split_knl = lp.prioritize_loops(
+            lp.split_iname(knl, "j", 16), "i,j_outer,j_inner")
+    misses, = lp.estimate_cache_misses(
+            split_knl, dict(n=100), cache_sizes=[1024])
+    assert misses.filter_by(variable=["a"]).sum() == (
+            100*100*8 // lp.DEFAULT_CACHE_LINE_SIZE)
+
+    # scheduled kernels are used as-is, sampled counts are rounded
+    sched_knl = lp.fix_parameters(lp.prioritize_loops(knl, "j,i"), n=n)
+    sched_knl = lp.get_one_scheduled_kernel(lp.preprocess_kernel(sched_knl))
+    misses, = lp.estimate_cache_misses(
+            sched_knl, {}, cache_sizes=[8*1024], nsamples=1000)
+    assert all(isinstance(count, int) for _, count in misses.items())
+    assert misses.filter_by(variable=["a"]).sum() == n*n
+
+    with pytest.raises(lp.LoopyError):
+        lp.estimate_cache_misses(sched_knl, dict(n=n))
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         exec(sys.argv[1])
@@ -533,6 +533,436 @@ def test_uniquify_instruction_ids():
     assert all(isinstance(id, str) for id in insn_ids)
 
 
+def test_hoist_invariants(ctx_factory):
+    ctx = ctx_factory()
+
+    knl = lp.make_kernel(
+            "{[i,j,k]: 0<=i,j,k<n}",
+            """
+            out[i, j] = sum(k, a[i, k]) * (b[i] + 2*c[i]) * d[j] \
+                    + sin(b[i]) * d[j]  {id=upd}
+            """,
+            [lp.GlobalArg("out", np.float32, shape="n,n"), "..."],
+            lang_version=(2018, 1))
+    knl = lp.add_and_infer_dtypes(knl, {"a,b,c,d": np.float32})
+
+    ref_knl = knl
+
+    knl = lp.tag_inames(knl, {"i": "g.0"})
+    knl = lp.hoist_invariants(knl)
+
+    hoisted_insns = [
+            insn for insn in knl.instructions if insn.id != "upd"]
+    assert len(hoisted_insns) == 2
+    assert all(
+            insn.within_inames == frozenset(["i"])
+            and insn.id in knl.id_to_insn["upd"].depends_on
+            for insn in hoisted_insns)
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=20))
+
+
+def test_hoist_invariants_respects_loop_writes():
+    knl = lp.make_kernel(
+            "{[i,j]: 0<=i,j<n}",
+            """
+            for i
+                <> acc = 0  {id=init}
+                for j
+                    acc = acc + a[j]  {id=sum,dep=init}
+                    <> t = 2*b[i]  {id=t}
+                    out[i, j] = acc * b[i] * b[i] + t  {id=out,dep=sum:t}
+                end
+            end
+            """,
+            lang_version=(2018, 1))
+
+    knl = lp.hoist_invariants(knl)
+
+    assert knl.id_to_insn["sum"].within_inames == frozenset(["i", "j"])
+    assert knl.id_to_insn["t"].within_inames == frozenset(["i"])
+
+    out_insn = knl.id_to_insn["out"]
+    hoisted_insn, = [
+            knl.id_to_insn[dep_id]
+            for dep_id in out_insn.depends_on - frozenset(["sum", "t"])]
+    assert hoisted_insn.within_inames == frozenset(["i"])
+    assert "acc" in out_insn.read_dependency_names()
+    assert "acc" not in hoisted_insn.read_dependency_names()
+
+    lp.get_one_scheduled_kernel(lp.preprocess_kernel(
+        lp.add_and_infer_dtypes(knl, {"a,b": np.float32})))
+
+
+def test_tile_for_cache(ctx_factory):
+    ctx = ctx_factory()
+
+    knl = lp.make_kernel(
+            "{[i,j,k]: 0<=i,j,k<n}",
+            "c[i, j] = sum(k, a[i, k]*b[k, j])",
+            [lp.GlobalArg("a,b,c", np.float32, shape="n,n"), "..."],
+            lang_version=(2018, 1))
+
+    n = 64
+    cache_sizes = (8192, 32768)
+    tile_sizes = lp.choose_cache_tile_sizes(knl, "i,j",
+            cache_sizes=cache_sizes, parameters=dict(n=n))
+
+    assert len(tile_sizes) == len(cache_sizes)
+    for level_tile_sizes, cache_size in zip(tile_sizes, cache_sizes):
+        ti, tj = [level_tile_sizes[iname] for iname in "ij"]
+        # the tile footprint spans the entire reduction
+        assert 4*(ti*n + n*tj + ti*tj) <= cache_size // 2
+    for iname in "ij":
+        assert tile_sizes[1][iname] % tile_sizes[0][iname] == 0
+
+    with pytest.raises(lp.LoopyError):
+        lp.choose_cache_tile_sizes(knl, "i,j",
+                cache_sizes=cache_sizes[::-1], parameters=dict(n=n))
+
+    # reduction inames cannot be tiled
+    with pytest.raises(lp.LoopyError):
+        lp.choose_cache_tile_sizes(knl, "i,j,k",
+                cache_sizes=cache_sizes, parameters=dict(n=n))
+
+    # a fetch of 'a' would have to be inside the reduction
+    with pytest.raises(lp.LoopyError):
+        lp.tile_for_cache(knl, "i,j",
+                cache_sizes=cache_sizes, parameters=dict(n=n), prefetch=["a"])
+
+    knl = lp.make_kernel(
+            "{[i,j,k]: 0<=i,j,k<n}",
+            "c[i, j] = c[i, j] + a[i, k]*b[k, j]",
+            [lp.GlobalArg("a,b,c", np.float32, shape="n,n"), "..."],
+            lang_version=(2018, 1))
+
+    ref_knl = knl
+
+    knl = lp.tile_for_cache(knl, "i,j,k",
+            cache_sizes=cache_sizes, parameters=dict(n=n), prefetch=["a"])
+
+    assert set(["i_l1", "i_l2", "i_inner"]) <= knl.all_inames()
+    assert "a_fetch" in knl.temporary_variables
+
+    # the fetch is hoisted out of the point loops
+    fetch_insn, = [
+            insn for insn in knl.instructions
+            if "a_fetch" in insn.assignee_var_names()]
+    assert not fetch_insn.within_inames & set(["i_inner", "j_inner", "k_inner"])
+    assert fetch_insn.within_inames >= set(["i_l1", "j_l1", "k_l1"])
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=n))
+
+
+def test_alias_temporaries_by_liveness(ctx_factory):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    knl = lp.make_kernel(
+            "{[i,j,k]: 0<=i<n and 0<=j,k<16}",
+            """
+            <> ta[j] = a[16*i + j]  {id=ta}
+            <> tb[k] = 2*ta[15 - k]  {id=tb}
+            out1[16*i + k] = tb[k]  {id=out1}
+            <> tc[j] = b[16*i + j] + tb[j]  {id=tc,dep=out1}
+            out2[16*i + j] = tc[15 - j]  {id=out2}
+            """,
+            [lp.GlobalArg("a,b,out1,out2", np.float32, shape="16*n"), "..."],
+            lang_version=(2018, 1))
+    knl = lp.tag_inames(knl, {"i": "g.0", "j": "l.0", "k": "l.0"})
+    knl = lp.set_temporary_scope(knl, "ta,tb,tc", "local")
+
+    ref_knl = knl
+
+    knl = lp.get_one_scheduled_kernel(lp.preprocess_kernel(knl))
+    assert knl.local_mem_use() == 3*16*4
+
+    knl = lp.alias_temporaries_by_liveness(knl)
+    assert knl.local_mem_use() == 2*16*4
+
+    temps = knl.temporary_variables
+    # tb is live throughout, but a barrier separates the uses of ta and tc
+    assert temps["ta"].base_storage == temps["tc"].base_storage is not None
+    assert temps["tb"].base_storage is None
+
+    a = np.random.rand(64).astype(np.float32)
+    b = np.random.rand(64).astype(np.float32)
+    evt, (out1, out2) = knl(queue, a=a, b=b, n=4)
+    evt, (ref_out1, ref_out2) = ref_knl(queue, a=a, b=b, n=4)
+
+    assert np.array_equal(out1, ref_out1)
+    assert np.array_equal(out2, ref_out2)
+
+
+@pytest.mark.parametrize("privatize", [True, False])
+def test_make_reduction_atomic(ctx_factory, privatize):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    knl = lp.make_kernel(
+            "{[i,k]: 0<=i<n and 0<=k<3}",
+            "out[k] = sum(i, a[i, k])",
+            [lp.GlobalArg("out", np.float32, shape=(3,)),
+                lp.GlobalArg("a", np.float32, shape="n,3"), "..."],
+            lang_version=(2018, 1))
+
+    knl = lp.tag_inames(knl, {"k": "g.1"})
+    knl = lp.split_iname(knl, "i", 32, outer_tag="g.0", inner_tag="l.0")
+
+    # one update per work group vs one per work item
+    contention = 7 if privatize else 7*32
+    assert lp.make_update_atomic(knl, "insn", privatize=privatize,
+            max_contention=contention - 1, parameters=dict(n=7*32)) is knl
+
+    knl = lp.make_update_atomic(knl, "insn", privatize=privatize,
+            max_contention=contention, parameters=dict(n=7*32))
+    assert lp.estimate_update_contention(
+            knl, "insn", parameters=dict(n=7*32)) == contention
+
+    a = np.random.rand(1000, 3).astype(np.float32)
+    evt, (out,) = knl(queue, a=a)
+
+    assert np.allclose(out, a.sum(axis=0), rtol=1e-5)
+
+
+@pytest.mark.parametrize("privatize", [True, False])
+def test_make_histogram_update_atomic(ctx_factory, privatize):
+    ctx = ctx_factory()
+    queue = cl.CommandQueue(ctx)
+
+    knl = lp.make_kernel(
+            "{[i]: 0<=i<n}",
+            "hist[bins[i]] = hist[bins[i]] + 1",
+            [lp.GlobalArg("hist", np.int32, shape=(20,)),
+                lp.GlobalArg("bins", np.int32, shape="n"), "..."],
+            lang_version=(2018, 1))
+    knl = lp.split_iname(knl, "i", 64, outer_tag="g.0", inner_tag="l.0")
+
+    # the footprint of hist is data-dependent, so its size is used instead
+    assert lp.estimate_update_contention(
+            knl, "insn", parameters=dict(n=2000)) == 2048/20
+
+    knl = lp.make_update_atomic(knl, "insn", privatize=privatize)
+    assert any(
+            temp.scope == lp.temp_var_scope.LOCAL
+            for temp in knl.temporary_variables.values()) == privatize
+
+    bins = np.random.randint(0, 20, 2000).astype(np.int32)
+    evt, (hist,) = knl(queue, bins=bins, hist=np.zeros(20, np.int32))
+
+    assert (hist == np.bincount(bins, minlength=20)).all()
+
+
+def test_double_buffered_prefetch(ctx_factory):
+    ctx = ctx_factory()
+
+    knl = lp.make_kernel(
+            "{[i,j,k]: 0<=i,j,k<n}",
+            "c[i, j] = sum(k, a[i, k]*b[k, j])",
+            [lp.GlobalArg("a,b,c", np.float32, shape="n,n"), "..."],
+            lang_version=(2018, 1))
+
+    ref_knl = knl
+
+    knl = lp.split_iname(knl, "i", 16, outer_tag="g.0", inner_tag="l.1")
+    knl = lp.split_iname(knl, "j", 16, outer_tag="g.1", inner_tag="l.0")
+    knl = lp.split_iname(knl, "k", 16)
+
+    def count_barriers(knl):
+        knl = lp.get_one_scheduled_kernel(lp.preprocess_kernel(knl))
+        return len([sched_item for sched_item in knl.schedule
+            if isinstance(sched_item, lp.schedule.Barrier)])
+
+    plain_knl = lp.add_prefetch(knl, "a", ["k_inner", "i_inner"])
+    plain_knl = lp.add_prefetch(plain_knl, "b", ["j_inner", "k_inner"])
+
+    knl = lp.add_prefetch(knl, "a", ["k_inner", "i_inner"], double_buffer=True)
+    knl = lp.add_prefetch(knl, "b", ["j_inner", "k_inner"], double_buffer=True)
+
+    assert knl.temporary_variables["a_fetch"].shape == (2, 16, 16)
+    assert count_barriers(plain_knl) == 2
+    assert count_barriers(knl) == 1
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=70))
+
+
+def test_double_buffered_private_prefetch(ctx_factory):
+    ctx = ctx_factory()
+
+    knl = lp.make_kernel(
+            "{[i,k]: 0<=i<n and 0<=k<64}",
+            "out[i] = sum(k, a[i, k])",
+            [lp.GlobalArg("a", np.float32, shape="n,64"), "..."],
+            lang_version=(2018, 1))
+
+    ref_knl = knl
+
+    knl = lp.split_iname(knl, "i", 16, outer_tag="g.0", inner_tag="l.0")
+    knl = lp.split_iname(knl, "k", 4)
+    knl = lp.add_prefetch(knl, "a", ["k_inner"], default_tag=None,
+            temporary_scope=lp.temp_var_scope.PRIVATE,
+            double_buffer=True, double_buffer_iname="k_outer")
+
+    assert not any(isinstance(insn, lp.BarrierInstruction)
+            for insn in knl.instructions)
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=100))
+
+
+def test_double_buffered_prefetch_piecewise_lower_bound(ctx_factory):
+    ctx = ctx_factory()
+
+    def make_knl(assumptions):
+        # the loop over k starts at max(0, m-16)
+        knl = lp.make_kernel(
+                "{[i,k]: 0<=i<n and 0<=k<m and k>=m-16}",
+                "out[i] = sum(k, a[i, k])",
+                [lp.GlobalArg("a", np.float32, shape="n,m"), "..."],
+                assumptions=assumptions,
+                lang_version=(2018, 1))
+        ref_knl = knl
+
+        knl = lp.split_iname(knl, "i", 16, outer_tag="g.0", inner_tag="l.0")
+        knl = lp.split_iname(knl, "k", 4)
+        knl = lp.add_prefetch(knl, "a", ["k_inner"], default_tag=None,
+                temporary_scope=lp.temp_var_scope.PRIVATE,
+                double_buffer=True, double_buffer_iname="k_outer")
+
+        return ref_knl, knl
+
+    ref_knl, knl = make_knl("m mod 4 = 0 and m >= 1")
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=100, m=32))
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=100, m=8))
+
+    # The first tile may be partial, so the fetch for the next iteration
+    # would need different storage loop bounds.
+    with pytest.raises(lp.LoopyError):
+        make_knl("m >= 1")
+
+
+def test_unroll_and_jam(ctx_factory):
+    ctx = ctx_factory()
+
+    knl = lp.make_kernel(
+            "{[i,j]: 0<=i,j<n}",
+            "y[i] = sum(j, a[i, j]*x[j])",
+            assumptions="n>=1")
+    knl = lp.add_and_infer_dtypes(knl, {"a,x": np.float32})
+
+    ref_knl = knl
+
+    knl = lp.unroll_and_jam(knl, "i", 4)
+
+    # one private accumulator per unrolled copy
+    assert lp.preprocess_kernel(knl).temporary_variables["acc_j"].shape == (4,)
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=37))
+
+
+def test_unroll_and_jam_legality():
+    from loopy.kernel.tools import find_loop_carried_dependences
+
+    knl = lp.make_kernel(
+            "{[i]: 0<=i<n}",
+            "a[i+1] = 2*a[i]")
+    assert find_loop_carried_dependences(knl, "i") == [("a", "insn", "insn")]
+
+    with pytest.raises(lp.LoopyError):
+        lp.unroll_and_jam(knl, "i", 4)
+
+    knl = lp.make_kernel(
+            "{[i]: 0<=i<n}",
+            "a[2*i+1] = 2*a[2*i]")
+    assert find_loop_carried_dependences(knl, "i") == []
+
+    knl = lp.make_kernel(
+            "{[i,j]: 0<=i,j<n}",
+            "y[i] = sum(j, a[i, j])")
+    with pytest.raises(lp.LoopyError):
+        lp.unroll_and_jam(knl, "j", 4)
+
+
+def test_auto_parallelize(ctx_factory):
+    ctx = ctx_factory()
+
+    knl = lp.make_kernel(
+            "{[i,j]: 1<=i<n and 0<=j<n}",
+            "a[i,j] = a[i-1,j] + b[j,i]",
+            assumptions="n>=2")
+    knl = lp.add_and_infer_dtypes(knl, {"a,b": np.float32})
+
+    from loopy.kernel.tools import (
+            find_loop_carried_dependences,
+            find_interchange_preventing_dependences)
+    assert find_loop_carried_dependences(knl, "i") == [("a", "insn", "insn")]
+    assert find_loop_carried_dependences(knl, "j") == []
+    assert find_interchange_preventing_dependences(knl, "i", "j") == []
+
+    # no hardware axes on the C target, but the parallel loop goes outside
+    cknl = lp.auto_parallelize(knl.copy(target=lp.CTarget()))
+    assert not cknl.iname_to_tag
+    assert cknl.loop_priority == frozenset([("j", "i")])
+
+    ref_knl = knl
+    knl = lp.auto_parallelize(knl)
+    from loopy.kernel.data import LocalIndexTag
+    assert knl.iname_to_tag["j_inner"] == LocalIndexTag(0)
+    assert knl.iname_to_tag.get("i") is None
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=50))
+
+
+def test_interchange_preventing_dependences():
+    from loopy.kernel.tools import find_interchange_preventing_dependences
+
+    knl = lp.make_kernel(
+            "{[i,j]: 1<=i,j<n}",
+            "a[i,j] = a[i-1,j+1] + 1")
+    assert find_interchange_preventing_dependences(knl, "i", "j") \
+            == [("a", "insn", "insn")]
+
+    knl = lp.make_kernel(
+            "{[i,j]: 1<=i,j<n}",
+            "a[i,j] = a[i-1,j-1] + 1")
+    assert find_interchange_preventing_dependences(knl, "i", "j") == []
+
+
+def test_prioritize_loops_by_stride(ctx_factory):
+    ctx = ctx_factory()
+
+    knl = lp.make_kernel(
+            "{[i,j]: 0<=i,j<n}",
+            "b[j,i] = 2*a[j,i] + c[i]")
+    knl = lp.add_and_infer_dtypes(knl, {"a,c": np.float32})
+
+    ref_knl = knl
+    knl = lp.prioritize_loops_by_stride(knl, parameters=dict(n=100))
+    assert knl.loop_priority == frozenset([("j", "i")])
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=100))
+
+    # interchanging the loops would change the result
+    knl = lp.make_kernel(
+            "{[i,j]: 1<=i,j<n}",
+            "a[j,i] = a[j-1,i+1] + 1")
+    knl = lp.prioritize_loops_by_stride(knl)
+    assert not knl.loop_priority
+
+    # nonlinear subscripts: access counts and strides cannot be determined
+    knl = lp.make_kernel(
+            "{[i,j,k]: 0<=i,j<n and 0<=k<16}",
+            "b[k,j,i] = 2*a[k,j,i] + c[k*k + i*j]",
+            [lp.GlobalArg("a,b", np.float32, shape="16,n,n"),
+                lp.GlobalArg("c", np.float32, shape="n*n+256"), "..."])
+    knl = lp.tag_inames(knl, "k:l.0")
+
+    ref_knl = knl
+    knl = lp.prioritize_loops_by_stride(knl, parameters=dict(n=100))
+    assert knl.loop_priority == frozenset([("j", "i")])
+
+    lp.auto_test_vs_ref(ref_knl, ctx, knl, parameters=dict(n=100))
+
+
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         exec(sys.argv[1])